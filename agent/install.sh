@@ -144,7 +144,25 @@ if command -v sudo >/dev/null 2>&1; then
 fi
 
 echo "[3/6] Downloading agent from $URL ..."
-curl $CURL_OPTS "$URL/agent/stacksense_agent.py" -o "$INSTALL_DIR/stacksense_agent.py"
+# Re-runs (redeploys, token rotation) only re-fetch a changed agent: the ETag of the
+# installed copy goes out as If-None-Match and the server answers 304 with no body.
+AGENT_FILE="$INSTALL_DIR/stacksense_agent.py"
+ETAG_FILE="$INSTALL_DIR/.stacksense_agent.etag"
+IF_NONE_MATCH=()
+if [ -s "$AGENT_FILE" ] && [ -s "$ETAG_FILE" ]; then
+  IF_NONE_MATCH=(-H "If-None-Match: $(cat "$ETAG_FILE")")
+fi
+DL_BODY="$(mktemp)"
+DL_HEADERS="$(mktemp)"
+DL_CODE=$(curl $CURL_OPTS ${IF_NONE_MATCH[@]+"${IF_NONE_MATCH[@]}"} -D "$DL_HEADERS" \
+  -w '%{http_code}' "$URL/agent/stacksense_agent.py" -o "$DL_BODY")
+if [ "$DL_CODE" = "304" ]; then
+  echo "      Agent unchanged since the last install; keeping $AGENT_FILE."
+else
+  install -m 0644 "$DL_BODY" "$AGENT_FILE"
+  tr -d '\r' < "$DL_HEADERS" | sed -n 's/^[Ee][Tt][Aa][Gg]: *//p' | tail -n 1 > "$ETAG_FILE"
+fi
+rm -f "$DL_BODY" "$DL_HEADERS"
 
 echo "[4/6] Setting up isolated Python environment (venv + psutil)..."
 [ -d "$INSTALL_DIR/venv" ] || python3 -m venv "$INSTALL_DIR/venv"
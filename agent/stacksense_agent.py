@@ -10,8 +10,9 @@ VM.
 
 Dependencies:
     - Python 3.6+
-    - psutil           (the only third-party package; for reading system stats)
-    HTTP is done with the standard library (urllib), so 'requests' is NOT needed.
+    - psutil           (the only required third-party package; for reading system stats)
+    - orjson           (optional; used to serialize pushes when installed)
+    HTTP is done with the standard library (http.client), so 'requests' is NOT needed.
 
 Configuration (environment variables, or ~/.stacksense_agent.conf as JSON):
     STACKSENSE_URL          Base URL of the monitoring server, e.g. https://mon.example.com:8000
@@ -25,7 +26,11 @@ Usage:
     python3 stacksense_agent.py --dry-run  # collect & print one sample, push nothing
 """
 
+import base64
 import concurrent.futures
+import gzip
+import heapq
+import http.client
 import json
 import os
 import platform
@@ -36,7 +41,7 @@ import ssl
 import subprocess
 import sys
 import time
-import urllib.error
+import urllib.parse
 import urllib.request
 from pathlib import Path
 
@@ -49,6 +54,11 @@ except ImportError:
     )
     sys.exit(1)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 AGENT_VERSION = "push-1.10.0"
 
 # The agent is cross-platform (Linux + Windows). Core metrics come from psutil, which
@@ -73,6 +83,8 @@ DEFAULT_INTERVAL = 30
 HTTP_TIMEOUT = 15
 MAX_RETRIES = 3
 RETRY_DELAY = 5
+# Request bodies at least this large are gzipped once the server advertises support.
+GZIP_MIN_BYTES = 1024
 
 # Virtual filesystems we never report as disks.
 IGNORED_FSTYPES = {
@@ -136,19 +148,30 @@ def _safe(fn, default=None):
         return default
 
 
+# psutil.process_iter hands back the same Process objects for live PIDs, so each one's
+# cpu_percent(None) measures from the previous refresh. Only the first refresh (no
+# baseline yet) has to prime the counters and wait.
+_proc_cpu_primed = False
+
+
 def collect_top_processes(limit=5):
     """Return {'cpu': [...], 'memory': [...]} of the heaviest processes."""
+    global _proc_cpu_primed
     procs = []
     for p in psutil.process_iter(["pid", "name", "username"]):
         try:
             procs.append(p)
         except Exception:
             continue
-    # Prime cpu_percent (first call returns 0.0), then sample.
-    for p in procs:
-        _safe(lambda: p.cpu_percent(None))
-    time.sleep(0.3)
-
+    if not _proc_cpu_primed:
+        # Prime cpu_percent (first call returns 0.0), then sample.
+        for p in procs:
+            _safe(lambda: p.cpu_percent(None))
+        time.sleep(0.3)
+        _proc_cpu_primed = True
+
+    # One lean row per process; rss/start_time are only read for the rows that make the
+    # top-N lists, not for every PID on the host.
     rows = []
     for p in procs:
         try:
@@ -158,16 +181,20 @@ def collect_top_processes(limit=5):
                 "user": p.info.get("username") or "",
                 "cpu_percent": round(p.cpu_percent(None), 1),
                 "memory_percent": round(p.memory_percent(), 1),
-                # Absolute resident memory (bytes) + process start time. These let the
-                # server track one process's memory growth over time (leak detection).
-                "rss": _safe(lambda: p.memory_info().rss, 0),
-                "start_time": _safe(lambda: int(p.create_time()), 0),
+                "_proc": p,
             })
         except Exception:
             continue
 
-    by_cpu = sorted(rows, key=lambda r: r["cpu_percent"], reverse=True)[:limit]
-    by_mem = sorted(rows, key=lambda r: r["memory_percent"], reverse=True)[:limit]
+    # Partial top-k selection: O(n log limit) instead of two full sorts.
+    by_cpu = heapq.nlargest(limit, rows, key=lambda r: r["cpu_percent"])
+    by_mem = heapq.nlargest(limit, rows, key=lambda r: r["memory_percent"])
+    for r in {id(r): r for r in by_cpu + by_mem}.values():
+        p = r.pop("_proc")
+        # Absolute resident memory (bytes) + process start time. These let the
+        # server track one process's memory growth over time (leak detection).
+        r["rss"] = _safe(lambda: p.memory_info().rss, 0)
+        r["start_time"] = _safe(lambda: int(p.create_time()), 0)
     return {"cpu": by_cpu, "memory": by_mem}
 
 
@@ -202,6 +229,21 @@ _IMAP_POP_PLAIN = {143, 110}
 _IMAP_POP_TLS = {993, 995}
 
 
+_probe_tls_ctx = None  # built on first TLS probe, reused for the process lifetime
+
+
+def _probe_tls_context():
+    """Unverified client context for loopback banner probes. create_default_context()
+    loads and parses the system CA bundle, so build it once rather than per probe."""
+    global _probe_tls_ctx
+    if _probe_tls_ctx is None:
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+        _probe_tls_ctx = ctx
+    return _probe_tls_ctx
+
+
 def _read_socket(port, tls=False, send=None, read_bytes=4096):
     """Open a short loopback connection (optionally TLS), optionally send bytes, and
     return up to read_bytes of the response as text. Best-effort -> None on any error."""
@@ -210,10 +252,7 @@ def _read_socket(port, tls=False, send=None, read_bytes=4096):
         sock = socket.create_connection(("127.0.0.1", port), timeout=PROBE_TIMEOUT)
         sock.settimeout(PROBE_TIMEOUT)
         if tls:
-            ctx = ssl.create_default_context()
-            ctx.check_hostname = False
-            ctx.verify_mode = ssl.CERT_NONE
-            sock = ctx.wrap_socket(sock, server_hostname="localhost")
+            sock = _probe_tls_context().wrap_socket(sock, server_hostname="localhost")
         if send:
             sock.sendall(send)
         return sock.recv(read_bytes).decode("latin-1", "replace")
@@ -329,6 +368,28 @@ def _identify_port(port):
     return None
 
 
+# Products identified per port, kept across inventory cycles: the banner behind a port
+# rarely changes, and a fresh grab every cycle is one more handshake the service pays for
+# (mysqld counts each dropped pre-auth handshake in Aborted_connects). Re-probed hourly so
+# a swapped product is still noticed; a failed probe isn't kept and is retried next cycle.
+_IDENTIFY_TTL = 3600
+_identified = {}  # port -> (product, monotonic time identified)
+
+
+def _identify_port_cached(port):
+    """_identify_port, reusing a product identified within the last _IDENTIFY_TTL seconds."""
+    hit = _identified.get(port)
+    now = time.monotonic()
+    if hit is not None and now - hit[1] < _IDENTIFY_TTL:
+        return hit[0]
+    product = _identify_port(port)
+    if product:
+        _identified[port] = (product, now)
+    else:
+        _identified.pop(port, None)
+    return product
+
+
 def _name_for_port(port, product, pname=""):
     """Return (display_name, detected_via) for a listening port.
 
@@ -431,12 +492,22 @@ def _decode_proc_addr(hexaddr, is_v6):
         return ""
 
 
-def _parse_proc_net_tcp_listeners(text, is_v6):
+def _parse_proc_net_tcp_listeners(lines, is_v6):
     """Parse /proc/net/tcp{,6} content -> [(port, bind_address), ...] for LISTEN sockets.
     State column 0A is TCP_LISTEN. These files are world-readable, so this works without
-    root -- there is no PID/owner here, so callers name the service by port/banner."""
+    root -- there is no PID/owner here, so callers name the service by port/banner.
+
+    `lines` is the file's text or any iterable of its lines (e.g. the open file), so a
+    busy host's table of established connections is streamed, not held in memory, and
+    only lines carrying the LISTEN state are split."""
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    lines = iter(lines)
+    next(lines, None)                    # skip the header row
     out = []
-    for line in text.splitlines()[1:]:   # skip the header row
+    for line in lines:
+        if " 0A " not in line:
+            continue
         parts = line.split()
         if len(parts) < 4 or parts[3] != "0A":
             continue
@@ -459,10 +530,10 @@ def _listening_ports_from_proc():
     for path, is_v6 in (("/proc/net/tcp", False), ("/proc/net/tcp6", True)):
         try:
             with open(path, "r") as fh:
-                text = fh.read()
+                listeners = _parse_proc_net_tcp_listeners(fh, is_v6)
         except OSError:
             continue
-        for port, addr in _parse_proc_net_tcp_listeners(text, is_v6):
+        for port, addr in listeners:
             if port in seen_ports:
                 continue
             seen_ports.add(port)
@@ -496,7 +567,8 @@ def collect_services():
                 print(f"[services] systemctl exited {out.returncode}: "
                       f"{(out.stderr or '').strip()[:200]}", file=sys.stderr)
             for line in out.stdout.splitlines():
-                parts = line.split(None, 4)
+                # Only the UNIT column is used: split it off, leave the description whole.
+                parts = line.split(None, 1)
                 if not parts:
                     continue
                 unit = parts[0]
@@ -567,7 +639,7 @@ def collect_services():
             seen.add(key)
             discovered_ports.add(port)
             if port not in probed:
-                probed[port] = _safe(lambda: _identify_port(port))
+                probed[port] = _safe(lambda: _identify_port_cached(port))
             display_name, detected_via = _name_for_port(port, probed[port], pname)
             services.append({
                 "name": name, "status": "running", "service_type": "port",
@@ -594,7 +666,7 @@ def collect_services():
                 seen.add(key)
                 discovered_ports.add(port)
                 if port not in probed:
-                    probed[port] = _safe(lambda: _identify_port(port))
+                    probed[port] = _safe(lambda: _identify_port_cached(port))
                 display_name, detected_via = _name_for_port(port, probed[port], "")
                 services.append({
                     "name": name, "status": "running", "service_type": "port",
@@ -615,9 +687,16 @@ def collect_services():
 
 
 _SSH_LOG_PATHS = ["/var/log/auth.log", "/var/log/secure"]
-_SSH_RE_ACCEPTED = re.compile(r"sshd\[\d+\]:\s+Accepted \w+ for (\S+) from (\d{1,3}(?:\.\d{1,3}){3})")
-_SSH_RE_FAILED = re.compile(r"sshd\[\d+\]:\s+Failed password for (?:invalid user )?(\S+) from (\d{1,3}(?:\.\d{1,3}){3})")
-_SSH_RE_INVALID = re.compile(r"sshd\[\d+\]:\s+Invalid user (\S+) from (\d{1,3}(?:\.\d{1,3}){3})")
+# Accepted / failed-password / invalid-user logins as one alternation, so each sshd line is
+# scanned once; the `accepted` group is set only for a successful login.
+_SSH_RE = re.compile(
+    r"sshd\[\d+\]:\s+"
+    r"(?:(?P<accepted>Accepted \w+ for)|Failed password for(?: invalid user)?|Invalid user)"
+    r" (?P<user>\S+) from (?P<ip>\d{1,3}(?:\.\d{1,3}){3})"
+)
+# Substrings every _SSH_RE match contains. A raw-bytes `in` check rejects the session,
+# pam and cron noise that makes up most of the log before it is decoded or regex-scanned.
+_SSH_PREFILTER = (b"Accepted ", b"Failed password", b"Invalid user")
 
 
 def collect_ssh_auth(state, max_events=500):
@@ -651,18 +730,16 @@ def collect_ssh_auth(state, max_events=500):
 
     events = []
     try:
-        with open(path, "r", errors="replace") as f:
+        with open(path, "rb") as f:
             f.seek(offset)
-            for line in f:
-                if "sshd" not in line:
+            for raw in f:
+                if b"sshd" not in raw or not any(tok in raw for tok in _SSH_PREFILTER):
                     continue
-                m = _SSH_RE_ACCEPTED.search(line)
+                line = raw.decode("utf-8", "replace")
+                m = _SSH_RE.search(line)
                 if m:
-                    events.append({"username": m.group(1)[:150], "source_ip": m.group(2), "success": True, "raw": line.strip()[:300]})
-                else:
-                    m = _SSH_RE_FAILED.search(line) or _SSH_RE_INVALID.search(line)
-                    if m:
-                        events.append({"username": m.group(1)[:150], "source_ip": m.group(2), "success": False, "raw": line.strip()[:300]})
+                    events.append({"username": m.group("user")[:150], "source_ip": m.group("ip"),
+                                   "success": m.group("accepted") is not None, "raw": line.strip()[:300]})
                 if len(events) >= max_events:
                     break
             state["offset"] = f.tell()
@@ -676,13 +753,30 @@ def _have(binary):
     return shutil.which(binary) is not None
 
 
+# `sudo -n <tool>` that sudo itself refuses (the installer's read-only sudoers entry is
+# absent on this host) fails the same way every pass and logs an auth failure each time,
+# so the tool is not retried through sudo for a while after a refusal.
+SUDO_DENIED_SECONDS = 900
+_SUDO_REFUSED_RE = re.compile(
+    r"^sudo: a (?:password|terminal) is required|is not allowed to execute|"
+    r"is not in the sudoers file", re.MULTILINE)
+_sudo_denied = {}   # tool -> monotonic time before which `sudo -n tool` is skipped
+
+
 def _run(cmd):
     """Run an argv list (no shell), return stdout or None on any failure."""
+    sudo_tool = cmd[2] if len(cmd) > 2 and cmd[:2] == ["sudo", "-n"] else None
+    if sudo_tool and time.monotonic() < _sudo_denied.get(sudo_tool, 0):
+        return None
     try:
         res = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
-        return res.stdout if res.returncode == 0 else None
     except Exception:
         return None
+    if res.returncode == 0:
+        return res.stdout
+    if sudo_tool and _SUDO_REFUSED_RE.search(res.stderr or ""):
+        _sudo_denied[sudo_tool] = time.monotonic() + SUDO_DENIED_SECONDS
+    return None
 
 
 def _docker_like(out, runtime):
@@ -762,7 +856,9 @@ def _crictl(out):
     return rows
 
 
-_SECRET_ENV_RE = re.compile(r"(pass|secret|token|key|cred|auth|pwd)", re.I)
+# Matched against the lowercased key: a case-folding search costs more per env var,
+# and inspect redacts every variable of up to INSPECT_CAP containers.
+_SECRET_ENV_RE = re.compile(r"pass|secret|token|key|cred|auth|pwd")
 INSPECT_CAP = 50  # max containers inspected per inspect cycle (keeps it light)
 
 
@@ -773,7 +869,7 @@ def _redact_env(env_list):
         if not isinstance(e, str) or "=" not in e:
             continue
         k, v = e.split("=", 1)
-        if _SECRET_ENV_RE.search(k):
+        if _SECRET_ENV_RE.search(k.lower()):
             v = "***redacted***"
         out.append({"k": k[:80], "v": v[:200]})
     return out[:60]
@@ -858,6 +954,31 @@ def _inspect_one(runtime, cid):
     return None
 
 
+# Runtimes whose `inspect` takes several IDs and prints one JSON array in argument order.
+_BATCH_INSPECT = {
+    "docker": ["docker", "inspect"],
+    "podman": ["sudo", "-n", "podman", "inspect"],
+    "containerd": ["sudo", "-n", "nerdctl", "inspect"],
+}
+
+
+def _inspect_batch(runtime, cids):
+    """Inspect several containers of one runtime with a single subprocess. Returns their
+    summaries in `cids` order, or None if the batch call failed (e.g. a container went
+    away mid-cycle) so the caller can fall back to one `inspect` per container."""
+    cmd = _BATCH_INSPECT.get(runtime)
+    if not cmd or not cids:
+        return None
+    out = _run(cmd + list(cids))
+    try:
+        data = json.loads(out) if out else None
+    except ValueError:
+        return None
+    if not isinstance(data, list) or len(data) != len(cids):
+        return None
+    return [_safe(lambda: _summ_docker_inspect(d)) for d in data]
+
+
 def collect_containers(inspect=False):
     """Detect containers across runtimes (best-effort, read-only).
 
@@ -889,13 +1010,50 @@ def collect_containers(inspect=False):
 
     # Optionally enrich with a read-only `inspect` summary (slow cadence; capped).
     if inspect:
+        by_runtime = {}
         for item in out[:INSPECT_CAP]:
-            data = _inspect_one(item["runtime"], item.get("container_id") or item["name"])
-            if data:
-                item["inspect"] = data
+            by_runtime.setdefault(item["runtime"], []).append(item)
+        for runtime, items in by_runtime.items():
+            cids = [item.get("container_id") or item["name"] for item in items]
+            summaries = _inspect_batch(runtime, cids) or [_inspect_one(runtime, c) for c in cids]
+            for item, data in zip(items, summaries):
+                if data:
+                    item["inspect"] = data
     return out
 
 
+def _sysvipc_rows(kind):
+    """Rows of /proc/sysvipc/<kind> (shm, sem, msg) as dicts keyed by the header's column
+    names, or None if the file can't be read. This is the same table `ipcs` prints, read
+    without forking it."""
+    try:
+        with open(f"/proc/sysvipc/{kind}") as f:
+            header = f.readline().split()
+            return [dict(zip(header, line.split())) for line in f if line.strip()]
+    except OSError:
+        return None
+
+
+_IPCS_SECTIONS = (("shared memory", "shm"), ("semaphore", "sem"), ("message", "msg"))
+
+
+def _ipcs_sections():
+    """Data lines of one `ipcs -a -b` run split by section ('shm', 'sem', 'msg'), so the
+    fallback forks ipcs once rather than once per IPC kind. Raises if ipcs can't run."""
+    res = subprocess.run(["ipcs", "-a", "-b"], capture_output=True, text=True, timeout=10,
+                         env=dict(os.environ, LC_ALL="C"))  # English section headers
+    sections, current = {}, None
+    for line in res.stdout.splitlines():
+        if line.startswith("------"):
+            title = line.lower()
+            current = next((kind for name, kind in _IPCS_SECTIONS if name in title), None)
+            if current:
+                sections[current] = []
+        elif current:
+            sections[current].append(line)
+    return sections
+
+
 def collect_ipc_stats():
     """System V IPC + POSIX /dev/shm summary (best-effort).
 
@@ -905,48 +1063,63 @@ def collect_ipc_stats():
     Returns a dict, or None if nothing could be read (never raises).
     """
     stats = {}
+    proc = {kind: _sysvipc_rows(kind) for _, kind in _IPCS_SECTIONS}
+    ipcs = {}
+    if None in proc.values():
+        try:
+            ipcs = _ipcs_sections()
+        except Exception:
+            pass
 
-    # SysV shared memory: `ipcs -m -b`  (cols: key shmid owner perms bytes nattch status)
+    # SysV shared memory: (bytes, nattch) per segment.
     try:
-        res = subprocess.run(["ipcs", "-m", "-b"], capture_output=True, text=True, timeout=10)
-        seg = total = orphan = orphan_bytes = 0
-        for line in res.stdout.splitlines():
-            parts = line.split()
-            if len(parts) >= 6 and parts[1].isdigit():  # data row (numeric shmid)
-                try:
-                    nbytes, nattch = int(parts[4]), int(parts[5])
-                except ValueError:
-                    continue
-                seg += 1
-                total += nbytes
-                if nattch == 0:           # orphaned: no process attached
-                    orphan += 1
-                    orphan_bytes += nbytes
-        stats.update(shm_segments=seg, shm_bytes=total,
-                     shm_orphaned=orphan, shm_orphaned_bytes=orphan_bytes)
+        rows = proc["shm"]
+        if rows is not None:
+            segments = [(int(r["size"]), int(r["nattch"])) for r in rows]
+        else:
+            # `ipcs -m -b`  (cols: key shmid owner perms bytes nattch status)
+            segments = []
+            for line in ipcs["shm"]:
+                parts = line.split()
+                if len(parts) >= 6 and parts[1].isdigit():  # data row (numeric shmid)
+                    try:
+                        segments.append((int(parts[4]), int(parts[5])))
+                    except ValueError:
+                        continue
+        orphaned = [nbytes for nbytes, nattch in segments if nattch == 0]  # no process attached
+        stats.update(shm_segments=len(segments), shm_bytes=sum(n for n, _ in segments),
+                     shm_orphaned=len(orphaned), shm_orphaned_bytes=sum(orphaned))
     except Exception:
         pass
 
-    # SysV semaphore arrays: `ipcs -s`  (count data rows)
+    # SysV semaphore arrays (count)
     try:
-        res = subprocess.run(["ipcs", "-s"], capture_output=True, text=True, timeout=10)
-        stats["sem_arrays"] = sum(
-            1 for ln in res.stdout.splitlines()
-            if len(ln.split()) >= 2 and ln.split()[1].isdigit()
-        )
+        rows = proc["sem"]
+        if rows is not None:
+            stats["sem_arrays"] = len(rows)
+        else:
+            # `ipcs -s -b`  (count data rows)
+            stats["sem_arrays"] = sum(
+                1 for ln in ipcs["sem"]
+                if len(ln.split()) >= 2 and ln.split()[1].isdigit()
+            )
     except Exception:
         pass
 
-    # SysV message queues: `ipcs -q -b`  (cols: key msqid owner perms used-bytes messages)
+    # SysV message queues: count + queued bytes
     try:
-        res = subprocess.run(["ipcs", "-q", "-b"], capture_output=True, text=True, timeout=10)
-        cnt = qbytes = 0
-        for line in res.stdout.splitlines():
-            parts = line.split()
-            if len(parts) >= 5 and parts[1].isdigit():
-                cnt += 1
-                qbytes += int(parts[4]) if parts[4].isdigit() else 0
-        stats.update(msg_queues=cnt, msg_bytes=qbytes)
+        rows = proc["msg"]
+        if rows is not None:
+            stats.update(msg_queues=len(rows), msg_bytes=sum(int(r["cbytes"]) for r in rows))
+        else:
+            # `ipcs -q -b`  (cols: key msqid owner perms used-bytes messages)
+            cnt = qbytes = 0
+            for line in ipcs["msg"]:
+                parts = line.split()
+                if len(parts) >= 5 and parts[1].isdigit():
+                    cnt += 1
+                    qbytes += int(parts[4]) if parts[4].isdigit() else 0
+            stats.update(msg_queues=cnt, msg_bytes=qbytes)
     except Exception:
         pass
 
@@ -1075,6 +1248,73 @@ def collect_disk_hardware():
     return summary, mount_map
 
 
+# Hardware inventory (disk layout, physical core count) is effectively fixed between
+# reboots, but re-reading it forks lsblk on every sample. Cache it per boot, with a TTL so
+# a hot-added disk or new mount still shows up without an agent restart.
+HW_CACHE_SECONDS = 900
+_hw_cache = {}   # key -> (boot_time, expires_monotonic, value)
+
+
+def _per_boot(key, fn, ttl=HW_CACHE_SECONDS):
+    """Return fn(), reusing the previous result while the host hasn't rebooted and the
+    entry is younger than ttl. Exceptions from fn propagate and are never cached."""
+    boot = _safe(psutil.boot_time)
+    now = time.monotonic()
+    hit = _hw_cache.get(key)
+    if hit is not None and hit[0] == boot and now < hit[1]:
+        return hit[2]
+    value = fn()
+    _hw_cache[key] = (boot, now + ttl, value)
+    return value
+
+
+def _cpu_topology():
+    """(logical, physical) CPU counts, read together so a vCPU hot-add refreshes both at
+    once. psutil takes these from sysfs / /proc/cpuinfo -- no lscpu fork."""
+    return psutil.cpu_count(), psutil.cpu_count(logical=False)
+
+
+# The disk layout only changes when something is mounted, unmounted or hot-added. The
+# mount set is read every sample anyway (psutil), so it doubles as the change signal:
+# lsblk is re-run when it changes, and otherwise hourly to catch unmounted hot-adds.
+DISK_HW_CACHE_SECONDS = 3600
+
+
+def _disk_layout(mounts):
+    """collect_disk_hardware(), cached per boot and re-read early when `mounts` (the
+    frozenset of reported mountpoints) differs from the set seen at the last read."""
+    hit = _hw_cache.get("disk_hardware")
+    if hit is not None and hit[2][0] != mounts:
+        del _hw_cache["disk_hardware"]
+    return _per_boot("disk_hardware", lambda: (mounts, collect_disk_hardware()),
+                     ttl=DISK_HW_CACHE_SECONDS)[1]
+
+
+def _mount_usage(mountpoint):
+    """{total, used, free, percent} for one mount, or None if it can't be read.
+
+    On POSIX this is a single statvfs(2) with psutil.disk_usage's arithmetic (used excludes
+    root-reserved blocks; percent is of the space available to non-root users), without
+    building psutil's namedtuple per mount. Windows goes through psutil.
+    """
+    if not hasattr(os, "statvfs"):
+        usage = _safe(lambda: psutil.disk_usage(mountpoint))
+        if usage is None:
+            return None
+        return {"total": usage.total, "used": usage.used,
+                "free": usage.free, "percent": usage.percent}
+    try:
+        st = os.statvfs(mountpoint)
+    except OSError:
+        return None
+    total = st.f_blocks * st.f_frsize
+    free = st.f_bavail * st.f_frsize
+    used = total - st.f_bfree * st.f_frsize
+    total_user = used + free
+    percent = round(used / total_user * 100, 1) if total_user else 0.0
+    return {"total": total, "used": used, "free": free, "percent": percent}
+
+
 def collect_metrics(prev):
     """Collect one metrics sample. `prev` carries counters from the last sample
     so we can compute per-second I/O rates. Returns (metrics_dict, new_prev)."""
@@ -1082,10 +1322,12 @@ def collect_metrics(prev):
     metrics = {"agent_version": AGENT_VERSION}
     metrics.update(_os_info())             # os_type / os_version / hostname
 
-    # CPU
-    metrics["cpu_percent"] = psutil.cpu_percent(interval=1)
-    metrics["cpu_count"] = psutil.cpu_count()
-    metrics["physical_cpu_count"] = _safe(lambda: psutil.cpu_count(logical=False))
+    # CPU. The agent is long-lived, so after the first sample psutil's counters already
+    # hold the previous reading: interval=None returns the average over the whole push
+    # interval without blocking. Only the first sample (no baseline yet) waits 1s.
+    metrics["cpu_percent"] = psutil.cpu_percent(interval=None if prev else 1)
+    metrics["cpu_count"], metrics["physical_cpu_count"] = _safe(
+        lambda: _per_boot("cpu_topology", _cpu_topology), (None, None))
     load = _safe(lambda: psutil.getloadavg())
     if load:
         metrics["cpu_load_avg_1m"], metrics["cpu_load_avg_5m"], metrics["cpu_load_avg_15m"] = load
@@ -1117,23 +1359,26 @@ def collect_metrics(prev):
             continue  # /tmp, /var/tmp, /run, ... -- ephemeral / bind-dup of /
         if "/virtfs/" in part.mountpoint or "virtfs" in part.device.lower():
             continue
-        usage = _safe(lambda: psutil.disk_usage(part.mountpoint))
-        if usage is None:
-            continue
-        disk_usage[part.mountpoint] = {
-            "total": usage.total,
-            "used": usage.used,
-            "free": usage.free,
-            "percent": usage.percent,
-        }
+        usage = _mount_usage(part.mountpoint)
+        if usage is not None:
+            disk_usage[part.mountpoint] = usage
     # Physical disk inventory (SSD/HDD/NVMe, RAID, disk count) + per-mount tags.
-    disk_hw, mount_map = _safe(collect_disk_hardware, ({}, {})) or ({}, {})
+    disk_hw, mount_map = _safe(lambda: _disk_layout(frozenset(disk_usage)),
+                               ({}, {})) or ({}, {})
     for mp, info in disk_usage.items():
         ann = mount_map.get(mp)
         if ann:
             info.update(ann)
     metrics["disk_usage"] = disk_usage
-    metrics["disk_hardware"] = disk_hw
+    # The inventory itself rarely changes: ship it when it does, and otherwise once per
+    # HW_CACHE_SECONDS, instead of repeating it on every push. prev carries
+    # (monotonic time sent, inventory sent) for the last push the server accepted; the
+    # one attached here only counts as sent once main() sees its push succeed.
+    hw_sent = (prev or {}).get("disk_hardware")
+    hw_pending = None
+    if not hw_sent or hw_sent[1] != disk_hw or time.monotonic() - hw_sent[0] >= HW_CACHE_SECONDS:
+        metrics["disk_hardware"] = disk_hw
+        hw_pending = (time.monotonic(), disk_hw)
 
     # Network counters per interface
     net_per_nic = _safe(lambda: psutil.net_io_counters(pernic=True), {}) or {}
@@ -1157,6 +1402,8 @@ def collect_metrics(prev):
         "disk_write": disk_io.write_bytes if disk_io else None,
         "net_sent": net_io.bytes_sent if net_io else None,
         "net_recv": net_io.bytes_recv if net_io else None,
+        "disk_hardware": hw_sent,
+        "disk_hardware_pending": hw_pending,
     }
     if disk_io:
         metrics["disk_read_bytes_total"] = disk_io.read_bytes
@@ -1175,48 +1422,176 @@ def collect_metrics(prev):
             metrics["net_io_sent"] = rate(cur["net_sent"], prev.get("net_sent"))
             metrics["net_io_recv"] = rate(cur["net_recv"], prev.get("net_recv"))
 
-    # Uptime + top processes
+    # Uptime (top processes are attached by the main loop on their own cadence)
     metrics["system_uptime_seconds"] = int(now - psutil.boot_time())
-    metrics["top_processes"] = _safe(lambda: collect_top_processes(), {})
 
     return metrics, cur
 
 
+def _disk_hardware_delivered(prev):
+    """Mark the inventory attached to the sample behind `prev` as sent (its push succeeded)."""
+    pending = prev.pop("disk_hardware_pending", None)
+    if pending is not None:
+        prev["disk_hardware"] = pending
+
+
+# A kept-alive connection the server closed while it sat idle fails with one of these on
+# the next request. A timeout is not among them: redialling after one would double the
+# worst-case push latency.
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class KeepAliveOpener:
+    """POST-only HTTP(S) client that keeps one persistent connection per server.
+
+    urllib opens -- and TLS-handshakes -- a new connection for every request. The agent
+    posts to the same server every interval, so holding the connection open removes a
+    TCP + TLS handshake from each push. A reused connection the server has since closed
+    is redialled once, transparently; any other failure drops the connection and
+    surfaces to push()'s retry loop.
+
+    The proxy settings urllib would honour (HTTP(S)_PROXY / NO_PROXY, or the system
+    proxy) still apply: HTTPS goes through a CONNECT tunnel on the proxy, and plain
+    HTTP is sent to the proxy with the absolute URL as the request target.
+
+    Bodies are sent gzipped (Content-Encoding: gzip) to a server that has answered
+    with `Accept-Encoding: gzip` (RFC 7694); an older server never advertises it and
+    keeps receiving plain JSON.
+    """
+
+    def __init__(self, ssl_context):
+        self._ssl_context = ssl_context
+        self._conns = {}
+        self._gzip_ok = set()
+
+    @staticmethod
+    def _proxy_for(parts):
+        """(host, port, Proxy-Authorization headers) of the proxy for this URL, or None."""
+        proxy = urllib.request.getproxies().get(parts.scheme)
+        if not proxy or urllib.request.proxy_bypass(parts.hostname):
+            return None
+        if "://" not in proxy:
+            proxy = f"http://{proxy}"
+        p = urllib.parse.urlsplit(proxy)
+        auth = {}
+        if p.username:
+            creds = f"{urllib.parse.unquote(p.username)}:{urllib.parse.unquote(p.password or '')}"
+            auth["Proxy-Authorization"] = "Basic " + base64.b64encode(creds.encode()).decode()
+        return p.hostname, p.port or 80, auth
+
+    def _connect(self, parts, timeout):
+        proxy = self._proxy_for(parts)
+        if parts.scheme == "https":
+            if proxy is None:
+                return http.client.HTTPSConnection(
+                    parts.hostname, parts.port, timeout=timeout, context=self._ssl_context)
+            host, port, auth = proxy
+            conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context)
+            conn.set_tunnel(parts.hostname, parts.port or 443, headers=auth)
+            return conn
+        if proxy is None:
+            return http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        host, port, auth = proxy
+        conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        conn.proxy_headers = auth   # sent with each request, whose target is the full URL
+        return conn
+
+    def _drop(self, key):
+        conn = self._conns.pop(key, None)
+        if conn is not None:
+            conn.close()
+
+    def post(self, url, data, headers, timeout):
+        """POST data to url; returns (status, body_bytes). Raises on transport errors."""
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        if key in self._gzip_ok and len(data) >= GZIP_MIN_BYTES:
+            data = gzip.compress(data, compresslevel=6)
+            headers = dict(headers, **{"Content-Encoding": "gzip"})
+        for fresh in (False, True):
+            conn = self._conns.get(key)
+            reused = conn is not None and conn.sock is not None
+            if conn is None:
+                conn = self._conns[key] = self._connect(parts, timeout)
+            elif conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            target, send_headers = path, headers
+            proxy_headers = getattr(conn, "proxy_headers", None)
+            if proxy_headers is not None:
+                target = urllib.parse.urlunsplit(parts._replace(fragment=""))
+                send_headers = dict(headers, **proxy_headers)
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                    # http.client writes the headers and the body with separate send()
+                    # calls; with Nagle on, the body waits for the server's delayed ACK
+                    # of the headers (up to ~40ms per push). Send small writes at once.
+                    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                conn.request("POST", target, body=data, headers=send_headers)
+                resp = conn.getresponse()
+                body = resp.read()
+                if "gzip" in (resp.getheader("Accept-Encoding") or "").lower():
+                    self._gzip_ok.add(key)
+            except _STALE_CONNECTION_ERRORS:
+                self._drop(key)
+                if reused and not fresh:
+                    continue  # idle keep-alive closed server-side: redial once
+                raise
+            except Exception:
+                self._drop(key)
+                raise
+            if resp.will_close:
+                self._drop(key)
+            return resp.status, body
+
+
 def build_opener(verify_tls):
-    """Return a urllib opener; optionally skip TLS verification (self-signed)."""
+    """Return a keep-alive POST client; optionally skip TLS verification (self-signed)."""
     if verify_tls:
         ctx = ssl.create_default_context()
     else:
         ctx = ssl.create_default_context()
         ctx.check_hostname = False
         ctx.verify_mode = ssl.CERT_NONE
-    return urllib.request.build_opener(urllib.request.HTTPSHandler(context=ctx))
+    return KeepAliveOpener(ctx)
+
+
+def _dumps(payload):
+    """Serialize a push body to UTF-8 JSON bytes: orjson when installed, else stdlib json.
+    A payload orjson refuses (e.g. non-string dict keys) goes through the stdlib instead."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload)
+        except TypeError:
+            pass
+    return json.dumps(payload).encode("utf-8")
 
 
 def push(config, opener, path, payload):
     """POST JSON to the monitoring server with the bearer token. Returns dict or None."""
     url = f"{config['url']}{path}"
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data, method="POST")
-    req.add_header("Content-Type", "application/json")
-    req.add_header("Authorization", f"Bearer {config['token']}")
+    data = _dumps(payload)
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {config['token']}",
+    }
 
     last_err = None
     for attempt in range(1, MAX_RETRIES + 1):
         try:
-            with opener.open(req, timeout=HTTP_TIMEOUT) as resp:
-                body = resp.read().decode("utf-8", "replace")
+            status, raw = opener.post(url, data, headers, HTTP_TIMEOUT)
+            body = raw.decode("utf-8", "replace")
+            if status < 400:
                 try:
                     return json.loads(body)
                 except ValueError:
-                    return {"status": resp.status, "raw": body}
-        except urllib.error.HTTPError as e:
+                    return {"status": status, "raw": body}
             # 4xx (e.g. 401 bad token) won't fix itself -- don't retry.
-            detail = e.read().decode("utf-8", "replace")
-            sys.stderr.write(f"Push failed: HTTP {e.code} {detail}\n")
-            if 400 <= e.code < 500:
+            sys.stderr.write(f"Push failed: HTTP {status} {body}\n")
+            if 400 <= status < 500:
                 return None
-            last_err = e
+            last_err = f"HTTP {status}"
         except Exception as e:
             last_err = e
             sys.stderr.write(f"Push attempt {attempt} failed: {e}\n")
@@ -1246,6 +1621,11 @@ def main():
     last_services_push = 0  # force a services push on the first loop
     last_ipc = 0           # refresh IPC stats on the same (cheap) ~60s cadence
     ipc_cache = None
+    # Walking every PID is the most expensive part of a sample; the process lists only
+    # feed tooltips, LLM context and leak detection, so refresh them on a slower cadence.
+    processes_interval = int(os.environ.get("STACKSENSE_PROCESSES_INTERVAL", 60))
+    last_processes = 0
+    processes_cache = None
     inspect_interval = int(os.environ.get("STACKSENSE_INSPECT_INTERVAL", 300))  # deep `inspect` every ~5 min
     last_inspect = 0
     ssh_state = {}  # incremental SSH auth-log tail state
@@ -1266,6 +1646,14 @@ def main():
         if metrics is not None and ipc_cache is not None:
             metrics["ipc_stats"] = ipc_cache
 
+        # Top processes: re-enumerate every ~60s and attach the latest snapshot to each
+        # push in between, same as IPC stats above.
+        if time.monotonic() - last_processes >= processes_interval:
+            processes_cache = _safe(collect_top_processes, {})
+            last_processes = time.monotonic()
+        if metrics is not None and processes_cache is not None:
+            metrics["top_processes"] = processes_cache
+
         if dry_run:
             print(json.dumps({"metrics": metrics, "services": collect_services(), "containers": collect_containers()}, indent=2, default=str))
             return
@@ -1273,6 +1661,7 @@ def main():
         if metrics is not None:
             result = push(config, opener, "/api/agent/metrics/", metrics)
             if result and result.get("status") == "ok":
+                _disk_hardware_delivered(prev)
                 stored = result.get("stored")
                 print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] pushed (stored={stored})")
             else:
@@ -1288,25 +1677,30 @@ def main():
         except Exception as e:
             sys.stderr.write(f"SSH auth push error: {e}\n")
 
-        # Push the detected services + containers periodically (they change rarely)
+        # Push the detected services + containers periodically (they change rarely).
+        # Both discoveries mostly wait on subprocesses (systemctl/ss, docker/podman), so
+        # containers are collected on a worker thread while services are; the pushes
+        # stay sequential on the one kept-alive connection.
         if time.monotonic() - last_services_push >= services_interval:
-            try:
-                services = collect_services()
-                res = push(config, opener, "/api/agent/services/", {"services": services, "agent_version": AGENT_VERSION})
-                if res and res.get("status") == "ok":
-                    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] services pushed ({len(services)})")
-            except Exception as e:
-                sys.stderr.write(f"Service push error: {e}\n")
-            try:
-                do_inspect = time.monotonic() - last_inspect >= inspect_interval
-                containers = collect_containers(inspect=do_inspect)
-                if do_inspect:
-                    last_inspect = time.monotonic()
-                res = push(config, opener, "/api/agent/containers/", {"containers": containers, "agent_version": AGENT_VERSION})
-                if res and res.get("status") == "ok":
-                    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] containers pushed ({len(containers)}, inspect={do_inspect})")
-            except Exception as e:
-                sys.stderr.write(f"Container push error: {e}\n")
+            do_inspect = time.monotonic() - last_inspect >= inspect_interval
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
+                containers_future = ex.submit(collect_containers, inspect=do_inspect)
+                try:
+                    services = collect_services()
+                    res = push(config, opener, "/api/agent/services/", {"services": services, "agent_version": AGENT_VERSION})
+                    if res and res.get("status") == "ok":
+                        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] services pushed ({len(services)})")
+                except Exception as e:
+                    sys.stderr.write(f"Service push error: {e}\n")
+                try:
+                    containers = containers_future.result()
+                    if do_inspect:
+                        last_inspect = time.monotonic()
+                    res = push(config, opener, "/api/agent/containers/", {"containers": containers, "agent_version": AGENT_VERSION})
+                    if res and res.get("status") == "ok":
+                        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] containers pushed ({len(containers)}, inspect={do_inspect})")
+                except Exception as e:
+                    sys.stderr.write(f"Container push error: {e}\n")
             last_services_push = time.monotonic()
 
         if once:
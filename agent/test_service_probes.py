@@ -114,6 +114,41 @@ class IdentifyPortDispatchTests(unittest.TestCase):
         self.assertIsNone(agent._identify_port(52227))
 
 
+class IdentifyPortCacheTests(unittest.TestCase):
+    """A port's product is grabbed once per _IDENTIFY_TTL, not once per inventory cycle."""
+
+    def setUp(self):
+        self._orig = (agent._identify_port, agent._identified.copy())
+        agent._identified.clear()
+        self.calls = []
+
+    def tearDown(self):
+        agent._identify_port = self._orig[0]
+        agent._identified.clear()
+        agent._identified.update(self._orig[1])
+
+    def _probe(self, product):
+        def identify(port):
+            self.calls.append(port)
+            return product
+        agent._identify_port = identify
+
+    def test_identified_product_is_reused_until_it_expires(self):
+        self._probe("MySQL")
+        self.assertEqual([agent._identify_port_cached(3306) for _ in range(3)], ["MySQL"] * 3)
+        self.assertEqual(self.calls, [3306])
+        agent._identified[3306] = ("MySQL", time.monotonic() - agent._IDENTIFY_TTL)
+        self._probe("MariaDB")
+        self.assertEqual(agent._identify_port_cached(3306), "MariaDB")
+        self.assertEqual(self.calls, [3306, 3306])
+
+    def test_failed_probe_is_retried(self):
+        self._probe(None)
+        agent._identify_port_cached(3306)
+        agent._identify_port_cached(3306)
+        self.assertEqual(self.calls, [3306, 3306])
+
+
 # --- loopback integration -------------------------------------------------
 
 class _NginxHandler(BaseHTTPRequestHandler):
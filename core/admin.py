@@ -47,7 +47,7 @@ class ServerAdmin(admin.ModelAdmin):
             config = obj.monitoring_config
             status = "✅ Enabled" if config.enabled else "❌ Disabled"
             return mark_safe(f'<span style="color: {"green" if config.enabled else "red"}">{status}</span>')
-        except:
+        except MonitoringConfig.DoesNotExist:
             return "❌ Not Configured"
     monitoring_status.short_description = "Monitoring"
 
@@ -107,7 +107,7 @@ def prepare_series(
         try:
             timestamps = [timezone.make_aware(ts) if timezone.is_naive(ts) else ts 
                          for ts in timestamps]
-        except:
+        except (ValueError, TypeError, AttributeError):
             pass  # If timezone conversion fails, proceed with original timestamps
     
     series = pd.Series(
@@ -15,19 +15,32 @@ Authentication: the agent sends an HTTP header
     Authorization: Bearer <token>
 The raw token is hashed and looked up against AgentCredential; only the hash is
 ever stored server-side.
+
+POST bodies may be sent with Content-Encoding: gzip; the ingest endpoints say so
+with an Accept-Encoding: gzip response header, which the agent waits for before
+compressing.
 """
 
+import functools
+import hashlib
 import json
 import logging
 import os
+import zlib
 from datetime import timedelta
 
-import requests
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Count, Q
 from django.http import JsonResponse, HttpResponse, Http404, HttpResponseRedirect
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
@@ -39,6 +52,9 @@ from .models import (
 )
 from . import alert_categories
 from . import alert_routing
+from .alert_delivery import deliver
+from . import audit
+from . import webhooks
 
 logger = logging.getLogger("core")
 
@@ -100,12 +116,54 @@ JSON_FIELDS = (
 )
 
 
-def _get_client_ip(request):
-    """Best-effort source IP, honoring a single proxy hop (X-Forwarded-For)."""
-    xff = request.META.get("HTTP_X_FORWARDED_FOR")
-    if xff:
-        return xff.split(",")[0].strip()
-    return request.META.get("REMOTE_ADDR")
+def _loads(body):
+    """Parse an agent request body.
+
+    orjson (when installed) parses the raw bytes without a separate decode pass; a body
+    it rejects (NaN/Infinity literals, non-UTF-8) is handed to the stdlib parser so
+    what the endpoints accept is unchanged. Both raise ValueError on malformed JSON.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(body)
+
+
+def _request_body(request):
+    """The agent request body, gunzipped when sent with ``Content-Encoding: gzip``.
+
+    Returns (body, None) or (None, error_response). The size limit applies to the
+    decompressed body too, and decompression stops at the limit, so a small
+    compressed request can't expand into an unbounded one.
+    """
+    body = request.body
+    if len(body) > MAX_BODY_BYTES:
+        return None, JsonResponse({"error": "payload too large"}, status=413)
+    if request.headers.get("Content-Encoding", "").strip().lower() != "gzip":
+        return body, None
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        body = inflater.decompress(body, MAX_BODY_BYTES + 1)
+    except zlib.error:
+        return None, JsonResponse({"error": "request body is not valid gzip"}, status=400)
+    if len(body) > MAX_BODY_BYTES:
+        return None, JsonResponse({"error": "payload too large"}, status=413)
+    if not inflater.eof:
+        return None, JsonResponse({"error": "request body is not valid gzip"}, status=400)
+    return body, None
+
+
+def _accepts_gzip(view):
+    """Mark an ingest endpoint's responses with ``Accept-Encoding: gzip`` (RFC 7694) so
+    the agent knows it may compress the bodies of its later pushes."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        response["Accept-Encoding"] = "gzip"
+        return response
+    return wrapper
 
 
 def _authenticate(request):
@@ -128,21 +186,29 @@ def _authenticate(request):
 def _touch_credential(cred, request):
     """Record that a valid push was received with this token."""
     cred.last_used_at = timezone.now()
-    cred.last_used_ip = _get_client_ip(request)
+    cred.last_used_ip = audit.client_ip(request)
     cred.save(update_fields=["last_used_at", "last_used_ip"])
 
 
 def _update_heartbeat(server, agent_version):
-    """Refresh the server heartbeat and (optionally) the reported agent version."""
-    ServerHeartbeat.objects.update_or_create(
-        server=server,
-        defaults={"last_heartbeat": timezone.now(), "agent_version": agent_version},
+    """Refresh the server heartbeat and (optionally) the reported agent version.
+
+    Runs on every push, so each row is a single INSERT ... ON CONFLICT DO UPDATE
+    rather than update_or_create's SELECT-then-write.
+    """
+    now = timezone.now()
+    ServerHeartbeat.objects.bulk_create(
+        [ServerHeartbeat(server=server, last_heartbeat=now, agent_version=agent_version)],
+        update_conflicts=True,
+        unique_fields=["server"],
+        update_fields=["last_heartbeat", "agent_version", "updated_at"],
     )
     if agent_version:
-        AgentVersion.objects.update_or_create(
-            server=server,
-            version=agent_version,
-            defaults={"last_seen": timezone.now()},
+        AgentVersion.objects.bulk_create(
+            [AgentVersion(server=server, version=agent_version, last_seen=now)],
+            update_conflicts=True,
+            unique_fields=["server", "version"],
+            update_fields=["last_seen"],
         )
 
 
@@ -202,7 +268,7 @@ def kpi_ingest(request):
     if len(request.body) > MAX_BODY_BYTES:
         return JsonResponse({"error": "payload too large"}, status=413)
     try:
-        payload = json.loads(request.body)
+        payload = _loads(request.body)
     except (ValueError, TypeError):
         return JsonResponse({"error": "request body is not valid JSON"}, status=400)
     if not isinstance(payload, dict):
@@ -234,31 +300,18 @@ def kpi_ingest(request):
     })
 
 
-def _notify_unit(server, kind, name, down):
-    """Email/Slack a monitored service/container down/recovery notice (best-effort).
-
-    `kind` is "service" or "container".
-    """
-    if down:
-        subject = f"[StackSense] {kind.upper()} DOWN: {name} on {server.name}"
-        body = f"Monitored {kind} '{name}' is NOT running on {server.name} (as of {timezone.now()})."
-        emoji = ":red_circle:"
-    else:
-        subject = f"[StackSense] {kind.upper()} RECOVERED: {name} on {server.name}"
-        body = f"Monitored {kind} '{name}' is running again on {server.name} (as of {timezone.now()})."
-        emoji = ":large_green_circle:"
-    # Service/container up-or-down is an Availability alert; severity drives routing.
-    sev = alert_categories.default_severity_for_alert_type(
-        kind, "triggered" if down else "resolved")
+def _send_availability_notice(what, subject, body, emoji, sev):
+    """Route an Availability notice at `sev` and queue its email/Slack delivery."""
     try:
         ecfg = EmailAlertConfig.objects.filter(enabled=True).first()
         if ecfg:
             recipients = alert_routing.recipients_for("availability", sev)
             if recipients:
                 from django.core.mail import send_mail
-                send_mail(subject, body, ecfg.from_email or None, recipients, fail_silently=True)
+                deliver(f"{what} email alert", send_mail, subject, body,
+                         ecfg.from_email or None, recipients, fail_silently=True)
     except Exception:
-        logger.exception("%s email alert failed for %s/%s", kind, server.name, name)
+        logger.exception("%s email alert failed", what)
     try:
         scfg = SlackAlertConfig.objects.filter(enabled=True).first()
         if scfg and scfg.webhook_url and alert_routing.slack_should_send("availability", sev):
@@ -269,9 +322,29 @@ def _notify_unit(server, kind, name, down):
                 payload["username"] = scfg.username
             if scfg.icon_emoji:
                 payload["icon_emoji"] = scfg.icon_emoji
-            requests.post(scfg.webhook_url, json=payload, timeout=10)
+            deliver(f"{what} slack alert", webhooks.post, scfg.webhook_url,
+                     json=payload, timeout=10)
     except Exception:
-        logger.exception("%s slack alert failed for %s/%s", kind, server.name, name)
+        logger.exception("%s slack alert failed", what)
+
+
+def _notify_unit(server, kind, name, down):
+    """Email/Slack a monitored service/container down/recovery notice (best-effort).
+
+    `kind` is "service" or "container".
+    """
+    if down:
+        subject = f"[StackSense] {kind.upper()} DOWN: {name} on {server.name}"
+        body = f"Monitored {kind} '{name}' is NOT running on {server.name} (as of {timezone.now()})."
+        emoji = ":red_circle:"
+    else:
+        subject = f"[StackSense] {kind.upper()} RECOVERED: {name} on {server.name}"
+        body = f"Monitored {kind} '{name}' is running again on {server.name} (as of {timezone.now()})."
+        emoji = ":large_green_circle:"
+    # Service/container up-or-down is an Availability alert; severity drives routing.
+    sev = alert_categories.default_severity_for_alert_type(
+        kind, "triggered" if down else "resolved")
+    _send_availability_notice(f"{kind} {server.name}/{name}", subject, body, emoji, sev)
 
 
 def _notify_slow_service(server, name, slow):
@@ -285,29 +358,19 @@ def _notify_slow_service(server, name, slow):
         subject = f"[StackSense] SERVICE RESPONSE RECOVERED: {name} on {server.name}"
         body = f"Monitored service '{name}' is responding normally again on {server.name} (as of {timezone.now()})."
         emoji = ":large_green_circle:"
-    sev = alert_categories.SEV_MEDIUM
-    try:
-        ecfg = EmailAlertConfig.objects.filter(enabled=True).first()
-        if ecfg:
-            recipients = alert_routing.recipients_for("availability", sev)
-            if recipients:
-                from django.core.mail import send_mail
-                send_mail(subject, body, ecfg.from_email or None, recipients, fail_silently=True)
-    except Exception:
-        logger.exception("slow-service email alert failed for %s/%s", server.name, name)
-    try:
-        scfg = SlackAlertConfig.objects.filter(enabled=True).first()
-        if scfg and scfg.webhook_url and alert_routing.slack_should_send("availability", sev):
-            payload = {"text": f"{emoji} {body}"}
-            if scfg.channel:
-                payload["channel"] = scfg.channel
-            if scfg.username:
-                payload["username"] = scfg.username
-            if scfg.icon_emoji:
-                payload["icon_emoji"] = scfg.icon_emoji
-            requests.post(scfg.webhook_url, json=payload, timeout=10)
-    except Exception:
-        logger.exception("slow-service slack alert failed for %s/%s", server.name, name)
+    _send_availability_notice(f"slow-service {server.name}/{name}", subject, body, emoji,
+                              alert_categories.SEV_MEDIUM)
+
+
+def _open_alerts(server, alert_type):
+    """Triggered alerts of one type for a server, newest first.
+
+    Loaded once per evaluation and matched to units by their message marker, instead of
+    one message__contains lookup per monitored service/container.
+    """
+    return list(AlertHistory.objects.filter(
+        server=server, alert_type=alert_type, status=AlertHistory.AlertStatus.TRIGGERED,
+    ))
 
 
 def evaluate_service_alerts(server):
@@ -323,12 +386,10 @@ def evaluate_service_alerts(server):
     if config is not None and not getattr(config, "service_failure_alert", True):
         return
     now = timezone.now()
+    open_alerts = _open_alerts(server, AlertHistory.AlertType.SERVICE)
     for svc in Service.objects.filter(server=server, monitoring_enabled=True):
         marker = f"[svc:{svc.name}]"
-        open_alert = AlertHistory.objects.filter(
-            server=server, alert_type=AlertHistory.AlertType.SERVICE,
-            status=AlertHistory.AlertStatus.TRIGGERED, message__contains=marker,
-        ).first()
+        open_alert = next((a for a in open_alerts if marker in a.message), None)
         is_down = svc.status != "running"
         if is_down and not open_alert and not suppressed:
             ecfg = EmailAlertConfig.objects.filter(enabled=True).first()
@@ -366,12 +427,10 @@ def evaluate_slow_service_alerts(server):
     mconfig = getattr(server, "monitoring_config", None)
     suppressed = getattr(server, "suppress_alerts", False) or (mconfig and getattr(mconfig, "alert_suppressed", False))
     now = timezone.now()
+    open_alerts = _open_alerts(server, AlertHistory.AlertType.SERVICE)
     for svc in Service.objects.filter(server=server, monitoring_enabled=True):
         marker = f"[svc-slow:{svc.name}]"
-        open_alert = AlertHistory.objects.filter(
-            server=server, alert_type=AlertHistory.AlertType.SERVICE,
-            status=AlertHistory.AlertStatus.TRIGGERED, message__contains=marker,
-        ).first()
+        open_alert = next((a for a in open_alerts if marker in a.message), None)
         # Per-service gate: only services with their own toggle on can raise a slow alert.
         should_alert = svc.slow_alert_enabled and svc.latency_status == Service.LatencyStatus.SLOW
         if should_alert and not open_alert and not suppressed:
@@ -403,12 +462,10 @@ def evaluate_container_alerts(server):
     config = getattr(server, "monitoring_config", None)
     suppressed = getattr(server, "suppress_alerts", False) or (config and getattr(config, "alert_suppressed", False))
     now = timezone.now()
+    open_alerts = _open_alerts(server, AlertHistory.AlertType.CONTAINER)
     for ctr in Container.objects.filter(server=server, monitoring_enabled=True):
         marker = f"[ctr:{ctr.name}]"
-        open_alert = AlertHistory.objects.filter(
-            server=server, alert_type=AlertHistory.AlertType.CONTAINER,
-            status=AlertHistory.AlertStatus.TRIGGERED, message__contains=marker,
-        ).first()
+        open_alert = next((a for a in open_alerts if marker in a.message), None)
         is_down = ctr.state != "running"
         if is_down and not open_alert and not suppressed:
             ecfg = EmailAlertConfig.objects.filter(enabled=True).first()
@@ -434,6 +491,10 @@ def evaluate_container_alerts(server):
 _VALID_LATENCY_TYPES = {c[0] for c in ServiceLatencyMeasurement.MeasurementType.choices}
 # Defensive cap: at most this many latency history rows written per services push.
 _MAX_LATENCY_ROWS_PER_PUSH = 200
+# Service columns apply_service_latency sets (saved by the ingest in one bulk UPDATE).
+_LATENCY_STATE_FIELDS = [
+    "last_latency_ms", "last_latency_at", "last_latency_success", "slow_streak", "latency_status",
+]
 
 
 def _parse_service_latency(item):
@@ -467,14 +528,14 @@ def apply_service_latency(service, sample, now, config):
     fresh agent sample. Uses an N-consecutive-sample streak with hysteresis (clear below
     0.8x the threshold) so a single spike never flips it. A FAILED probe updates the snapshot
     but leaves the responsiveness state alone -- down/stopped is owned by the service-status
-    path. Persists only the changed fields. Runs for every measured service so the UI column
-    works even before monitoring is enabled; alerting stays gated to monitored services."""
+    path. Does not save: the ingest writes _LATENCY_STATE_FIELDS for every sampled service in
+    one bulk UPDATE. Runs for every measured service so the UI column works even before
+    monitoring is enabled; alerting stays gated to monitored services."""
     latency = sample["latency_ms"]
     success = sample["success"]
     service.last_latency_ms = latency
     service.last_latency_at = now
     service.last_latency_success = success
-    fields = ["last_latency_ms", "last_latency_at", "last_latency_success"]
 
     if success and latency is not None:
         threshold = service.latency_threshold_ms or config.slow_latency_threshold_ms or 500
@@ -490,33 +551,22 @@ def apply_service_latency(service, sample, now, config):
             # Inside the hysteresis band: hold the current state; only lift "unknown" to ok.
             if service.latency_status == Service.LatencyStatus.UNKNOWN:
                 service.latency_status = Service.LatencyStatus.OK
-        fields += ["slow_streak", "latency_status"]
 
-    try:
-        service.save(update_fields=fields)
-    except Exception:
-        logger.exception("Failed to apply latency state for service %s", service.name)
 
-
-def _store_service_latency(service, sample, now):
-    """Persist a ServiceLatencyMeasurement history row -- only for MONITORED services (bounds
-    volume and matches the read APIs that filter service__monitoring_enabled=True). Returns
-    True if a row was written. Best-effort: never breaks the ingest."""
+def _latency_row(service, sample, now):
+    """An unsaved ServiceLatencyMeasurement history row -- only for MONITORED services (bounds
+    volume and matches the read APIs that filter service__monitoring_enabled=True), else None.
+    The ingest collects these and writes them in one bulk INSERT."""
     if not service.monitoring_enabled:
-        return False
-    try:
-        ServiceLatencyMeasurement.objects.create(
-            service=service,
-            latency_ms=sample["latency_ms"] or 0,
-            timestamp=now,
-            success=sample["success"],
-            error_message=sample["error"],
-            measurement_type=sample["type"],
-        )
-        return True
-    except Exception:
-        logger.exception("Failed to store latency for service %s", service.name)
-        return False
+        return None
+    return ServiceLatencyMeasurement(
+        service=service,
+        latency_ms=sample["latency_ms"] or 0,
+        timestamp=now,
+        success=sample["success"],
+        error_message=sample["error"],
+        measurement_type=sample["type"],
+    )
 
 
 def _service_is_up(svc):
@@ -669,8 +719,16 @@ def _merge_ports_into_units(services):
     return [it for it in services if id(it) not in merged]
 
 
+# Columns an agent services push overwrites on an existing row.
+_SERVICE_SYNC_FIELDS = [
+    "status", "service_type", "port", "bind_address", "process_id", "last_checked",
+    "auto_detected", "display_name", "detected_via",
+]
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
+@_accepts_gzip
 def agent_ingest_services(request):
     """Receive the list of running services detected by the agent and sync them.
 
@@ -683,10 +741,11 @@ def agent_ingest_services(request):
         return err
     server = cred.server
 
-    if len(request.body) > MAX_BODY_BYTES:
-        return JsonResponse({"error": "payload too large"}, status=413)
+    body, err = _request_body(request)
+    if err:
+        return err
     try:
-        payload = json.loads(request.body)
+        payload = _loads(body)
     except (ValueError, TypeError):
         return JsonResponse({"error": "request body is not valid JSON"}, status=400)
 
@@ -702,75 +761,110 @@ def agent_ingest_services(request):
     # the service is one row (with a port => Response/SLO), not two. See _merge_ports_into_units.
     services = _merge_ports_into_units(services)
 
-    now = timezone.now()
-    reported_names = set()
-    latency_rows = 0
-    config = None  # AppConfig fetched lazily, only if a latency sample actually arrives
-    for item in services:
-        if not isinstance(item, dict):
-            continue
-        name = (item.get("name") or "").strip()[:100]
-        if not name:
-            continue
-        reported_names.add(name)
-        port = item.get("port")
-        try:
-            port = int(port) if port not in (None, "") else None
-        except (TypeError, ValueError):
-            port = None
-        svc, _ = Service.objects.update_or_create(
-            server=server,
-            name=name,
-            defaults={
-                "status": (item.get("status") or "running")[:50],
-                "service_type": (item.get("service_type") or "systemd")[:50],
-                "port": port,
-                "bind_address": (item.get("bind_address") or "")[:50] or None,
-                "process_id": (str(item.get("process_id")) or "")[:50] or None,
-                "last_checked": now,
-                "auto_detected": True,
+    # The whole sync -- per-service upserts, latency history, the stopped sweep, availability
+    # and health -- commits once instead of once per statement. Best-effort parts run in a
+    # savepoint so their failure doesn't abort the rest. Alerts are evaluated after the
+    # commit, so notifications never go out for rows that were rolled back.
+    with transaction.atomic():
+        now = timezone.now()
+        rows, samples = {}, {}   # name -> unsaved Service / latency sample; last entry wins
+        config = None  # AppConfig fetched lazily, only if a latency sample actually arrives
+        for item in services:
+            if not isinstance(item, dict):
+                continue
+            name = (item.get("name") or "").strip()[:100]
+            if not name:
+                continue
+            port = item.get("port")
+            try:
+                port = int(port) if port not in (None, "") else None
+            except (TypeError, ValueError):
+                port = None
+            rows[name] = Service(
+                server=server,
+                name=name,
+                status=(item.get("status") or "running")[:50],
+                service_type=(item.get("service_type") or "systemd")[:50],
+                port=port,
+                bind_address=(item.get("bind_address") or "")[:50] or None,
+                process_id=(str(item.get("process_id")) or "")[:50] or None,
+                last_checked=now,
+                auto_detected=True,
                 # Optional friendly label + provenance (push-1.6.0+); old agents omit
                 # these -> stays NULL and the display layer falls back to the role map.
-                "display_name": (item.get("display_name") or "")[:150] or None,
-                "detected_via": (item.get("detected_via") or "")[:30] or None,
-            },
-        )
+                display_name=(item.get("display_name") or "")[:150] or None,
+                detected_via=(item.get("detected_via") or "")[:30] or None,
+            )
+            # Agent-measured per-service response time (push-1.9.0+). Absent for old agents.
+            sample = _parse_service_latency(item)
+            if sample is not None:
+                samples[name] = sample
+        reported_names = set(rows)
+
+        # One INSERT ... ON CONFLICT DO UPDATE for the whole list instead of a SELECT + write
+        # per service. Operator settings (monitoring_enabled, thresholds, labels) and the
+        # latency/health state are never in update_fields, so they survive every push.
+        if rows:
+            Service.objects.bulk_create(
+                list(rows.values()),
+                update_conflicts=True,
+                unique_fields=["server", "name"],
+                update_fields=_SERVICE_SYNC_FIELDS,
+            )
 
-        # Agent-measured per-service response time (push-1.9.0+). Absent for old agents.
-        sample = _parse_service_latency(item)
-        if sample is not None:
-            if config is None:
-                config = AppConfig.get_config()
-            apply_service_latency(svc, sample, now, config)   # denormalized state (all services)
-            if latency_rows < _MAX_LATENCY_ROWS_PER_PUSH and _store_service_latency(svc, sample, now):
-                latency_rows += 1  # history row (monitored services only)
-
-    # Mark previously auto-detected services that are no longer reported as stopped.
-    if reported_names:
-        (Service.objects
-         .filter(server=server, auto_detected=True)
-         .exclude(name__in=reported_names)
-         .exclude(status="stopped")
-         .update(status="stopped", last_checked=now))
-
-    # Record one up/down availability sample per MONITORED service, then recompute Health.
-    # Done AFTER the stopped sweep and with a fresh DB read, so a service that vanished from
-    # this push (now marked 'stopped') contributes a DOWN sample instead of silently going
-    # missing -- that's what lets availability count real downtime. Health reads the freshly
-    # updated latency_status + the just-written sample. Server-side only; no agent change.
-    try:
-        monitored = list(Service.objects.filter(server=server, monitoring_enabled=True))
-        if monitored:
-            if config is None:
-                config = AppConfig.get_config()
-            ServiceAvailabilitySample.objects.bulk_create([
-                ServiceAvailabilitySample(service=svc, timestamp=now, up=_service_is_up(svc))
-                for svc in monitored
-            ])
-            for svc in monitored:
-                apply_service_health(svc, now, config)
-    except Exception:
-        logger.exception("Availability sampling / health failed for %s", server.name)
+        # Latency state for the sampled services (re-read once for their stored streak and
+        # thresholds) in one UPDATE, and their history rows in one INSERT. Both best-effort:
+        # never break the ingest.
+        if samples:
+            config = AppConfig.get_config()
+            sampled = list(Service.objects.filter(server=server, name__in=samples))
+            latency_rows = []
+            for svc in sampled:
+                sample = samples[svc.name]
+                apply_service_latency(svc, sample, now, config)   # denormalized state (all services)
+                if len(latency_rows) < _MAX_LATENCY_ROWS_PER_PUSH:
+                    row = _latency_row(svc, sample, now)   # history row (monitored services only)
+                    if row is not None:
+                        latency_rows.append(row)
+            try:
+                with transaction.atomic():
+                    Service.objects.bulk_update(sampled, _LATENCY_STATE_FIELDS)
+            except Exception:
+                logger.exception("Failed to apply latency state for %s", server.name)
+            if latency_rows:
+                try:
+                    with transaction.atomic():
+                        ServiceLatencyMeasurement.objects.bulk_create(latency_rows)
+                except Exception:
+                    logger.exception("Failed to store latency history for %s", server.name)
+
+        # Mark previously auto-detected services that are no longer reported as stopped.
+        if reported_names:
+            (Service.objects
+             .filter(server=server, auto_detected=True)
+             .exclude(name__in=reported_names)
+             .exclude(status="stopped")
+             .update(status="stopped", last_checked=now))
+
+        # Record one up/down availability sample per MONITORED service, then recompute Health.
+        # Done AFTER the stopped sweep and with a fresh DB read, so a service that vanished from
+        # this push (now marked 'stopped') contributes a DOWN sample instead of silently going
+        # missing -- that's what lets availability count real downtime. Health reads the freshly
+        # updated latency_status + the just-written sample. Server-side only; no agent change.
+        try:
+            with transaction.atomic():
+                monitored = list(Service.objects.filter(server=server, monitoring_enabled=True))
+                if monitored:
+                    if config is None:
+                        config = AppConfig.get_config()
+                    ServiceAvailabilitySample.objects.bulk_create([
+                        ServiceAvailabilitySample(service=svc, timestamp=now, up=_service_is_up(svc))
+                        for svc in monitored
+                    ])
+                    for svc in monitored:
+                        apply_service_health(svc, now, config)
+        except Exception:
+            logger.exception("Availability sampling / health failed for %s", server.name)
 
     # Raise/resolve alerts for monitored services based on their current status.
     try:
@@ -787,8 +881,16 @@ def agent_ingest_services(request):
     return JsonResponse({"status": "ok", "received": len(reported_names)})
 
 
+# Columns an agent container push overwrites on an existing row.
+_CONTAINER_SYNC_FIELDS = [
+    "container_id", "runtime", "image", "state", "status_text", "ports",
+    "last_checked", "auto_detected", "updated_at",
+]
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
+@_accepts_gzip
 def agent_ingest_containers(request):
     """Receive the list of containers detected by the agent and sync them.
 
@@ -800,10 +902,11 @@ def agent_ingest_containers(request):
         return err
     server = cred.server
 
-    if len(request.body) > MAX_BODY_BYTES:
-        return JsonResponse({"error": "payload too large"}, status=413)
+    body, err = _request_body(request)
+    if err:
+        return err
     try:
-        payload = json.loads(request.body)
+        payload = _loads(body)
     except (ValueError, TypeError):
         return JsonResponse({"error": "request body is not valid JSON"}, status=400)
 
@@ -816,30 +919,48 @@ def agent_ingest_containers(request):
         return JsonResponse({"error": "missing 'containers' list"}, status=400)
 
     now = timezone.now()
-    reported = set()
+    plain, inspected = {}, {}   # name -> Container; a repeated name keeps its last entry
     for item in containers:
         if not isinstance(item, dict):
             continue
         name = (item.get("name") or "").strip()[:200]
         if not name:
             continue
-        reported.add(name)
-        defaults = {
-            "container_id": (item.get("container_id") or "")[:64],
-            "runtime": (item.get("runtime") or "docker")[:20],
-            "image": (item.get("image") or "")[:300],
-            "state": (item.get("state") or "running")[:30],
-            "status_text": (item.get("status_text") or "")[:200],
-            "ports": (item.get("ports") or "")[:300],
-            "last_checked": now,
-            "auto_detected": True,
-        }
+        row = Container(
+            server=server,
+            name=name,
+            container_id=(item.get("container_id") or "")[:64],
+            runtime=(item.get("runtime") or "docker")[:20],
+            image=(item.get("image") or "")[:300],
+            state=(item.get("state") or "running")[:30],
+            status_text=(item.get("status_text") or "")[:200],
+            ports=(item.get("ports") or "")[:300],
+            last_checked=now,
+            auto_detected=True,
+        )
+        plain.pop(name, None)
+        inspected.pop(name, None)
         # Inspect summary rides along only on the slow inspect cycle; persist it
         # only when present so normal pushes don't wipe the last report.
         if isinstance(item.get("inspect"), dict):
-            defaults["inspect_data"] = item["inspect"]
-            defaults["inspect_at"] = now
-        Container.objects.update_or_create(server=server, name=name, defaults=defaults)
+            row.inspect_data = item["inspect"]
+            row.inspect_at = now
+            inspected[name] = row
+        else:
+            plain[name] = row
+    reported = set(plain) | set(inspected)
+
+    # One INSERT ... ON CONFLICT DO UPDATE per group instead of a SELECT + write per
+    # container. monitoring_enabled and created_at are never in update_fields, so an
+    # operator's choice survives every push.
+    for rows, extra in ((plain, []), (inspected, ["inspect_data", "inspect_at"])):
+        if rows:
+            Container.objects.bulk_create(
+                list(rows.values()),
+                update_conflicts=True,
+                unique_fields=["server", "name"],
+                update_fields=_CONTAINER_SYNC_FIELDS + extra,
+            )
 
     if reported:
         (Container.objects
@@ -859,6 +980,7 @@ def agent_ingest_containers(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@_accepts_gzip
 def agent_ingest_ssh_auth(request):
     """Receive SSH authentication events observed on the server by the agent.
 
@@ -871,10 +993,11 @@ def agent_ingest_ssh_auth(request):
         return err
     server = cred.server
 
-    if len(request.body) > MAX_BODY_BYTES:
-        return JsonResponse({"error": "payload too large"}, status=413)
+    body, err = _request_body(request)
+    if err:
+        return err
     try:
-        payload = json.loads(request.body)
+        payload = _loads(body)
     except (ValueError, TypeError):
         return JsonResponse({"error": "request body is not valid JSON"}, status=400)
 
@@ -908,7 +1031,42 @@ def agent_ingest_ssh_auth(request):
     return JsonResponse({"status": "ok", "received": len(rows)})
 
 
-def _serve_agent_file(filename, content_type):
+# path -> ((st_mtime_ns, st_size), bytes, quoted ETag). Agent artifacts only change on a
+# deploy (or when a signed .exe is dropped in), so each worker reads and hashes a file
+# once; the stat signature picks up a replaced file without a restart.
+_AGENT_FILE_CACHE = {}
+
+
+def _load_agent_file(path):
+    """(bytes, ETag) for an agent artifact, re-read only when the file changes on disk."""
+    st = os.stat(path)
+    sig = (st.st_mtime_ns, st.st_size)
+    cached = _AGENT_FILE_CACHE.get(path)
+    if cached is not None and cached[0] == sig:
+        return cached[1], cached[2]
+    with open(path, "rb") as f:
+        data = f.read()
+    etag = quote_etag(hashlib.sha256(data).hexdigest())
+    _AGENT_FILE_CACHE[path] = (sig, data, etag)
+    return data, etag
+
+
+def _agent_file_response(request, path, content_type):
+    """Serve an agent artifact with a content-hash ETag.
+
+    Installers and fleet tooling re-fetch the same agent files on every run; a client that
+    sends back the ETag (If-None-Match, e.g. `curl --etag-compare`) gets a bodyless 304
+    while the file is unchanged instead of the whole script or .exe again.
+    """
+    data, etag = _load_agent_file(path)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(data, content_type=content_type)
+    response["ETag"] = etag
+    return response
+
+
+def _serve_agent_file(request, filename, content_type):
     """Serve a file from the agent/ directory as plain text.
 
     The agent source and installer are not secret (the per-server token is the
@@ -919,36 +1077,34 @@ def _serve_agent_file(filename, content_type):
     path = os.path.join(settings.BASE_DIR, "agent", filename)
     if not os.path.isfile(path):
         raise Http404("not found")
-    with open(path, "r", encoding="utf-8") as f:
-        return HttpResponse(f.read(), content_type=content_type)
+    return _agent_file_response(request, path, content_type)
 
 
 @require_http_methods(["GET"])
 def serve_install_script(request):
     """Serve the VM installer so it can be piped into bash on a monitored VM."""
-    return _serve_agent_file("install.sh", "text/x-shellscript; charset=utf-8")
+    return _serve_agent_file(request, "install.sh", "text/x-shellscript; charset=utf-8")
 
 
 @require_http_methods(["GET"])
 def serve_agent_script(request):
     """Serve the agent program, fetched by the installer during setup."""
-    return _serve_agent_file("stacksense_agent.py", "text/x-python; charset=utf-8")
+    return _serve_agent_file(request, "stacksense_agent.py", "text/x-python; charset=utf-8")
 
 
-def _serve_agent_binary(filename):
+def _serve_agent_binary(request, filename):
     """Serve a binary file from agent/ (the Windows .exe / nssm.exe). 404 when absent so
     a Linux-only deploy that never built the Windows artifacts degrades cleanly."""
     path = os.path.join(settings.BASE_DIR, "agent", filename)
     if not os.path.isfile(path):
         raise Http404("not found")
-    with open(path, "rb") as f:
-        return HttpResponse(f.read(), content_type="application/octet-stream")
+    return _agent_file_response(request, path, "application/octet-stream")
 
 
 @require_http_methods(["GET"])
 def serve_install_ps1(request):
     """Serve the Windows PowerShell installer (piped into PowerShell on a Windows host)."""
-    return _serve_agent_file("install.ps1", "text/plain; charset=utf-8")
+    return _serve_agent_file(request, "install.ps1", "text/plain; charset=utf-8")
 
 
 @require_http_methods(["GET"])
@@ -959,8 +1115,7 @@ def serve_agent_exe(request):
     server. 404 only if neither exists."""
     path = os.path.join(settings.BASE_DIR, "agent", "stacksense-agent.exe")
     if os.path.isfile(path):
-        with open(path, "rb") as f:
-            return HttpResponse(f.read(), content_type="application/octet-stream")
+        return _agent_file_response(request, path, "application/octet-stream")
     url = getattr(settings, "WINDOWS_AGENT_EXE_URL", "")
     if url:
         return HttpResponseRedirect(url)
@@ -970,7 +1125,7 @@ def serve_agent_exe(request):
 @require_http_methods(["GET"])
 def serve_nssm_exe(request):
     """Serve the vendored NSSM service wrapper used by the Windows installer."""
-    return _serve_agent_binary("nssm.exe")
+    return _serve_agent_binary(request, "nssm.exe")
 
 
 @csrf_exempt
@@ -992,6 +1147,7 @@ def agent_ping(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@_accepts_gzip
 def agent_heartbeat(request):
     """Lightweight authenticated heartbeat ('I'm alive')."""
     cred, err = _authenticate(request)
@@ -999,9 +1155,10 @@ def agent_heartbeat(request):
         return err
 
     agent_version = None
-    if request.body:
+    body, _ = _request_body(request)
+    if body:
         try:
-            data = json.loads(request.body)
+            data = _loads(body)
             if isinstance(data, dict):
                 agent_version = data.get("agent_version")
         except (ValueError, TypeError):
@@ -1014,6 +1171,7 @@ def agent_heartbeat(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@_accepts_gzip
 def agent_ingest_metrics(request):
     """Receive and store a full system-metrics push from the agent."""
     cred, err = _authenticate(request)
@@ -1029,11 +1187,12 @@ def agent_ingest_metrics(request):
                 return JsonResponse({"error": "payload too large"}, status=413)
         except (TypeError, ValueError):
             pass
-    if len(request.body) > MAX_BODY_BYTES:
-        return JsonResponse({"error": "payload too large"}, status=413)
+    body, err = _request_body(request)
+    if err:
+        return err
 
     try:
-        payload = json.loads(request.body)
+        payload = _loads(body)
     except (ValueError, TypeError):
         return JsonResponse({"error": "request body is not valid JSON"}, status=400)
 
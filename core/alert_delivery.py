@@ -0,0 +1,49 @@
+"""Background delivery pool for outbound alerts (SMTP / Slack webhook).
+
+Sending runs on a small thread pool so the caller -- an agent's ingest request, the
+synthetic "Run now" view, a scheduler pass -- never waits on a slow mail server or a
+webhook's 10s timeout. Routing (configs, recipients, Slack gate) is decided by the caller;
+only the send is handed off.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.db import connection
+
+logger = logging.getLogger("core")
+
+ALERT_DELIVERY_WORKERS = 4
+_delivery_pool = ThreadPoolExecutor(max_workers=ALERT_DELIVERY_WORKERS,
+                                    thread_name_prefix="alert-delivery")
+_pending_deliveries = set()
+_pending_lock = threading.Lock()
+
+
+def deliver(what, fn, *args, **kwargs):
+    """Queue fn(*args, **kwargs) on the delivery pool. Failures are logged, never raised."""
+    def run():
+        try:
+            fn(*args, **kwargs)
+        except Exception:
+            logger.exception("%s failed", what)
+        finally:
+            connection.close()   # the DB-backed email backend opens one per worker thread
+
+    future = _delivery_pool.submit(run)
+    with _pending_lock:
+        _pending_deliveries.add(future)
+    future.add_done_callback(_forget_delivery)
+    return future
+
+
+def _forget_delivery(future):
+    with _pending_lock:
+        _pending_deliveries.discard(future)
+
+
+def wait_for_alert_deliveries(timeout=None):
+    """Block until every queued alert delivery has finished (tests, scheduler shutdown)."""
+    with _pending_lock:
+        pending = list(_pending_deliveries)
+    wait(pending, timeout=timeout)
@@ -104,7 +104,7 @@ class AnomalyDetector:
                 anomalies.append(a)
 
         # Network I/O (ceiling-only)
-        net = self._network_ceiling(metric)
+        net = self._network_ceiling(metric, history[0] if history else None)
         if net:
             anomalies.append(net)
 
@@ -231,26 +231,20 @@ class AnomalyDetector:
             logger.warning(f"disk_usage parse failed for {self.server.name}: {e}")
         return out
 
-    def _network_ceiling(self, metric):
-        """Ceiling-only network throughput check (MB/s vs config.network_io_threshold)."""
+    def _network_ceiling(self, metric, previous):
+        """Ceiling-only network throughput check (MB/s vs config.network_io_threshold).
+
+        `previous` is the sample immediately before `metric` -- the head of the trailing
+        history detect_anomalies already loaded, so no second query is needed."""
         if not getattr(metric, "network_io", None):
             return None
         threshold = float(getattr(self.config, "network_io_threshold", 0) or 0)
         if threshold <= 0:
             return None
         try:
-            previous = (
-                SystemMetric.objects.filter(server=self.server, timestamp__lt=metric.timestamp)
-                .order_by("-timestamp")
-                .first()
-            )
             if not previous or not previous.network_io:
                 return None
             cur, prev = metric.network_io, previous.network_io
-            if isinstance(cur, str):
-                cur = json.loads(cur)
-            if isinstance(prev, str):
-                prev = json.loads(prev)
             dt = (metric.timestamp - previous.timestamp).total_seconds() or 60
             worst = None
             for iface, c in cur.items():
@@ -445,14 +439,10 @@ class AnomalyDetector:
                 except Exception as e:
                     logger.warning(f"Legacy Memory threshold detection failed: {e}")
             
-            # Disk anomalies - handle disk_usage (can be dict or JSON string)
+            # Disk anomalies (disk_usage is a JSONField: {mount: {...}} per partition)
             if metric.disk_usage:
                 try:
-                    # Parse disk_usage if it's a JSON string
-                    if isinstance(metric.disk_usage, str):
-                        disk_data = json.loads(metric.disk_usage)
-                    else:
-                        disk_data = metric.disk_usage
+                    disk_data = metric.disk_usage
                     
                     # Process each disk partition
                     for mount, usage in disk_data.items():
@@ -487,17 +477,8 @@ class AnomalyDetector:
                         # Skip if no previous metric for delta calculation
                         logger.debug(f"No previous metric for network delta calculation on {self.server.name}")
                     else:
-                        # Parse current network_io
-                        if isinstance(metric.network_io, str):
-                            current_network_data = json.loads(metric.network_io)
-                        else:
-                            current_network_data = metric.network_io
-                        
-                        # Parse previous network_io
-                        if isinstance(previous_metric.network_io, str):
-                            previous_network_data = json.loads(previous_metric.network_io)
-                        else:
-                            previous_network_data = previous_metric.network_io
+                        current_network_data = metric.network_io
+                        previous_network_data = previous_metric.network_io
                         
                         # Calculate time difference
                         time_diff_seconds = (metric.timestamp - previous_metric.timestamp).total_seconds()
@@ -8,10 +8,10 @@ against the KPI's warning/critical thresholds, and alerts on a status change
 
 import logging
 
-import requests
 from django.utils import timezone
 
 from .models import BusinessKPI, BusinessKPIValue, EmailAlertConfig, SlackAlertConfig
+from . import webhooks
 
 logger = logging.getLogger("core")
 
@@ -105,7 +105,7 @@ def _send_slack(status, body):
         payload["username"] = cfg.username
     if cfg.icon_emoji:
         payload["icon_emoji"] = cfg.icon_emoji
-    requests.post(cfg.webhook_url, json=payload, timeout=10)
+    webhooks.post(cfg.webhook_url, json=payload, timeout=10)
 
 
 def notify(kpi, status, value):
@@ -22,7 +22,7 @@ import pandas as pd
 from typing import Dict, List, Optional, Any
 from django.utils import timezone
 from .models import SystemMetric
-import json
+from .network_io import sum_network_io
 
 
 class MultiMetricCorrelationEngine:
@@ -91,17 +91,31 @@ class MultiMetricCorrelationEngine:
         
         Returns:
             pandas DataFrame with columns: ['cpu', 'memory', 'disk', 'network']
-            Returns None if insufficient data (< 10 metrics)
+            Returns None if correlation is disabled or data is insufficient (< 10 metrics)
         
         Notes:
             - Disk: Uses maximum partition percent across all partitions
             - Network: Computes delta throughput (bytes_recv and bytes_sent deltas)
             - All values are converted to float arrays
         """
-        # Query recent metrics
-        recent_metrics = SystemMetric.objects.filter(
+        if not self.enabled:
+            return None
+
+        server_metrics = SystemMetric.objects.filter(
             server=self.server
-        ).order_by('-timestamp')[:self.window_size]
+        ).order_by('-timestamp')
+
+        # Need at least 10 metrics for meaningful correlation. Probe for the 10th
+        # row (LIMIT 1 OFFSET 9 on the server/-timestamp index) before hydrating
+        # a full window on sparse servers; cheaper than COUNT(*) over all history.
+        if not server_metrics[9:10].exists():
+            return None
+
+        # Query recent metrics - only the columns read below, so wide fields
+        # (top_processes, disk_hardware, ipc_stats) are never hydrated
+        recent_metrics = server_metrics.only(
+            'timestamp', 'cpu_percent', 'memory_percent', 'disk_usage', 'network_io'
+        )[:self.window_size]
         
         if len(recent_metrics) < 10:
             # Need at least 10 metrics for meaningful correlation
@@ -131,11 +145,7 @@ class MultiMetricCorrelationEngine:
             max_disk = 0.0
             if metric.disk_usage:
                 try:
-                    # Parse disk_usage (can be JSON string or dict)
-                    if isinstance(metric.disk_usage, str):
-                        disk_data = json.loads(metric.disk_usage)
-                    else:
-                        disk_data = metric.disk_usage
+                    disk_data = metric.disk_usage
                     
                     # Find maximum percent across all partitions
                     for mount, usage in disk_data.items():
@@ -144,7 +154,7 @@ class MultiMetricCorrelationEngine:
                         else:
                             percent = float(usage) if isinstance(usage, (int, float)) else 0.0
                         max_disk = max(max_disk, float(percent))
-                except (json.JSONDecodeError, TypeError, ValueError):
+                except (TypeError, ValueError):
                     max_disk = 0.0
             
             disk_values.append(max_disk)
@@ -153,20 +163,10 @@ class MultiMetricCorrelationEngine:
             net_value = 0.0
             if metric.network_io:
                 try:
-                    # Parse network_io (can be JSON string or dict)
-                    if isinstance(metric.network_io, str):
-                        net_data = json.loads(metric.network_io)
-                    else:
-                        net_data = metric.network_io
-                    
-                    # Sum bytes across all interfaces
-                    total_recv = 0
-                    total_sent = 0
+                    net_data = metric.network_io
                     
-                    for interface, io_data in net_data.items():
-                        if isinstance(io_data, dict):
-                            total_recv += io_data.get("bytes_recv", 0) or 0
-                            total_sent += io_data.get("bytes_sent", 0) or 0
+                    # Sum bytes across the host's real interfaces
+                    total_sent, total_recv = sum_network_io(net_data)
                     
                     # Compute delta (change from previous measurement)
                     if prev_net_recv is not None and prev_net_sent is not None:
@@ -179,7 +179,7 @@ class MultiMetricCorrelationEngine:
                     
                     prev_net_recv = total_recv
                     prev_net_sent = total_sent
-                except (json.JSONDecodeError, TypeError, ValueError):
+                except (TypeError, ValueError):
                     net_value = 0.0
             
             network_values.append(net_value)
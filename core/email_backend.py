@@ -6,7 +6,10 @@ allowing Django's built-in email functions (like password reset) to use
 the same SMTP settings configured in the Alerts Configuration page.
 """
 
+import hashlib
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from django.core.mail.backends.base import BaseEmailBackend
@@ -15,6 +18,68 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Idle SMTP connections kept between sends: EmailAlertConfig pk -> (fingerprint,
+# connection, idle_since). The fingerprint is a hash of everything that identifies the
+# session (host, port, TLS mode, credentials), so no plaintext password sits in the
+# pool and a connection opened under since-edited settings is never handed out again.
+# Alerts go out in bursts from the scheduler; reusing a connection skips the
+# TCP + TLS + AUTH handshake per message. A backend checks a connection out of the
+# pool while it uses it, so no two senders ever share one at the same time.
+_SMTP_POOL = {}
+_SMTP_POOL_LOCK = threading.Lock()
+# Most servers drop idle sessions after ~5 minutes; don't bother probing older ones.
+SMTP_POOL_IDLE_SECONDS = 240
+
+
+def _quit_quietly(connection):
+    try:
+        connection.quit()
+    except Exception:
+        pass
+
+
+def _session_fingerprint(*parts):
+    """Stable digest of the settings a pooled session was opened with."""
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def _checkout_connection(key):
+    """Take a live pooled connection for `key` ((config pk, fingerprint)), or None."""
+    config_id, fingerprint = key
+    with _SMTP_POOL_LOCK:
+        entry = _SMTP_POOL.pop(config_id, None)
+    if entry is None:
+        return None
+    pooled_fingerprint, connection, idle_since = entry
+    if pooled_fingerprint != fingerprint:
+        # Opened under settings that have since changed.
+        _quit_quietly(connection)
+        return None
+    if time.monotonic() - idle_since > SMTP_POOL_IDLE_SECONDS:
+        _quit_quietly(connection)
+        return None
+    try:
+        if connection.noop()[0] == 250:
+            return connection
+    except Exception:
+        pass
+    _quit_quietly(connection)
+    return None
+
+
+def _checkin_connection(key, connection):
+    """Return a healthy connection to the pool (one idle connection per config)."""
+    config_id, fingerprint = key
+    stale = None
+    with _SMTP_POOL_LOCK:
+        entry = _SMTP_POOL.get(config_id)
+        if entry is None or entry[0] != fingerprint:
+            _SMTP_POOL[config_id] = (fingerprint, connection, time.monotonic())
+            stale, connection = (entry[1] if entry else None), None
+    for leftover in (stale, connection):
+        if leftover is not None:
+            _quit_quietly(leftover)
+
 
 class DatabaseEmailBackend(BaseEmailBackend):
     """
@@ -25,6 +90,8 @@ class DatabaseEmailBackend(BaseEmailBackend):
     def __init__(self, fail_silently=False, **kwargs):
         super().__init__(fail_silently=fail_silently, **kwargs)
         self.connection = None
+        self._pool_key = None
+        self._broken = False
     
     def _get_email_config(self):
         """Get email configuration from database"""
@@ -58,6 +125,14 @@ class DatabaseEmailBackend(BaseEmailBackend):
                 logger.warning("SMTP host not configured")
                 return False
             
+            key = (config.pk, _session_fingerprint(smtp_host, smtp_port, bool(use_ssl),
+                                                   bool(use_tls), config.username,
+                                                   config.password))
+            pooled = _checkout_connection(key)
+            if pooled is not None:
+                self.connection, self._pool_key, self._broken = pooled, key, False
+                return True
+            
             if use_ssl:
                 self.connection = smtplib.SMTP_SSL(smtp_host, smtp_port, timeout=30)
             else:
@@ -80,6 +155,7 @@ class DatabaseEmailBackend(BaseEmailBackend):
                         raise
                     return False
             
+            self._pool_key, self._broken = key, False
             return True
             
         except Exception as e:
@@ -89,13 +165,14 @@ class DatabaseEmailBackend(BaseEmailBackend):
             return False
     
     def close(self):
-        """Close SMTP connection"""
+        """Release the SMTP connection: back to the pool if it's healthy, else quit."""
         if self.connection:
-            try:
-                self.connection.quit()
-            except Exception:
-                pass
+            if self._pool_key is not None and not self._broken:
+                _checkin_connection(self._pool_key, self.connection)
+            else:
+                _quit_quietly(self.connection)
             self.connection = None
+            self._pool_key = None
     
     def send_messages(self, email_messages):
         """Send one or more EmailMessage objects"""
@@ -182,6 +259,7 @@ class DatabaseEmailBackend(BaseEmailBackend):
             
         except Exception as e:
             logger.error(f"Error sending email: {e}")
+            self._broken = True  # don't hand a connection in an unknown state back to the pool
             if not self.fail_silently:
                 raise
             return False
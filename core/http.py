@@ -0,0 +1,20 @@
+"""One pooled requests.Session for StackSense's outbound HTTP.
+
+Latency probes, Slack webhooks and the Ollama analyzer all send from short-lived
+worker pools that are built per run, so a session owned by a worker thread dies with
+its pool before a second request can reuse its connection. This module-level session
+outlives them: its urllib3 connection pools are thread-safe, so every thread borrows
+a kept-alive connection to a host and returns it for the next run.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+
+# Distinct hosts kept pooled (probed servers, hooks.slack.com, Ollama), and kept-alive
+# connections per host: enough for a full latency probe pool plus the alert senders.
+POOL_HOSTS = 32
+POOL_MAXSIZE = 64
+
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_MAXSIZE)
+session.mount("http://", _adapter)
+session.mount("https://", _adapter)
@@ -9,6 +9,7 @@ the test suite are unaffected; real enforcement applies once a valid license is
 See the plan: editions (standard/pro) + per-license VM cap + subscription expiry + node-lock.
 """
 import base64
+import functools
 import json
 from dataclasses import dataclass, field
 from datetime import date
@@ -28,6 +29,14 @@ def _public_key_b64():
     return getattr(settings, "LICENSE_PUBLIC_KEY_B64", _DEFAULT_PUBLIC_KEY_B64)
 
 
+@functools.lru_cache(maxsize=4)
+def _load_public_key(key_b64: str):
+    """Parsed Ed25519 public key, kept for the life of the process (keyed by the base64
+    text, so a settings override still takes effect)."""
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+    return Ed25519PublicKey.from_public_bytes(base64.b64decode(key_b64))
+
+
 def _b64u_decode(s: str) -> bytes:
     return base64.urlsafe_b64decode(s + "=" * (-len(s) % 4))
 
@@ -58,12 +67,11 @@ def verify_blob(blob: str):
     if not blob or "." not in blob:
         return None
     try:
-        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
         from cryptography.exceptions import InvalidSignature
         payload_b64, sig_b64 = blob.strip().split(".", 1)
         payload = _b64u_decode(payload_b64)
         sig = _b64u_decode(sig_b64)
-        pub = Ed25519PublicKey.from_public_bytes(base64.b64decode(_public_key_b64()))
+        pub = _load_public_key(_public_key_b64())
         try:
             pub.verify(sig, payload)
         except InvalidSignature:
@@ -3,6 +3,12 @@ import json
 import re
 from django.conf import settings
 
+from . import http
+
+# Markdown stripped from LLM responses; compiled once at import
+_CODE_FENCE_RE = re.compile(r"```.*?```", re.DOTALL)
+_BACKTICK_RE = re.compile(r"`")
+
 
 class OllamaAnalyzer:
     """Analyzes anomalies using Ollama LLM to generate human-readable explanations."""
@@ -19,7 +25,9 @@ class OllamaAnalyzer:
             return None
         
         try:
-            response = requests.post(
+            # A detection run asks from a thread pool; the shared kept-alive session
+            # saves a TCP handshake per explanation, across runs as well.
+            response = http.session.post(
                 f"{self.api_url}/api/generate",
                 json={
                     "model": self.model,
@@ -100,8 +108,8 @@ Keep it clear, concise, and actionable. Return only the explanation text with th
                 # Clean up response
                 response = response.strip()
                 # Remove any markdown formatting
-                response = re.sub(r"```.*?```", "", response, flags=re.DOTALL)
-                response = re.sub(r"`", "", response)
+                response = _CODE_FENCE_RE.sub("", response)
+                response = _BACKTICK_RE.sub("", response)
                 return response
         except Exception as e:
             print(f"Failed to generate LLM explanation: {e}")
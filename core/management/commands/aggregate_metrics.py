@@ -1,9 +1,23 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from django.db.models import Avg, Min, Max, Count
 from datetime import timedelta
+from itertools import groupby
 from core.models import SystemMetric, AggregatedMetric, Server, MonitoringConfig
 
+# Only the columns _build_aggregated reads -- skips network_io/top_processes/etc.
+AGGREGATE_FIELDS = ("timestamp", "cpu_percent", "memory_percent", "disk_usage")
+# The AggregatedMetric columns a re-run recomputes for a bucket that is already stored.
+AGGREGATED_VALUE_FIELDS = (
+    "cpu_avg", "cpu_min", "cpu_max",
+    "memory_avg", "memory_min", "memory_max",
+    "disk_avg", "disk_min", "disk_max",
+    "metric_count",
+)
+# Buckets per upsert round trip (one SELECT, one bulk UPDATE, one bulk INSERT).
+AGGREGATE_BATCH_SIZE = 500
+
 
 class Command(BaseCommand):
     help = "Aggregates old metrics into hourly and daily summaries"
@@ -45,84 +59,67 @@ class Command(BaseCommand):
 
     def _aggregate_hourly(self, server, cutoff_time):
         """Aggregate metrics into hourly summaries"""
-        metrics = SystemMetric.objects.filter(
-            server=server,
-            timestamp__lt=cutoff_time
-        ).order_by("timestamp")
-        
-        if not metrics.exists():
-            return 0
-        
-        # Group by hour
-        current_hour = None
-        hour_metrics = []
-        count = 0
-        
-        for metric in metrics:
-            metric_hour = metric.timestamp.replace(minute=0, second=0, microsecond=0)
-            
-            if current_hour is None:
-                current_hour = metric_hour
-                hour_metrics = [metric]
-            elif metric_hour == current_hour:
-                hour_metrics.append(metric)
-            else:
-                # Aggregate this hour
-                self._create_aggregated(server, "hourly", current_hour, hour_metrics)
-                count += 1
-                
-                # Start new hour
-                current_hour = metric_hour
-                hour_metrics = [metric]
-        
-        # Aggregate last hour
-        if hour_metrics:
-            self._create_aggregated(server, "hourly", current_hour, hour_metrics)
-            count += 1
-        
-        return count
+        return self._aggregate_buckets(
+            server, cutoff_time, "hourly",
+            lambda m: m.timestamp.replace(minute=0, second=0, microsecond=0),
+        )
 
     def _aggregate_daily(self, server, cutoff_time):
         """Aggregate metrics into daily summaries"""
+        return self._aggregate_buckets(
+            server, cutoff_time, "daily",
+            lambda m: m.timestamp.replace(hour=0, minute=0, second=0, microsecond=0),
+        )
+
+    def _aggregate_buckets(self, server, cutoff_time, agg_type, bucket_key):
+        """Stream metrics in timestamp order and aggregate each bucket_key group.
+
+        Rows arrive sorted, so groupby() sees every bucket as one contiguous run;
+        iterator() keeps only the current chunk in memory instead of the whole range.
+        Finished buckets are written AGGREGATE_BATCH_SIZE at a time.
+        """
         metrics = SystemMetric.objects.filter(
             server=server,
             timestamp__lt=cutoff_time
-        ).order_by("timestamp")
-        
-        if not metrics.exists():
-            return 0
-        
-        # Group by day
-        current_day = None
-        day_metrics = []
+        ).only(*AGGREGATE_FIELDS).order_by("timestamp")
+
         count = 0
-        
-        for metric in metrics:
-            metric_day = metric.timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            if current_day is None:
-                current_day = metric_day
-                day_metrics = [metric]
-            elif metric_day == current_day:
-                day_metrics.append(metric)
-            else:
-                # Aggregate this day
-                self._create_aggregated(server, "daily", current_day, day_metrics)
-                count += 1
-                
-                # Start new day
-                current_day = metric_day
-                day_metrics = [metric]
-        
-        # Aggregate last day
-        if day_metrics:
-            self._create_aggregated(server, "daily", current_day, day_metrics)
-            count += 1
-        
+        batch = []
+        for bucket, group in groupby(metrics.iterator(chunk_size=1000), key=bucket_key):
+            batch.append(self._build_aggregated(server, agg_type, bucket, list(group)))
+            if len(batch) >= AGGREGATE_BATCH_SIZE:
+                self._save_aggregated(server, agg_type, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self._save_aggregated(server, agg_type, batch)
+            count += len(batch)
+
         return count
 
-    def _create_aggregated(self, server, agg_type, timestamp, metrics):
-        """Create aggregated metric record"""
+    def _save_aggregated(self, server, agg_type, rows):
+        """Upsert a batch of buckets: one lookup of the ones already stored, then one bulk
+        UPDATE and one bulk INSERT, instead of update_or_create's two queries per bucket."""
+        stored = dict(
+            AggregatedMetric.objects.filter(
+                server=server,
+                aggregation_type=agg_type,
+                timestamp__in=[row.timestamp for row in rows],
+            ).values_list("timestamp", "id")
+        )
+        for row in rows:
+            row.pk = stored.get(row.timestamp)
+        with transaction.atomic():
+            AggregatedMetric.objects.bulk_update(
+                [row for row in rows if row.pk], AGGREGATED_VALUE_FIELDS,
+                batch_size=AGGREGATE_BATCH_SIZE,
+            )
+            AggregatedMetric.objects.bulk_create(
+                [row for row in rows if not row.pk], batch_size=AGGREGATE_BATCH_SIZE
+            )
+
+    def _build_aggregated(self, server, agg_type, timestamp, metrics):
+        """Unsaved aggregated metric record for one bucket"""
         cpu_values = [m.cpu_percent for m in metrics if m.cpu_percent is not None]
         memory_values = [m.memory_percent for m in metrics if m.memory_percent is not None]
         
@@ -134,20 +131,18 @@ class Command(BaseCommand):
                     if usage.get("percent"):
                         disk_values.append(usage["percent"])
         
-        AggregatedMetric.objects.update_or_create(
+        return AggregatedMetric(
             server=server,
             aggregation_type=agg_type,
             timestamp=timestamp,
-            defaults={
-                "cpu_avg": sum(cpu_values) / len(cpu_values) if cpu_values else None,
-                "cpu_min": min(cpu_values) if cpu_values else None,
-                "cpu_max": max(cpu_values) if cpu_values else None,
-                "memory_avg": sum(memory_values) / len(memory_values) if memory_values else None,
-                "memory_min": min(memory_values) if memory_values else None,
-                "memory_max": max(memory_values) if memory_values else None,
-                "disk_avg": sum(disk_values) / len(disk_values) if disk_values else None,
-                "disk_min": min(disk_values) if disk_values else None,
-                "disk_max": max(disk_values) if disk_values else None,
-                "metric_count": len(metrics),
-            }
+            cpu_avg=sum(cpu_values) / len(cpu_values) if cpu_values else None,
+            cpu_min=min(cpu_values) if cpu_values else None,
+            cpu_max=max(cpu_values) if cpu_values else None,
+            memory_avg=sum(memory_values) / len(memory_values) if memory_values else None,
+            memory_min=min(memory_values) if memory_values else None,
+            memory_max=max(memory_values) if memory_values else None,
+            disk_avg=sum(disk_values) / len(disk_values) if disk_values else None,
+            disk_min=min(disk_values) if disk_values else None,
+            disk_max=max(disk_values) if disk_values else None,
+            metric_count=len(metrics),
         )
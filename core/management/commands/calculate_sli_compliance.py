@@ -11,13 +11,17 @@ Usage:
 """
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
 from core.models import Server, SLIConfig, SLOConfig, SLIMeasurement
 from core.sli_utils import (
-    calculate_sli_value, get_slo_config, check_compliance
+    bulk_calculate_sli_values, check_compliance, get_slo_config_map, resolve_slo_config
 )
 
+# Rows per INSERT statement when flushing measurements
+MEASUREMENT_BATCH_SIZE = 500
+
 
 class Command(BaseCommand):
     help = "Calculate SLI values and compliance status for all servers"
@@ -42,6 +46,21 @@ class Command(BaseCommand):
             help='Calculate SLI for specific metric type only',
         )
 
+    def _window_start(self, sli_config, slo_map, server, now):
+        """Start of the SLI window (SLO config override if available)."""
+        window_days = sli_config.time_window_days
+        slo_config = resolve_slo_config(slo_map, server, sli_config.metric_type)
+        if slo_config and slo_config.time_window_days:
+            window_days = slo_config.time_window_days
+        return now - timedelta(days=window_days)
+
+    def _flush(self, measurements):
+        """Write the queued measurements and empty the queue."""
+        if measurements:
+            with transaction.atomic():
+                SLIMeasurement.objects.bulk_create(measurements, batch_size=MEASUREMENT_BATCH_SIZE)
+            measurements.clear()
+
     def handle(self, *args, **options):
         time_window_days = options['time_window_days']
         server_id = options.get('server_id')
@@ -58,7 +77,9 @@ class Command(BaseCommand):
         if metric_type:
             sli_configs = sli_configs.filter(metric_type=metric_type)
         
-        if not sli_configs.exists():
+        # Materialize once: re-iterated for every server below
+        sli_configs = list(sli_configs)
+        if not sli_configs:
             self.stdout.write(self.style.WARNING("No enabled SLI configurations found."))
             return
         
@@ -67,52 +88,68 @@ class Command(BaseCommand):
         if server_id:
             servers = servers.filter(id=server_id)
         
-        if not servers.exists():
+        servers = list(servers)
+        if not servers:
             self.stdout.write(self.style.WARNING("No servers found."))
             return
         
-        total_calculated = 0
+        # One query for every applicable SLO instead of one (or two) per server/metric pair
+        slo_map = get_slo_config_map(servers, [c.metric_type for c in sli_configs])
+        
+        # SLI values per metric type with one grouped query per distinct window
+        # (servers sharing a window are aggregated together) instead of one per pair
+        sli_values = {}
+        for sli_config in sli_configs:
+            servers_by_window = {}
+            for server in servers:
+                window_start = self._window_start(sli_config, slo_map, server, now)
+                servers_by_window.setdefault(window_start, []).append(server)
+            for window_start, window_servers in servers_by_window.items():
+                values = bulk_calculate_sli_values(
+                    window_servers, sli_config.metric_type, window_start, now
+                )
+                for server_id, value in values.items():
+                    sli_values[(server_id, sli_config.metric_type)] = value
+        
+        measurements = []
         total_compliant = 0
         total_non_compliant = 0
         errors = 0
         
+        # Styled labels are the same on every line: render them once. Each server's
+        # block is buffered and written with a single stdout.write.
+        skipped_label = self.style.WARNING('SKIPPED')
+        compliant_label = self.style.SUCCESS('COMPLIANT')
+        non_compliant_label = self.style.ERROR('NON-COMPLIANT')
+        
         for server in servers:
-            self.stdout.write(f"Processing server: {server.name} ({server.id})")
+            lines = [f"Processing server: {server.name} ({server.id})"]
             
             for sli_config in sli_configs:
                 metric_type = sli_config.metric_type
                 
-                # Get time window (use SLO config override if available)
-                window_days = sli_config.time_window_days
-                slo_config = get_slo_config(server, metric_type)
-                if slo_config and slo_config.time_window_days:
-                    window_days = slo_config.time_window_days
-                
-                window_start = now - timedelta(days=window_days)
+                slo_config = resolve_slo_config(slo_map, server, metric_type)
+                window_start = self._window_start(sli_config, slo_map, server, now)
                 
                 try:
-                    # Calculate SLI value
-                    sli_value = calculate_sli_value(server, metric_type, window_start, now)
+                    # SLI value precomputed above
+                    sli_value = sli_values.get((server.id, metric_type))
 
                     # No data for this metric in the window -> don't fabricate a measurement.
                     if sli_value is None:
-                        self.stdout.write(
-                            f"  {self.style.WARNING('SKIPPED')} {metric_type} - no data in window"
-                        )
+                        lines.append(f"  {skipped_label} {metric_type} - no data in window")
                         continue
 
                     # Get SLO config for compliance check
                     if not slo_config:
-                        self.stdout.write(
-                            f"  {self.style.WARNING('SKIPPED')} {metric_type} - No SLO config found"
-                        )
+                        lines.append(f"  {skipped_label} {metric_type} - No SLO config found")
                         continue
                     
                     # Check compliance
                     is_compliant, compliance_percentage = check_compliance(sli_value, slo_config)
                     
-                    # Store measurement
-                    SLIMeasurement.objects.create(
+                    # Queue measurement; written in bulk INSERTs of MEASUREMENT_BATCH_SIZE
+                    measurements.append(SLIMeasurement(
                         server=server,
                         metric_type=metric_type,
                         time_window_start=window_start,
@@ -122,17 +159,15 @@ class Command(BaseCommand):
                         is_compliant=is_compliant,
                         compliance_percentage=compliance_percentage,
                         calculated_at=now
-                    )
+                    ))
                     
-                    total_calculated += 1
                     if is_compliant:
                         total_compliant += 1
-                        status = self.style.SUCCESS('COMPLIANT')
+                        status = compliant_label
                     else:
                         total_non_compliant += 1
-                        status = self.style.ERROR('NON-COMPLIANT')
-                    
-                    self.stdout.write(
+                        status = non_compliant_label
+                    lines.append(
                         f"  {status} {metric_type}: SLI={sli_value}, "
                         f"Target={slo_config.target_value}, Compliance={compliance_percentage}%"
                     )
@@ -145,12 +180,19 @@ class Command(BaseCommand):
                         )
                     )
             
-            self.stdout.write("")
+            lines.append("")
+            self.stdout.write("\n".join(lines))
+            
+            # Flush at server boundaries so the pending list stays bounded on large fleets
+            if len(measurements) >= MEASUREMENT_BATCH_SIZE:
+                self._flush(measurements)
+        
+        self._flush(measurements)
         
         # Summary
         self.stdout.write("=" * 60)
         self.stdout.write(f"Summary:")
-        self.stdout.write(f"  {self.style.SUCCESS('Calculated')}: {total_calculated}")
+        self.stdout.write(f"  {self.style.SUCCESS('Calculated')}: {total_compliant + total_non_compliant}")
         self.stdout.write(f"  {self.style.SUCCESS('Compliant')}: {total_compliant}")
         self.stdout.write(f"  {self.style.ERROR('Non-Compliant')}: {total_non_compliant}")
         self.stdout.write(f"  {self.style.ERROR('Errors')}: {errors}")
@@ -46,29 +46,16 @@ class Command(BaseCommand):
         self.stdout.write(f"Checking heartbeats (warn threshold: {warn_seconds}s)...")
         self.stdout.write("")
         
-        for server in servers:
-            try:
-                heartbeat = ServerHeartbeat.objects.get(server=server)
-                time_diff = now - heartbeat.last_heartbeat
-                time_diff_seconds = time_diff.total_seconds()
-                
-                if time_diff_seconds <= warn_seconds:
-                    status = "ONLINE"
-                    status_style = self.style.SUCCESS
-                    online_count += 1
-                else:
-                    status = "OFFLINE"
-                    status_style = self.style.ERROR
-                    offline_count += 1
-                
-                if verbose or time_diff_seconds > warn_seconds:
-                    self.stdout.write(
-                        f"{status_style(status)} {server.name} (ID: {server.id}) - "
-                        f"Last heartbeat: {heartbeat.last_heartbeat.strftime('%Y-%m-%d %H:%M:%S')} "
-                        f"({int(time_diff_seconds)}s ago)"
-                    )
-                    
-            except ServerHeartbeat.DoesNotExist:
+        # One query for every heartbeat (unique per server) instead of a .get() per server
+        heartbeats = {
+            hb.server_id: hb
+            for hb in ServerHeartbeat.objects.filter(server__in=servers)
+        }
+        
+        # Stream servers in chunks rather than caching the whole fleet on the queryset
+        for server in servers.iterator(chunk_size=200):
+            heartbeat = heartbeats.get(server.id)
+            if heartbeat is None:
                 status = "NO HEARTBEAT"
                 status_style = self.style.WARNING
                 no_heartbeat_count += 1
@@ -79,6 +66,26 @@ class Command(BaseCommand):
                         f"{status_style(status)} {server.name} (ID: {server.id}) - "
                         "No heartbeat record found"
                     )
+                continue
+            
+            time_diff = now - heartbeat.last_heartbeat
+            time_diff_seconds = time_diff.total_seconds()
+            
+            if time_diff_seconds <= warn_seconds:
+                status = "ONLINE"
+                status_style = self.style.SUCCESS
+                online_count += 1
+            else:
+                status = "OFFLINE"
+                status_style = self.style.ERROR
+                offline_count += 1
+            
+            if verbose or time_diff_seconds > warn_seconds:
+                self.stdout.write(
+                    f"{status_style(status)} {server.name} (ID: {server.id}) - "
+                    f"Last heartbeat: {heartbeat.last_heartbeat.strftime('%Y-%m-%d %H:%M:%S')} "
+                    f"({int(time_diff_seconds)}s ago)"
+                )
         
         # Summary
         self.stdout.write("")
@@ -87,7 +94,7 @@ class Command(BaseCommand):
         self.stdout.write(f"  {self.style.SUCCESS('Online')}: {online_count}")
         self.stdout.write(f"  {self.style.ERROR('Offline')}: {offline_count}")
         self.stdout.write(f"  {self.style.WARNING('No Heartbeat')}: {no_heartbeat_count}")
-        self.stdout.write(f"  Total Servers: {servers.count()}")
+        self.stdout.write(f"  Total Servers: {online_count + offline_count}")
         self.stdout.write("=" * 60)
         
         # Exit with error code if any servers are offline
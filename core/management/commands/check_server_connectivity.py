@@ -16,8 +16,10 @@ Usage:
 from datetime import timedelta
 
 from django.core.management.base import BaseCommand
+from django.db.models import OuterRef, Subquery
 from django.utils import timezone
 
+from core.alert_delivery import deliver
 from core.models import Server, ServerHeartbeat, AlertHistory
 
 
@@ -38,14 +40,26 @@ class Command(BaseCommand):
         now = timezone.now()
         down_alerts = resolved_alerts = 0
 
-        servers = Server.objects.select_related("monitoring_config").all()
-        for server in servers:
-            config = getattr(server, "monitoring_config", None)
-            # Skip servers that aren't actively monitored.
-            if not config or not config.enabled or config.monitoring_suspended:
-                continue
-
-            hb = ServerHeartbeat.objects.filter(server=server).first()
+        # State marker: the most recent CONNECTION event per server, resolved in the
+        # server query itself. If it's 'triggered', the server is currently in an
+        # alerted-down state.
+        last_conn_status = (AlertHistory.objects
+                            .filter(server=OuterRef("pk"), alert_type="CONNECTION")
+                            .order_by("-sent_at")
+                            .values("status")[:1])
+        # Only actively monitored servers (config present, enabled, not suspended);
+        # the rest are filtered out in SQL rather than hydrated and skipped.
+        servers = (Server.objects.select_related("monitoring_config")
+                   .filter(monitoring_config__enabled=True,
+                           monitoring_config__monitoring_suspended=False)
+                   .annotate(last_conn_status=Subquery(last_conn_status)))
+        # Heartbeats are unique per server: load them in one query rather than one per server.
+        heartbeats = {hb.server_id: hb for hb in ServerHeartbeat.objects.all()}
+        # Transitions are decided and recorded here; only the email/Slack sends go to
+        # the shared alert delivery pool, so one slow mail server doesn't hold up every
+        # other alert.
+        for server in servers.iterator(chunk_size=200):
+            hb = heartbeats.get(server.id)
             if hb is None:
                 # Never reported a heartbeat -> agent not installed yet; don't alert.
                 continue
@@ -53,21 +67,15 @@ class Command(BaseCommand):
             age = (now - hb.last_heartbeat).total_seconds()
             is_down = age > threshold
 
-            # State marker: the most recent CONNECTION event. If it's 'triggered',
-            # the server is currently in an alerted-down state.
-            last_conn = (AlertHistory.objects
-                         .filter(server=server, alert_type="CONNECTION")
-                         .order_by("-sent_at")
-                         .first())
-            currently_alerted_down = bool(last_conn and last_conn.status == "triggered")
+            currently_alerted_down = server.last_conn_status == "triggered"
 
             if is_down and not currently_alerted_down:
-                _send_connection_alert(server, "offline")
+                _send_connection_alert(server, "offline", deliver=deliver)
                 down_alerts += 1
                 self.stdout.write(self.style.WARNING(
                     f"DOWN: {server.name} (no heartbeat for {int(age)}s)"))
             elif not is_down and currently_alerted_down:
-                _send_connection_alert(server, "online")
+                _send_connection_alert(server, "online", deliver=deliver)
                 resolved_alerts += 1
                 self.stdout.write(self.style.SUCCESS(f"RESOLVED: {server.name}"))
 
@@ -8,9 +8,10 @@ Usage:
 """
 
 from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
 from django.utils import timezone
-from core.models import Server, Service
-from core.service_latency import collect_all_service_latencies
+from core.models import Server
+from core.service_latency import collect_service_latencies, monitored_latency_services
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,76 +36,70 @@ class Command(BaseCommand):
         server_id = options.get('server')
         verbose = options.get('verbose', False)
         
-        # Get servers with monitoring enabled
+        # Get servers with monitoring enabled and not suspended, with their probe targets
+        # prefetched (one query for all services instead of a count + re-query per server)
+        servers = Server.objects.filter(
+            monitoring_config__enabled=True,
+            monitoring_config__monitoring_suspended=False,
+        ).select_related('monitoring_config').prefetch_related(
+            Prefetch('services', queryset=monitored_latency_services(), to_attr='latency_services')
+        )
         if server_id:
-            servers = Server.objects.filter(
-                id=server_id,
-                monitoring_config__enabled=True
-            ).select_related('monitoring_config')
-        else:
-            servers = Server.objects.filter(
-                monitoring_config__enabled=True
-            ).select_related('monitoring_config')
+            servers = servers.filter(id=server_id)
+        servers = list(servers)
         
-        if not servers.exists():
-            self.stdout.write(self.style.WARNING("No servers with monitoring enabled found."))
+        if not servers:
+            self.stdout.write(self.style.WARNING("No servers with active monitoring found."))
             return
         
         total_measurements = 0
         successful_measurements = 0
         failed_measurements = 0
         
+        probed_servers = []
         for server in servers:
-            try:
-                # Skip if monitoring is suspended
-                if server.monitoring_config.monitoring_suspended:
-                    if verbose:
-                        self.stdout.write(f"Skipping {server.name} - monitoring suspended")
-                    continue
-                
-                # Check if server has any monitored services
-                monitored_count = Service.objects.filter(
-                    server=server,
-                    monitoring_enabled=True,
-                    port__isnull=False
-                ).exclude(port=0).count()
-                
-                if monitored_count == 0:
-                    if verbose:
-                        self.stdout.write(f"Skipping {server.name} - no monitored services")
-                    continue
-                
+            # Check if server has any monitored services
+            if not server.latency_services:
                 if verbose:
-                    self.stdout.write(f"Collecting latency for {server.name} ({monitored_count} services)...")
-                
-                # Collect latencies
-                results = collect_all_service_latencies(server)
-                
-                for result in results:
-                    total_measurements += 1
-                    if result.get('result', {}).get('success'):
-                        successful_measurements += 1
-                        latency = result['result'].get('latency_ms', 0)
-                        if verbose:
-                            self.stdout.write(
-                                self.style.SUCCESS(
-                                    f"  ✓ {result['service_name']} (:{result['port']}) - {latency:.2f}ms"
-                                )
+                    self.stdout.write(f"Skipping {server.name} - no monitored services")
+                continue
+            
+            probed_servers.append(server)
+        
+        # Probe every (server, service) pair across the fleet on one thread pool
+        results = collect_service_latencies(
+            (server, service) for server in probed_servers for service in server.latency_services
+        )
+        results_by_server = {}
+        for result in results:
+            results_by_server.setdefault(result['server_id'], []).append(result)
+        
+        for server in probed_servers:
+            if verbose:
+                self.stdout.write(
+                    f"Collecting latency for {server.name} ({len(server.latency_services)} services)..."
+                )
+            
+            for result in results_by_server.get(server.id, []):
+                total_measurements += 1
+                if (result.get('result') or {}).get('success'):
+                    successful_measurements += 1
+                    latency = result['result'].get('latency_ms', 0)
+                    if verbose:
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f"  ✓ {result['service_name']} (:{result['port']}) - {latency:.2f}ms"
                             )
-                    else:
-                        failed_measurements += 1
-                        error = result.get('result', {}).get('error_message', 'Unknown error')
-                        if verbose:
-                            self.stdout.write(
-                                self.style.WARNING(
-                                    f"  ✗ {result['service_name']} (:{result['port']}) - {error}"
-                                )
+                        )
+                else:
+                    failed_measurements += 1
+                    error = (result.get('result') or {}).get('error_message', 'Unknown error')
+                    if verbose:
+                        self.stdout.write(
+                            self.style.WARNING(
+                                f"  ✗ {result['service_name']} (:{result['port']}) - {error}"
                             )
-                
-            except Exception as e:
-                self.stderr.write(
-                    self.style.ERROR(f"Error collecting latency for {server.name}: {e}")
-                )
+                        )
         
         # Summary
         if total_measurements > 0:
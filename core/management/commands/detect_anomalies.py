@@ -1,12 +1,38 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
 from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
-from datetime import timedelta
 from core.models import SystemMetric, Anomaly, MonitoringConfig, EmailAlertConfig, SlackAlertConfig
-from core.views import _send_alert_email, _send_slack_alert
+from core.views import _open_alert_smtp, _send_alert_email, _send_slack_alert
 from core import alert_routing
 from core.anomaly_detector import AnomalyDetector
 from core.llm_analyzer import OllamaAnalyzer
 
+# Rows per INSERT/UPDATE statement when writing a run's anomalies
+ANOMALY_BATCH_SIZE = 500
+# Concurrent LLM explanation requests
+LLM_EXPLAIN_WORKERS = 4
+
+
+def _smtp_usable(smtp):
+    """Whether an open alert SMTP session still answers (False for None or a dropped one)."""
+    if smtp is None:
+        return False
+    try:
+        return smtp.noop()[0] == 250
+    except Exception:
+        return False
+
+
+def _quit_quietly(smtp):
+    try:
+        smtp.quit()
+    except Exception:
+        pass
+
 
 class Command(BaseCommand):
     help = "Detects anomalies in collected metrics using ADTK/IsolationForest and generates LLM explanations"
@@ -18,31 +44,149 @@ class Command(BaseCommand):
         open_anoms = (Anomaly.objects
                       .filter(recovered_at__isnull=True, timestamp__gte=cutoff)
                       .select_related("server"))
-        marked = 0
+        marked = []
         for a in open_anoms:
             rec = back_to_normal_at(a)
             if rec:
                 a.recovered_at = rec
-                a.save(update_fields=["recovered_at"])
-                marked += 1
+                marked.append(a)
         if marked:
-            self.stdout.write(f"Marked {marked} anomaly(ies) back-to-normal.")
+            # One UPDATE batch (one commit) instead of a save() per anomaly.
+            Anomaly.objects.bulk_update(marked, ["recovered_at"], batch_size=ANOMALY_BATCH_SIZE)
+            self.stdout.write(f"Marked {len(marked)} anomaly(ies) back-to-normal.")
+
+    def _explain(self, llm_analyzer, anomaly):
+        """Set an LLM explanation on the anomaly (not saved); True if one was set."""
+        metric = anomaly.metric
+        try:
+            # Multi-tier process context collection
+            process_context = None
+            
+            # Tier 1: Use pre-collected process data from metric
+            if metric.top_processes:
+                process_context = metric.top_processes
+                metric_type = anomaly.metric_type
+                
+                # Extract relevant processes for this anomaly type
+                relevant_processes = []
+                if metric_type == 'cpu' and process_context.get('cpu'):
+                    relevant_processes = process_context.get('cpu', [])
+                elif metric_type == 'memory' and process_context.get('memory'):
+                    relevant_processes = process_context.get('memory', [])
+                
+                # Build process context with only relevant processes
+                if relevant_processes:
+                    process_context = {
+                        'cpu': relevant_processes if metric_type == 'cpu' else [],
+                        'memory': relevant_processes if metric_type == 'memory' else []
+                    }
+                else:
+                    process_context = None  # No relevant processes found
+            
+            # (On-demand SSH process collection removed — Tier 1 pre-collected
+            # data only; no outbound connection to the monitored server.)
+
+            # Generate explanation with or without process context
+            explanation = llm_analyzer.explain_anomaly(
+                metric_type=anomaly.metric_type,
+                metric_name=anomaly.metric_name,
+                metric_value=anomaly.metric_value,
+                server_name=anomaly.server.name,
+                process_context=process_context  # Can be None
+            )
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"Failed to generate LLM explanation: {e}"))
+            return False
+        if not explanation:
+            return False
+        anomaly.explanation = explanation
+        anomaly.llm_generated = True
+        return True
+
+    def _send_alerts(self, alerts_by_server, verbosity):
+        """Send the run's HIGH/CRITICAL anomaly alerts: one email and one Slack message
+        per server, with all of the emails sent over a single SMTP session."""
+        # Suppression is read now, after detection, so a mute set mid-run is honoured.
+        muted = set(
+            MonitoringConfig.objects.filter(server_id__in=alerts_by_server)
+            .filter(Q(monitoring_suspended=True) | Q(alert_suppressed=True))
+            .values_list("server_id", flat=True)
+        )
+        notify = [(server, alerts) for server_id, (server, alerts) in alerts_by_server.items()
+                  if server_id not in muted]
+        if not notify:
+            return
+
+        email_config = EmailAlertConfig.objects.filter(enabled=True).first()
+        if email_config and alert_routing.recipients_for("resource", "HIGH"):
+            smtp = None
+            try:
+                smtp = _open_alert_smtp(email_config)
+                for server, anomaly_alerts in notify:
+                    try:
+                        try:
+                            _send_alert_email(email_config, server, anomaly_alerts, smtp=smtp)
+                        except Exception:
+                            if _smtp_usable(smtp):
+                                raise
+                            # The session dropped (idle cut, timeout): reconnect and retry
+                            # this server once so the rest of the burst isn't lost with it.
+                            _quit_quietly(smtp)
+                            smtp = None
+                            smtp = _open_alert_smtp(email_config)
+                            _send_alert_email(email_config, server, anomaly_alerts, smtp=smtp)
+                        if verbosity >= 2:
+                            self.stdout.write(
+                                self.style.SUCCESS(f"✓ Sent anomaly alert email for {server.name}")
+                            )
+                    except Exception as e:
+                        self.stdout.write(self.style.WARNING(f"Failed to send anomaly alert: {e}"))
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"Failed to send anomaly alert: {e}"))
+            finally:
+                if smtp is not None:
+                    _quit_quietly(smtp)
+
+        # Send Slack alert (anomalies are a Resource alert at HIGH).
+        slack_config = SlackAlertConfig.objects.filter(enabled=True).first()
+        if slack_config and alert_routing.slack_should_send("resource", "HIGH"):
+            for server, anomaly_alerts in notify:
+                try:
+                    _send_slack_alert(
+                        slack_config.webhook_url,
+                        server,
+                        anomaly_alerts,
+                        username=slack_config.username,
+                        icon_emoji=slack_config.icon_emoji,
+                        channel=slack_config.channel
+                    )
+                    if verbosity >= 2:
+                        self.stdout.write(
+                            self.style.SUCCESS(f"✓ Sent anomaly alert to Slack for {server.name}")
+                        )
+                except Exception as e:
+                    self.stdout.write(self.style.WARNING(f"Failed to send anomaly alert: {e}"))
 
     def handle(self, *args, **options):
+        # Per-duplicate and per-notification lines are detail (verbosity >= 2); at the
+        # scheduler's default verbosity a run writes its findings plus one summary line.
+        verbosity = options.get("verbosity", 1)
+        started = time.monotonic()
+
         # Record when already-open anomalies returned to normal (true incident
         # window), independent of admin acknowledgement. Runs every invocation.
         self._mark_recoveries()
 
         since = timezone.now() - timedelta(hours=1)
 
-        latest_metrics = SystemMetric.objects.filter(
-            timestamp__gte=since
-        ).select_related("server", "server__monitoring_config").order_by("-timestamp")
-        
-        metrics_to_check = []
-        for metric in latest_metrics:
-            if not metric.anomalies.exists():
-                metrics_to_check.append(metric)
+        # Metrics that already produced an anomaly are filtered out in SQL (NOT EXISTS)
+        # rather than with one .exists() query per metric.
+        metrics_to_check = list(
+            SystemMetric.objects.filter(timestamp__gte=since)
+            .filter(~Exists(Anomaly.objects.filter(metric=OuterRef("pk"))))
+            .select_related("server", "server__monitoring_config")
+            .order_by("-timestamp")
+        )
         
         if not metrics_to_check:
             self.stdout.write("No new metrics to check for anomalies.")
@@ -56,7 +200,25 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(self.style.WARNING(f"LLM analyzer not available: {e}"))
         
+        # Open anomalies inside the dedup window, loaded once for the whole run instead of
+        # one lookup per detected anomaly: (server_id, metric_type, metric_name) -> newest id.
+        # Anomalies queued below are added as we go.
+        recent_window = timezone.now() - timedelta(minutes=10)
+        open_recent = {
+            (server_id, metric_type, metric_name): anomaly_id
+            for server_id, metric_type, metric_name, anomaly_id in (
+                Anomaly.objects.filter(resolved=False, timestamp__gte=recent_window)
+                .order_by("timestamp")
+                .values_list("server_id", "metric_type", "metric_name", "id")
+            )
+        }
+
         anomaly_count = 0
+        duplicates_skipped = 0
+        # New anomalies are queued here and written with one bulk INSERT after detection;
+        # alerts (server_id -> (server, alert list)) and LLM explanations follow once rows exist.
+        pending = []
+        alerts_by_server = {}
         for metric in metrics_to_check:
             config = getattr(metric.server, "monitoring_config", None)
             if not config or not config.enabled:
@@ -69,37 +231,37 @@ class Command(BaseCommand):
                 detector = AnomalyDetector(metric.server, config)
                 detected = detector.detect_anomalies(metric)
                 
-                # Collect anomalies for this metric to send in one email
+                # Alertable anomalies for this metric; merged into one email per server
                 anomaly_alerts = []
                 
                 for anomaly_data in detected:
                     # Deduplication: Check if there's already an unresolved anomaly of the same type
                     # within the last 10 minutes to avoid creating multiple anomalies for the same spike
-                    recent_window = timezone.now() - timedelta(minutes=10)
-                    existing_anomaly = Anomaly.objects.filter(
-                        server=metric.server,
-                        metric_type=anomaly_data['metric_type'],
-                        metric_name=anomaly_data['metric_name'],
-                        resolved=False,
-                        timestamp__gte=recent_window
-                    ).order_by('-timestamp').first()
+                    dedup_key = (metric.server_id, anomaly_data['metric_type'], anomaly_data['metric_name'])
+                    existing = open_recent.get(dedup_key)  # stored id, or an anomaly queued this run
                     
-                    if existing_anomaly:
+                    if existing:
                         # Skip creating duplicate anomaly - one already exists for this spike
-                        self.stdout.write(
-                            self.style.WARNING(
-                                f"⚠ Skipping duplicate anomaly: {metric.server.name} - "
-                                f"{anomaly_data['metric_type']} {anomaly_data['metric_name']} "
-                                f"(existing anomaly ID: {existing_anomaly.id})"
+                        duplicates_skipped += 1
+                        if verbosity >= 2:
+                            seen = (f"existing anomaly ID: {existing}" if isinstance(existing, int)
+                                    else "recorded earlier in this run")
+                            self.stdout.write(
+                                self.style.WARNING(
+                                    f"⚠ Skipping duplicate anomaly: {metric.server.name} - "
+                                    f"{anomaly_data['metric_type']} {anomaly_data['metric_name']} "
+                                    f"({seen})"
+                                )
                             )
-                        )
                         continue
                     
-                    anomaly = Anomaly.objects.create(
+                    anomaly = Anomaly(
                         server=metric.server,
                         metric=metric,
                         **anomaly_data
                     )
+                    pending.append(anomaly)
+                    open_recent[dedup_key] = anomaly
                     anomaly_count += 1
                     
                     # Add to alerts list for email notification
@@ -111,51 +273,6 @@ class Command(BaseCommand):
                             'message': f"Anomaly detected: {anomaly_data['metric_type']} {anomaly_data['metric_name']} = {anomaly_data['metric_value']:.2f} (severity: {anomaly_data['severity']})"
                         })
                     
-                    # Always generate LLM explanation if enabled
-                    if config.use_llm_explanation and llm_analyzer:
-                        try:
-                            # Multi-tier process context collection
-                            process_context = None
-                            
-                            # Tier 1: Use pre-collected process data from metric
-                            if metric.top_processes:
-                                process_context = metric.top_processes
-                                metric_type = anomaly_data["metric_type"]
-                                
-                                # Extract relevant processes for this anomaly type
-                                relevant_processes = []
-                                if metric_type == 'cpu' and process_context.get('cpu'):
-                                    relevant_processes = process_context.get('cpu', [])
-                                elif metric_type == 'memory' and process_context.get('memory'):
-                                    relevant_processes = process_context.get('memory', [])
-                                
-                                # Build process context with only relevant processes
-                                if relevant_processes:
-                                    process_context = {
-                                        'cpu': relevant_processes if metric_type == 'cpu' else [],
-                                        'memory': relevant_processes if metric_type == 'memory' else []
-                                    }
-                                else:
-                                    process_context = None  # No relevant processes found
-                            
-                            # (On-demand SSH process collection removed — Tier 1 pre-collected
-                            # data only; no outbound connection to the monitored server.)
-
-                            # Generate explanation with or without process context
-                            explanation = llm_analyzer.explain_anomaly(
-                                metric_type=anomaly_data["metric_type"],
-                                metric_name=anomaly_data["metric_name"],
-                                metric_value=anomaly_data["metric_value"],
-                                server_name=metric.server.name,
-                                process_context=process_context  # Can be None
-                            )
-                            if explanation:
-                                anomaly.explanation = explanation
-                                anomaly.llm_generated = True
-                                anomaly.save()
-                        except Exception as e:
-                            self.stdout.write(self.style.WARNING(f"Failed to generate LLM explanation: {e}"))
-                    
                     self.stdout.write(
                         self.style.WARNING(
                             f"⚠ Anomaly detected: {metric.server.name} - "
@@ -164,47 +281,36 @@ class Command(BaseCommand):
                         )
                     )
                 
-                # Send email and Slack alerts for HIGH/CRITICAL anomalies
                 if anomaly_alerts:
-                    try:
-                        # Refresh server to check if alerts are suppressed
-                        metric.server.refresh_from_db()
-                        server_config = metric.server.monitoring_config
-                        if (not server_config.monitoring_suspended and 
-                            not server_config.alert_suppressed):
-                            
-                            # Send email alert
-                            email_config = EmailAlertConfig.objects.filter(enabled=True).first()
-                            if email_config:
-                                _send_alert_email(email_config, metric.server, anomaly_alerts)
-                                self.stdout.write(
-                                    self.style.SUCCESS(
-                                        f"✓ Sent anomaly alert email for {metric.server.name}"
-                                    )
-                                )
-                            
-                            # Send Slack alert (anomalies are a Resource alert at HIGH).
-                            slack_config = SlackAlertConfig.objects.filter(enabled=True).first()
-                            if slack_config and alert_routing.slack_should_send("resource", "HIGH"):
-                                _send_slack_alert(
-                                    slack_config.webhook_url,
-                                    metric.server,
-                                    anomaly_alerts,
-                                    username=slack_config.username,
-                                    icon_emoji=slack_config.icon_emoji,
-                                    channel=slack_config.channel
-                                )
-                                self.stdout.write(
-                                    self.style.SUCCESS(
-                                        f"✓ Sent anomaly alert to Slack for {metric.server.name}"
-                                    )
-                                )
-                    except Exception as e:
-                        self.stdout.write(self.style.WARNING(f"Failed to send anomaly alert: {e}"))
+                    alerts_by_server.setdefault(
+                        metric.server_id, (metric.server, [])
+                    )[1].extend(anomaly_alerts)
             except Exception as e:
                 self.stderr.write(self.style.ERROR(f"Error detecting anomalies for {metric.server.name}: {e}"))
         
+        if pending:
+            Anomaly.objects.bulk_create(pending, batch_size=ANOMALY_BATCH_SIZE)
+        
+        if alerts_by_server:
+            self._send_alerts(alerts_by_server, verbosity)
+        
+        # Always generate LLM explanation if enabled. Calls run LLM_EXPLAIN_WORKERS at a
+        # time (each blocks on inference; _explain touches no DB) and are written back in
+        # one bulk UPDATE.
+        wanted = [a for a in pending if a.server.monitoring_config.use_llm_explanation]
+        if llm_analyzer and wanted:
+            with ThreadPoolExecutor(max_workers=LLM_EXPLAIN_WORKERS) as pool:
+                done = list(pool.map(lambda a: self._explain(llm_analyzer, a), wanted))
+            explained = [a for a, ok in zip(wanted, done) if ok]
+            if explained:
+                Anomaly.objects.bulk_update(
+                    explained, ["explanation", "llm_generated"], batch_size=ANOMALY_BATCH_SIZE
+                )
+        
+        elapsed = time.monotonic() - started
+        skipped = f", {duplicates_skipped} duplicate(s) skipped" if duplicates_skipped else ""
         if anomaly_count > 0:
-            self.stdout.write(self.style.SUCCESS(f"✓ Detected {anomaly_count} anomaly/anomalies"))
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ Detected {anomaly_count} anomaly/anomalies{skipped} in {elapsed:.1f}s"))
         else:
-            self.stdout.write("✓ No anomalies detected")
+            self.stdout.write(f"✓ No anomalies detected{skipped} in {elapsed:.1f}s")
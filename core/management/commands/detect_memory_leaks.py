@@ -5,11 +5,15 @@ memory) for each monitored server and record them as Anomaly rows.
 Runs on a slow cadence (hourly is plenty -- leaks evolve over hours/days). All trend
 math is server-side; the agent only reports raw stats. Findings are deduplicated over
 a 24h window so a persistent leak doesn't spam a new anomaly every run.
+
+The latest metric id and the open leak findings are read for all servers up front, so
+the per-server loop only runs detect_leaks itself.
 """
 
 from datetime import timedelta
 
 from django.core.management.base import BaseCommand
+from django.db.models import OuterRef, Subquery
 from django.utils import timezone
 
 from core.models import Server, SystemMetric, Anomaly
@@ -22,16 +26,22 @@ class Command(BaseCommand):
     help = "Detect memory / shared-memory / semaphore leaks and record them as anomalies."
 
     def handle(self, *args, **options):
-        servers = Server.objects.select_related("monitoring_config").all()
+        # Servers with monitoring enabled and anomaly detection not switched off.
+        servers = (Server.objects
+                   .filter(monitoring_config__enabled=True)
+                   .exclude(monitoring_config__anomaly_sensitivity="OFF")
+                   .annotate(latest_metric_id=Subquery(
+                       SystemMetric.objects.filter(server=OuterRef("pk"))
+                       .order_by("-timestamp").values("id")[:1])))
+        # Dedup: one unresolved finding per (server, metric_name) per 24h.
+        recent = timezone.now() - timedelta(hours=DEDUP_HOURS)
+        open_findings = set(
+            Anomaly.objects.filter(server__in=servers, resolved=False, timestamp__gte=recent)
+            .values_list("server_id", "metric_name")
+        )
         created = 0
 
         for server in servers:
-            config = getattr(server, "monitoring_config", None)
-            if not config or not config.enabled:
-                continue
-            if getattr(config, "anomaly_sensitivity", "BALANCED") == "OFF":
-                continue
-
             try:
                 findings = detect_leaks(server)
             except Exception as e:
@@ -40,27 +50,18 @@ class Command(BaseCommand):
             if not findings:
                 continue
 
-            latest = (
-                SystemMetric.objects.filter(server=server).order_by("-timestamp").first()
-            )
-            if latest is None:
+            if server.latest_metric_id is None:
                 continue
 
-            recent = timezone.now() - timedelta(hours=DEDUP_HOURS)
             for f in findings:
-                # Dedup: one unresolved finding per (server, metric_name) per 24h.
-                if Anomaly.objects.filter(
-                    server=server,
-                    metric_name=f["metric_name"],
-                    resolved=False,
-                    timestamp__gte=recent,
-                ).exists():
+                if (server.id, f["metric_name"]) in open_findings:
                     self.stdout.write(
                         f"⚠ Skipping duplicate leak: {server.name} - {f['metric_name']}"
                     )
                     continue
 
-                Anomaly.objects.create(server=server, metric=latest, **f)
+                Anomaly.objects.create(server=server, metric_id=server.latest_metric_id, **f)
+                open_findings.add((server.id, f["metric_name"]))
                 created += 1
                 self.stdout.write(
                     self.style.WARNING(
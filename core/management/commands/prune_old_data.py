@@ -18,6 +18,7 @@ from datetime import timedelta
 import logging
 
 from django.core.management.base import BaseCommand
+from django.db import connection
 from django.utils import timezone
 
 from core.models import (
@@ -42,22 +43,72 @@ class Command(BaseCommand):
         parser.add_argument("--dry-run", action="store_true",
                             help="Report what would be deleted, without deleting.")
 
-    def _prune(self, model, field, cutoff, dry_run, extra=None):
+    def _queryset(self, model, field, cutoff, extra=None):
         flt = {f"{field}__lt": cutoff}
         if extra:
             flt.update(extra)
-        qs = model.objects.filter(**flt)
+        return model.objects.filter(**flt)
+
+    def _dry_run_counts(self, querysets):
+        """Every --dry-run count in one round-trip:
+        SELECT (SELECT COUNT(*) FROM (...)), (SELECT COUNT(*) FROM (...)), ..."""
+        parts, params = [], []
+        for i, qs in enumerate(querysets):
+            sql, qs_params = qs.order_by().values("pk").query.sql_with_params()
+            parts.append(f"(SELECT COUNT(*) FROM ({sql}) AS c{i})")
+            params.extend(qs_params)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT " + ", ".join(parts), params)
+            return list(cursor.fetchone())
+
+    def _prune(self, model, field, cutoff, dry_run, extra=None):
+        qs = self._queryset(model, field, cutoff, extra)
         if dry_run:
             return qs.count()
+        if model is SystemMetric and not extra:
+            return self._prune_metrics(field, cutoff)
         total = 0
         while True:
             ids = list(qs.values_list("pk", flat=True)[:BATCH])
             if not ids:
                 break
-            model.objects.filter(pk__in=ids).delete()
-            total += len(ids)
+            # only("pk"): models with cascades (SystemMetric -> Anomaly) can't take Django's
+            # fast-delete path, so the collector loads each row -- keep that to the PK
+            # instead of hydrating every JSON column. Count what delete() reports for this
+            # model rather than assuming every selected id was still there.
+            _, per_model = model.objects.filter(pk__in=ids).only("pk").delete()
+            total += per_model.get(model._meta.label, 0)
         return total
 
+    def _prune_metrics(self, field, cutoff):
+        """SystemMetric is by far the largest table, so it is pruned with set-based SQL:
+        each batch is a single DELETE ... WHERE pk IN (SELECT pk ... LIMIT n), with no
+        PK round-trip through Python and no collector pass."""
+        # The Anomaly FK cascade is the only thing the collector was needed for. Anomaly
+        # has no dependents of its own, so each batch is one fast
+        # DELETE ... WHERE pk IN (SELECT pk ... LIMIT n), bounded like the metric batches.
+        anomalies = Anomaly.objects.filter(**{f"metric__{field}__lt": cutoff})
+        while True:
+            deleted, _ = Anomaly.objects.filter(
+                pk__in=anomalies.values("pk")[:BATCH]).delete()
+            if deleted < BATCH:
+                break
+
+        qn = connection.ops.quote_name
+        table = qn(SystemMetric._meta.db_table)
+        pk = qn(SystemMetric._meta.pk.column)
+        ts = qn(SystemMetric._meta.get_field(field).column)
+        sql = (f"DELETE FROM {table} WHERE {pk} IN "
+               f"(SELECT {pk} FROM {table} WHERE {ts} < %s LIMIT %s)")
+        total = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [cutoff, BATCH])
+                deleted = cursor.rowcount
+            total += deleted
+            if deleted < BATCH:
+                return total
+
     def handle(self, *args, **options):
         dry = options["dry_run"]
         days = max(7, min(365, int(AppConfig.get_config().data_retention_days or 60)))
@@ -82,10 +133,25 @@ class Command(BaseCommand):
             ("AggregatedMetric(hourly)", AggregatedMetric,          "timestamp", {"aggregation_type": "hourly"}),
         ]
 
+        # Dry run: count every table in a single query (per-table counts are the fallback)
+        dry_counts = {}
+        if dry:
+            try:
+                dry_counts = dict(zip(
+                    [label for label, *_ in targets],
+                    self._dry_run_counts([self._queryset(model, field, cutoff, extra)
+                                          for _, model, field, extra in targets]),
+                ))
+            except Exception as e:
+                logger.warning("prune_old_data: combined dry-run count failed: %s", e)
+
         grand = 0
         for label, model, field, extra in targets:
             try:
-                n = self._prune(model, field, cutoff, dry, extra)
+                if label in dry_counts:
+                    n = dry_counts[label]
+                else:
+                    n = self._prune(model, field, cutoff, dry, extra)
             except Exception as e:
                 logger.error("prune_old_data: %s failed: %s", label, e)
                 self.stderr.write(self.style.ERROR(f"  {label}: error - {e}"))
@@ -13,7 +13,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from core.models import SyntheticCheck
-from core.synthetic import run_check
+from core.synthetic import run_checks
 
 
 class Command(BaseCommand):
@@ -25,20 +25,19 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         now = timezone.now()
         run_all = options.get("all")
-        checks = SyntheticCheck.objects.filter(enabled=True)
+        checks = SyntheticCheck.objects.filter(enabled=True) if run_all else SyntheticCheck.due(now)
+        due = list(checks)
 
         ran = 0
-        for check in checks:
-            if not run_all and not check.is_due(now):
+        # Probes for every due check run concurrently; results are recorded in order
+        for check, result, transition, error in run_checks(due):
+            if error is not None:  # never let one bad check stop the rest
+                self.stderr.write(f"{check.name}: error - {error}")
                 continue
-            try:
-                result, transition = run_check(check)
-                ran += 1
-                state = "OK" if result.success else "FAIL"
-                extra = f" -> {transition}" if transition else ""
-                self.stdout.write(f"{check.name}: {state}{extra}")
-            except Exception as e:  # never let one bad check stop the rest
-                self.stderr.write(f"{check.name}: error - {e}")
+            ran += 1
+            state = "OK" if result.success else "FAIL"
+            extra = f" -> {transition}" if transition else ""
+            self.stdout.write(f"{check.name}: {state}{extra}")
 
         if ran == 0:
             self.stdout.write("No synthetic checks were due.")
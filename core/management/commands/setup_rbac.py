@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from django.db.models import Q
+from django.utils import timezone
 
 from core import permissions as perms
 from core.models import Role, UserACL
@@ -19,19 +21,24 @@ class Command(BaseCommand):
 
         # Superusers -> Admin role (they also bypass via is_superuser, but keep
         # their ACL coherent). Other staff with no role -> Operator (safe default).
-        for user in User.objects.filter(is_superuser=True):
-            acl = UserACL.get_or_create_for_user(user)
-            if acl.role_id != admin_role.id:
-                acl.role = admin_role
-                acl.save(update_fields=["role", "updated_at"])
-                self.stdout.write(f"  Assigned Admin to superuser: {user.username}")
-
-        for user in User.objects.filter(is_staff=True, is_superuser=False):
-            acl = UserACL.get_or_create_for_user(user)
-            if acl.role_id is None:
-                acl.role = operator_role
-                acl.save(update_fields=["role", "updated_at"])
-                self.stdout.write(f"  Assigned Operator to staff user: {user.username}")
+        # Existing ACLs are loaded in one query; missing ones are created and changed
+        # ones updated in one statement each.
+        users = User.objects.filter(Q(is_superuser=True) | Q(is_staff=True)).order_by("pk")
+        acls = {acl.user_id: acl for acl in UserACL.objects.filter(user__in=users)}
+        new_acls, changed = [], []
+        now = timezone.now()
+        for user in users:
+            role = admin_role if user.is_superuser else operator_role
+            acl = acls.get(user.id)
+            if acl is None:
+                new_acls.append(UserACL(user=user, role=role))
+            elif acl.role_id is None or (user.is_superuser and acl.role_id != admin_role.id):
+                acl.role, acl.updated_at = role, now
+                changed.append(acl)
+                kind = "superuser" if user.is_superuser else "staff user"
+                self.stdout.write(f"  Assigned {role.name} to {kind}: {user.username}")
+        UserACL.objects.bulk_create(new_acls)
+        UserACL.objects.bulk_update(changed, ["role", "updated_at"])
 
         self.stdout.write(self.style.SUCCESS("RBAC setup complete."))
         self.stdout.write(f"  Roles: {list(Role.objects.values_list('name', flat=True))}")
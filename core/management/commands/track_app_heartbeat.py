@@ -10,18 +10,51 @@ Usage:
     python manage.py track_app_heartbeat
 """
 
+import os
+
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.core.cache import cache
 from django.conf import settings
 
-# Try to import get_app_heartbeat_timestamp, fallback to direct implementation if import fails
-try:
-    from core.utils import get_app_heartbeat_timestamp
-except ImportError:
-    # Fallback implementation
-    def get_app_heartbeat_timestamp():
-        return timezone.now().isoformat()
+APP_HEARTBEAT_KEY = "monitoring_app_heartbeat"
+
+
+def record_app_heartbeat(now=None):
+    """
+    Record that the monitoring app is currently running (cache + file).
+
+    Returns the recorded ISO timestamp string. Raises OSError if the heartbeat file
+    can't be written (the cache entry is already set by then). Long-running
+    callers like metrics_scheduler call this directly rather than going through
+    call_command on every loop.
+    """
+    # One clock read per tick: the file gets the ISO form (human-readable), the cache
+    # the epoch seconds, which every status check compares without parsing a date.
+    now = now or timezone.now()
+    heartbeat_str = now.isoformat()
+
+    # Store app heartbeat in cache (expires after 5 minutes)
+    # This way, if app goes down, we know it was down
+    cache.set(APP_HEARTBEAT_KEY, int(now.timestamp()), timeout=300)  # 5 minute expiry
+
+    # Also store in a file for persistence across restarts. Written to a temp file and
+    # renamed over the old one: truncating in place let a concurrent reader see an empty
+    # file, which _app_was_down treats as "app was down". The temp name is per process
+    # because the scheduler and the cron command can both be recording.
+    heartbeat_file = getattr(settings, "APP_HEARTBEAT_FILE", "/tmp/monitoring_app_heartbeat.txt")
+    tmp_file = f"{heartbeat_file}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, 'w') as f:
+            f.write(heartbeat_str)
+        os.replace(tmp_file, heartbeat_file)
+    except OSError:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
+    return heartbeat_str
 
 
 class Command(BaseCommand):
@@ -31,23 +64,11 @@ class Command(BaseCommand):
         """Record that the monitoring app is currently running"""
         now = timezone.now()
         
-        # Use utility function to ensure consistent timezone handling
-        heartbeat_str = get_app_heartbeat_timestamp()
-        
-        # Store app heartbeat in cache (expires after 5 minutes)
-        # This way, if app goes down, we know it was down
-        app_heartbeat_key = "monitoring_app_heartbeat"
-        cache.set(app_heartbeat_key, heartbeat_str, timeout=300)  # 5 minute expiry
-        
-        # Also store in a file for persistence across restarts
         try:
-            heartbeat_file = getattr(settings, "APP_HEARTBEAT_FILE", "/tmp/monitoring_app_heartbeat.txt")
-            with open(heartbeat_file, 'w') as f:
-                f.write(heartbeat_str)
+            record_app_heartbeat(now)
         except Exception as e:
             if options.get('verbosity', 1) >= 2:
                 self.stdout.write(self.style.WARNING(f"Could not write heartbeat file: {e}"))
         
         if options.get('verbosity', 1) >= 2:
             self.stdout.write(f"App heartbeat recorded: {now}")
-
@@ -24,13 +24,6 @@ logger = logging.getLogger("rbac")
 _SKIP_PREFIXES = ("/admin/", "/static/", "/media/")
 
 
-def _client_ip(request):
-    xff = request.META.get("HTTP_X_FORWARDED_FOR", "")
-    if xff:
-        return xff.split(",")[0].strip()
-    return request.META.get("REMOTE_ADDR")
-
-
 def _is_api(request):
     return request.path.startswith("/api/")
 
@@ -39,19 +32,20 @@ def audit_denied(request, required, user):
     """Record a denied request to the log and the AuditLog table.
 
     Under impersonation the real actor is preserved and the target recorded."""
+    from . import audit
     url_name = getattr(getattr(request, "resolver_match", None), "url_name", None)
+    ip = audit.client_ip(request)
     logger.warning(
         "RBAC DENIED actor=%s staff=%s method=%s path=%s url_name=%s required=%s ip=%s",
         getattr(user, "username", None) or "anonymous",
         getattr(user, "is_staff", False),
-        request.method, request.path, url_name, required, _client_ip(request),
+        request.method, request.path, url_name, required, ip,
     )
     real = getattr(request, "real_user", None)
     target = user if getattr(request, "impersonating", False) else None
-    from . import audit
     audit.record(real or user, f"denied:{url_name or request.path}",
                  resource=request.path, method=request.method,
-                 result=audit.DENIED, ip=_client_ip(request), target=target)
+                 result=audit.DENIED, ip=ip, target=target)
 
 
 class RBACMiddleware:
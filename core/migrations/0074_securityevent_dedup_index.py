@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0073_service_user_label'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='securityevent',
+            index=models.Index(fields=['event_type', 'status', 'source_ip', '-last_seen'], name='core_securi_event_t_7845f6_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 import hashlib
 import secrets
 import uuid
+from datetime import timedelta
 
 from django.db import models
 from django.utils import timezone
@@ -69,6 +70,7 @@ class SystemMetric(models.Model):
     # Physical disk inventory pushed by the agent (read-only lsblk/sys inventory):
     # {"physical_disk_count": N, "disks": [{name, type(SSD/HDD/NVMe), model, size, transport, rotational}],
     #  "raid_arrays": [{name, level, size}], "raid": "raid1"|"none"}
+    # Only set on samples where the agent sent it (on change, else every ~15 min).
     disk_hardware = models.JSONField(default=dict, blank=True)
 
     # Network metrics (JSON field for multiple interfaces)
@@ -1185,12 +1187,13 @@ class AgentCredential(models.Model):
         """Return the enabled credential matching a raw token, or None.
 
         The lookup is performed on the indexed hash (not the raw token), so it
-        does not leak the secret via timing.
+        does not leak the secret via timing. The server's MonitoringConfig comes along
+        in the same query: every ingest endpoint reads it (suspension, alert gates).
         """
         if not raw_token:
             return None
         try:
-            return cls.objects.select_related("server").get(
+            return cls.objects.select_related("server", "server__monitoring_config").get(
                 token_hash=cls.hash_token(raw_token),
                 enabled=True,
             )
@@ -1282,6 +1285,20 @@ class SyntheticCheck(models.Model):
             return True
         return (now - self.last_checked_at).total_seconds() >= self.interval_seconds
 
+    @classmethod
+    def due(cls, now):
+        """Enabled checks that should run as of `now` -- is_due() evaluated in SQL, so the
+        scheduler only loads the checks it is about to probe."""
+        interval = models.ExpressionWrapper(
+            models.F("interval_seconds") * timedelta(seconds=1), output_field=models.DurationField(),
+        )
+        next_run = models.ExpressionWrapper(
+            models.F("last_checked_at") + interval, output_field=models.DateTimeField(),
+        )
+        return (cls.objects.filter(enabled=True)
+                .alias(next_run=next_run)
+                .filter(models.Q(last_checked_at__isnull=True) | models.Q(next_run__lte=now)))
+
 
 class SyntheticCheckResult(models.Model):
     """A single probe result for a SyntheticCheck."""
@@ -1391,6 +1408,8 @@ class SecurityEvent(models.Model):
             models.Index(fields=["status", "-last_seen"]),
             models.Index(fields=["event_type", "-last_seen"]),
             models.Index(fields=["source_ip"]),
+            # _upsert_event's dedup lookup: equality on these, newest open row first.
+            models.Index(fields=["event_type", "status", "source_ip", "-last_seen"]),
         ]
 
     def __str__(self):
@@ -0,0 +1,55 @@
+"""Interfaces excluded from host network-throughput totals.
+
+SystemMetric.network_io holds the agent's cumulative per-NIC counters
+({"eth0": {"bytes_sent": ..., "bytes_recv": ...}, ...}). Summed as-is they
+over-count the host's real traffic:
+  - loopback (lo) -- local process-to-process traffic that never leaves the host
+  - container plumbing (docker0, veth*) -- the same bytes already counted on the
+    physical NIC, re-counted on the bridge and on each container's veth pair
+
+The anomaly detector's per-interface ceiling check skips loopback for the same reason.
+"""
+import numpy as np
+
+# An interface is excluded if its name starts with one of these prefixes.
+VIRTUAL_NIC_PREFIXES = ("lo", "docker", "veth")
+
+
+def sum_network_io(network_io):
+    """(bytes_sent, bytes_recv) summed over the host's real interfaces, in one pass.
+
+    Non-dict input (missing / malformed payload) sums to (0, 0).
+    """
+    sent = recv = 0
+    if not isinstance(network_io, dict):
+        return sent, recv
+    for name, counters in network_io.items():
+        if not isinstance(counters, dict) or str(name).startswith(VIRTUAL_NIC_PREFIXES):
+            continue
+        sent += counters.get("bytes_sent", 0) or 0
+        recv += counters.get("bytes_recv", 0) or 0
+    return sent, recv
+
+
+def throughput_series(samples):
+    """Per-second tx/rx rates between consecutive samples, computed in one vectorized pass.
+
+    samples: [(timestamp, bytes_sent, bytes_recv), ...] in time order (host totals, e.g.
+    from sum_network_io). Returns [(timestamp, tx_per_sec, rx_per_sec), ...] for every
+    sample after the first whose gap to its predecessor is positive. A counter that went
+    backwards (reboot / NIC reset) yields 0 rather than a negative rate.
+    """
+    if len(samples) < 2:
+        return []
+    seconds = np.array([ts.timestamp() for ts, _, _ in samples])
+    counters = np.array([(sent, recv) for _, sent, recv in samples], dtype=np.float64)
+    dt = np.diff(seconds)
+    delta = np.clip(np.diff(counters, axis=0), 0, None)
+    valid = dt > 0
+    rates = np.zeros_like(delta)
+    rates[valid] = delta[valid] / dt[valid, None]
+    return [
+        (samples[i + 1][0], tx, rx)
+        for i, (tx, rx) in enumerate(rates.tolist())
+        if valid[i]
+    ]
@@ -195,6 +195,25 @@ def required_capability_for(url_name, method):
 # ---------------------------------------------------------------------------
 # Resolution helpers (server-side; never trust client input)
 # ---------------------------------------------------------------------------
+def role_privilege_keys(user):
+    """Every privilege key granted by the user's role (not only the RBAC capabilities).
+    Deny-by-default like effective_capabilities; superusers are not special-cased here."""
+    acl = getattr(user, "acl", None) if user else None
+    if acl is None or acl.role_id is None:
+        return frozenset()
+    # The middleware, the rbac context processor, the views and every template privilege
+    # check ask during one request; the ACL is cached on the user, so remember its role's
+    # keys there too.
+    cached = getattr(acl, "_privilege_keys", None)
+    if cached is not None and cached[0] == acl.role_id:
+        return cached[1]
+    from .models import RolePrivilege
+    keys = frozenset(RolePrivilege.objects.filter(role_id=acl.role_id)
+                     .values_list("privilege__key", flat=True))
+    acl._privilege_keys = (acl.role_id, keys)
+    return keys
+
+
 def effective_capabilities(user):
     """Capabilities for the given (already server-resolved) user. Deny-by-default:
     unauthenticated or role-less → no capabilities. Superuser → all (Admin),
@@ -203,11 +222,7 @@ def effective_capabilities(user):
         return frozenset()
     if getattr(user, "is_superuser", False):
         return ALL_CAPABILITIES
-    acl = getattr(user, "acl", None)
-    if acl is None or acl.role_id is None:
-        return frozenset()
-    keys = set(acl.role.role_privileges.values_list("privilege__key", flat=True))
-    return frozenset(keys) & ALL_CAPABILITIES
+    return role_privilege_keys(user) & ALL_CAPABILITIES
 
 
 def user_can(user, capability):
@@ -249,10 +264,14 @@ def sync_roles():
     central matrix. Idempotent. Returns a short summary string."""
     from .models import Privilege, Role, RolePrivilege
 
-    for key in ALL_CAPABILITIES:
-        Privilege.objects.get_or_create(
-            key=key, defaults={"label": CAPABILITY_LABELS.get(key, key)})
+    # One INSERT for the capabilities and one for the role links (existing rows are
+    # skipped by their unique keys) instead of a get_or_create per row.
+    Privilege.objects.bulk_create(
+        [Privilege(key=key, label=CAPABILITY_LABELS.get(key, key)) for key in ALL_CAPABILITIES],
+        ignore_conflicts=True)
+    privileges = Privilege.objects.in_bulk(ALL_CAPABILITIES, field_name="key")
 
+    role_privileges = []
     for role_name, caps in ROLE_CAPABILITIES.items():
         role, _ = Role.objects.get_or_create(
             name=role_name,
@@ -262,11 +281,10 @@ def sync_roles():
             role.is_protected = True
             role.save(update_fields=["is_protected"])
         wanted = set(caps)
-        for key in wanted:
-            priv = Privilege.objects.get(key=key)
-            RolePrivilege.objects.get_or_create(role=role, privilege=priv)
+        role_privileges += [RolePrivilege(role=role, privilege=privileges[key]) for key in wanted]
         # Drop any privileges not in the wanted set (keep roles in sync).
         RolePrivilege.objects.filter(role=role).exclude(
             privilege__key__in=wanted).delete()
+    RolePrivilege.objects.bulk_create(role_privileges, ignore_conflicts=True)
 
     return f"Synced {len(ALL_CAPABILITIES)} capabilities, {len(ROLE_CAPABILITIES)} roles"
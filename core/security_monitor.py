@@ -15,7 +15,6 @@ spamming new ones (alert-fatigue control).
 import logging
 from datetime import timedelta
 
-import requests
 from django.db.models import Count
 from django.utils import timezone
 
@@ -28,6 +27,7 @@ from .models import (
     SSHAuthEvent,
     Server,
 )
+from . import webhooks
 
 logger = logging.getLogger("core")
 
@@ -49,16 +49,19 @@ def _upsert_event(event_type, severity, title, description, source_ip=None,
         source_ip=source_ip,
         target_email=target_email or "",
         server=server,
-    ).first()
+    ).only("id").first()
 
     if existing:
+        # Only the pk was loaded: write back just the columns assigned here.
         existing.event_count = count
         existing.last_seen = now
         existing.description = description
         existing.severity = severity
+        update_fields = ["event_count", "last_seen", "description", "severity"]
         if metadata:
             existing.metadata = metadata
-        existing.save(update_fields=["event_count", "last_seen", "description", "severity", "metadata"])
+            update_fields.append("metadata")
+        existing.save(update_fields=update_fields)
         return existing, False
 
     event = SecurityEvent.objects.create(
@@ -256,7 +259,7 @@ def _send_slack(body):
         payload["username"] = cfg.username
     if cfg.icon_emoji:
         payload["icon_emoji"] = cfg.icon_emoji
-    requests.post(cfg.webhook_url, json=payload, timeout=10)
+    webhooks.post(cfg.webhook_url, json=payload, timeout=10)
 
 
 def notify(event):
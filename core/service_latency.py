@@ -9,25 +9,36 @@ Localhost-only services are skipped (not reachable without an on-host agent).
 
 import time
 import socket
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from django.utils import timezone
+from core import http
 from core.models import ServiceLatencyMeasurement
 
 logger = logging.getLogger(__name__)
 
+# Concurrent network probes per collection run (HTTP probes, one thread each)
+LATENCY_PROBE_WORKERS = 16
+# Concurrent TCP connects in flight on the collector's event loop
+LATENCY_TCP_CONCURRENCY = 256
+
 
 def measure_tcp_latency(host, port, timeout=5):
     """
     Measure TCP connection latency to a host:port.
     Returns latency in milliseconds or None on failure.
+
+    Timed on the monotonic perf counter: a wall-clock step (NTP) mid-probe would
+    otherwise show up as a negative or inflated latency.
     """
     try:
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.settimeout(timeout)
         sock.connect((host, port))
         sock.close()
-        latency_ms = (time.time() - start_time) * 1000
+        latency_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
         return {
             'latency_ms': round(latency_ms, 2),
             'success': True
@@ -52,6 +63,41 @@ def measure_tcp_latency(host, port, timeout=5):
         }
 
 
+async def measure_tcp_latency_async(host, port, timeout=5):
+    """
+    Coroutine form of measure_tcp_latency, used by collect_service_latencies so many
+    connects can be in flight on one event loop. Same result dict shape.
+    """
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        writer.close()
+        latency_ms = (loop.time() - start_time) * 1000
+        return {
+            'latency_ms': round(latency_ms, 2),
+            'success': True
+        }
+    except asyncio.TimeoutError:
+        return {
+            'latency_ms': None,
+            'success': False,
+            'error_message': 'Connection timed out'
+        }
+    except OSError as e:
+        return {
+            'latency_ms': None,
+            'success': False,
+            'error_message': f'Socket error: {str(e)}'
+        }
+    except Exception as e:
+        return {
+            'latency_ms': None,
+            'success': False,
+            'error_message': str(e)
+        }
+
+
 def measure_http_latency(server, service):
     """
     Measure HTTP service latency by sending health check request.
@@ -62,21 +108,19 @@ def measure_http_latency(server, service):
         return None
     
     try:
-        import requests
-        
         # Use HTTPS for port 443, HTTP otherwise
         protocol = 'https' if service.port == 443 else 'http'
         url = f"{protocol}://{server.ip_address}:{service.port}/"
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
-        response = requests.get(
+        response = http.session.get(
             url, 
             timeout=5,
             allow_redirects=False,
             verify=False  # Don't verify SSL for monitoring
         )
         
-        latency_ms = (time.time() - start_time) * 1000
+        latency_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
         
         return {
             'latency_ms': round(latency_ms, 2),
@@ -105,15 +149,8 @@ def is_externally_accessible(service):
     return service.bind_address in ('0.0.0.0', '::', '*') or not is_localhost_bound(service)
 
 
-def measure_service_latency(server, service):
-    """
-    Main function to measure latency for a service.
-    Only measures if service.monitoring_enabled == True.
-    
-    Externally accessible services are measured directly over the network
-    (TCP/HTTP). Localhost-only services are skipped (not reachable without an
-    on-host agent).
-    """
+def probe_type(service):
+    """Which probe measures the service: 'HTTP', 'TCP', or None when it isn't probed."""
     if not service.monitoring_enabled:
         return None
 
@@ -128,68 +165,157 @@ def measure_service_latency(server, service):
     # Service is externally accessible — measure directly over the network.
     service_name_lower = service.name.lower()
     if any(x in service_name_lower for x in ['apache', 'nginx', 'http', 'web']):
-        result = measure_http_latency(server, service)
-        measurement_type = 'HTTP'
+        return 'HTTP'
     elif service.port in (80, 443, 8080, 8443):
-        result = measure_http_latency(server, service)
-        measurement_type = 'HTTP'
-    else:
-        # Use TCP for everything else (MySQL, PostgreSQL, Redis, etc.)
-        result = measure_tcp_latency(server.ip_address, service.port)
-        measurement_type = 'TCP'
+        return 'HTTP'
+    # Use TCP for everything else (MySQL, PostgreSQL, Redis, etc.)
+    return 'TCP'
+
+
+def probe_service_latency(server, service):
+    """
+    Network half of measure_service_latency: pick the probe for the service and run it.
+    Does not touch the database, so it is safe to call from worker threads.
+
+    Returns (result, measurement_type); (None, None) when the service isn't probed.
+    """
+    measurement_type = probe_type(service)
+    if measurement_type == 'HTTP':
+        return measure_http_latency(server, service), 'HTTP'
+    if measurement_type == 'TCP':
+        return measure_tcp_latency(server.ip_address, service.port), 'TCP'
+    return None, None
+
+
+def _measurement(service, result, measurement_type):
+    """An unsaved ServiceLatencyMeasurement row for one probe result."""
+    return ServiceLatencyMeasurement(
+        service=service,
+        latency_ms=result.get('latency_ms') or 0,
+        timestamp=timezone.now(),
+        success=result.get('success', False),
+        error_message=result.get('error_message'),
+        measurement_type=measurement_type
+    )
+
+
+def _store_measurement(service, result, measurement_type):
+    """Persist one probe result as a ServiceLatencyMeasurement row."""
+    try:
+        _measurement(service, result, measurement_type).save()
+    except Exception as e:
+        logger.error(f"Failed to save latency measurement for {service.name}: {e}")
+
+
+def measure_service_latency(server, service):
+    """
+    Main function to measure latency for a service.
+    Only measures if service.monitoring_enabled == True.
+    
+    Externally accessible services are measured directly over the network
+    (TCP/HTTP). Localhost-only services are skipped (not reachable without an
+    on-host agent).
+    """
+    result, measurement_type = probe_service_latency(server, service)
     
     # Store measurement if we got a result
     if result:
-        try:
-            ServiceLatencyMeasurement.objects.create(
-                service=service,
-                latency_ms=result.get('latency_ms') or 0,
-                timestamp=timezone.now(),
-                success=result.get('success', False),
-                error_message=result.get('error_message'),
-                measurement_type=measurement_type
-            )
-        except Exception as e:
-            logger.error(f"Failed to save latency measurement for {service.name}: {e}")
+        _store_measurement(service, result, measurement_type)
     
     return result
 
 
-def collect_all_service_latencies(server):
+def _probe_safely(pair):
+    """Worker body for collect_service_latencies: never raises."""
+    server, service = pair
+    try:
+        return probe_service_latency(server, service)
+    except Exception as e:
+        logger.error(f"Error measuring latency for {service.name} on {server.name}: {e}")
+        return {'success': False, 'error_message': str(e)}, None
+
+
+async def _probe_tcp_all(pairs):
+    """Run the TCP connects for pairs on one event loop, LATENCY_TCP_CONCURRENCY at a time."""
+    gate = asyncio.Semaphore(LATENCY_TCP_CONCURRENCY)
+
+    async def probe(pair):
+        server, service = pair
+        async with gate:
+            try:
+                return await measure_tcp_latency_async(server.ip_address, service.port), 'TCP'
+            except Exception as e:
+                logger.error(f"Error measuring latency for {service.name} on {server.name}: {e}")
+                return {'success': False, 'error_message': str(e)}, None
+
+    return await asyncio.gather(*(probe(pair) for pair in pairs))
+
+
+def collect_service_latencies(pairs):
     """
-    Collect latency measurements for all monitored services on a server.
-    Returns a list of results.
+    Probe many (server, service) pairs concurrently and store the measurements.
+
+    The probes are network-bound (connect/HTTP timeouts of several seconds). TCP
+    connects, the bulk of them, run as coroutines on a single event loop, so the
+    fan-out isn't capped by a thread count; HTTP probes (blocking requests calls)
+    run on a thread pool alongside. The ServiceLatencyMeasurement writes stay on the
+    calling thread, batched into one bulk INSERT. Returns one result dict per pair,
+    in input order.
     """
+    pairs = list(pairs)
+    if not pairs:
+        return []
+
+    probes = [(None, None)] * len(pairs)
+    tcp = [i for i, (_, service) in enumerate(pairs) if probe_type(service) == 'TCP']
+    threaded = [i for i, (_, service) in enumerate(pairs) if probe_type(service) == 'HTTP']
+    pool = (ThreadPoolExecutor(max_workers=min(LATENCY_PROBE_WORKERS, len(threaded)))
+            if threaded else None)
+    try:
+        http_futures = [(i, pool.submit(_probe_safely, pairs[i])) for i in threaded]
+        if tcp:
+            for i, probe in zip(tcp, asyncio.run(_probe_tcp_all([pairs[i] for i in tcp]))):
+                probes[i] = probe
+        for i, future in http_futures:
+            probes[i] = future.result()
+    finally:
+        if pool:
+            pool.shutdown()
+
     results = []
-    
+    measurements = []
+    for (server, service), (result, measurement_type) in zip(pairs, probes):
+        if result and measurement_type:
+            measurements.append(_measurement(service, result, measurement_type))
+        results.append({
+            'server_id': server.id,
+            'service_id': service.id,
+            'service_name': service.name,
+            'port': service.port,
+            'bind_address': service.bind_address,
+            'result': result
+        })
+    if measurements:
+        try:
+            ServiceLatencyMeasurement.objects.bulk_create(measurements)
+        except Exception as e:
+            logger.error(f"Failed to save {len(measurements)} latency measurements: {e}")
+    return results
+
+
+def monitored_latency_services():
+    """Services the latency collector probes: monitored and listening on a real port."""
     from core.models import Service
-    monitored_services = Service.objects.filter(
-        server=server,
+    return Service.objects.filter(
         monitoring_enabled=True,
         port__isnull=False
     ).exclude(port=0)
-    
-    for service in monitored_services:
-        try:
-            result = measure_service_latency(server, service)
-            results.append({
-                'service_id': service.id,
-                'service_name': service.name,
-                'port': service.port,
-                'bind_address': service.bind_address,
-                'result': result
-            })
-        except Exception as e:
-            logger.error(f"Error measuring latency for {service.name} on {server.name}: {e}")
-            results.append({
-                'service_id': service.id,
-                'service_name': service.name,
-                'port': service.port,
-                'bind_address': service.bind_address,
-                'result': {
-                    'success': False,
-                    'error_message': str(e)
-                }
-            })
-    
-    return results
+
+
+def collect_all_service_latencies(server):
+    """
+    Collect latency measurements for all monitored services on a server.
+    Returns a list of results.
+    """
+    monitored_services = monitored_latency_services().filter(server=server)
+    return collect_service_latencies((server, service) for service in monitored_services)
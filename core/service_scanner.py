@@ -3,12 +3,15 @@ Service Scanner Module - Optimized for fast, lightweight scanning
 Scans servers for active services and applications using systemctl
 """
 import re
-import threading
 from typing import Dict, List, Optional
 from django.core.cache import cache
 from django.utils import timezone
 from datetime import timedelta
 
+# UNIT and ACTIVE columns of a `systemctl list-units` row, past the status bullet systemd
+# prints in front of failed units. Compiled once; it runs for every unit line of a scan.
+_UNIT_RE = re.compile(r"[\s●]*(\S+)(?:\s+\S+\s+(\S+))?")
+
 
 class ServiceScanner:
     """Scans servers for active services and applications"""
@@ -32,6 +35,18 @@ class ServiceScanner:
     }
     
     CACHE_TTL = 600  # 10 minutes cache
+    SCAN_TIMEOUT = 10  # seconds a command's output may go silent (per read, not in total)
+    
+    # (result key, remote command, parser name) for each part of a scan
+    SCAN_COMMANDS = (
+        # Single systemctl command to get all running services
+        ("detected_services",
+         "systemctl list-units --type=service --state=running --no-pager --no-legend 2>/dev/null",
+         "_parse_systemd_services"),
+        ("active_ports", "ss -tuln 2>/dev/null | grep LISTEN", "_parse_ports"),
+        # Top processes (limited)
+        ("running_processes", "ps aux --sort=-%cpu | head -11", "_parse_processes"),
+    )
     
     @staticmethod
     def scan_services(server, connection=None):
@@ -53,22 +68,20 @@ class ServiceScanner:
         
         try:
             if connection:
-                # Optimized: Single systemctl command to get all running services
-                stdin, stdout, stderr = connection.exec_command(
-                    "systemctl list-units --type=service --state=running --no-pager --no-legend 2>/dev/null"
-                )
-                systemd_output = stdout.read().decode()
-                services["detected_services"] = ServiceScanner._parse_systemd_services(systemd_output)
-                
-                # Check listening ports (optimized)
-                stdin, stdout, stderr = connection.exec_command("ss -tuln 2>/dev/null | grep LISTEN")
-                ports_output = stdout.read().decode()
-                services["active_ports"] = ServiceScanner._parse_ports(ports_output)
-                
-                # Get top processes (limited)
-                stdin, stdout, stderr = connection.exec_command("ps aux --sort=-%cpu | head -11")
-                processes = stdout.read().decode()
-                services["running_processes"] = ServiceScanner._parse_processes(processes)
+                # Start every command before reading any: each exec_command gets its own
+                # channel on the one transport, so the host runs them side by side and
+                # one output is parsed while the others are still being produced.
+                channels = [
+                    (key, connection.exec_command(command, timeout=ServiceScanner.SCAN_TIMEOUT)[1], parser)
+                    for key, command, parser in ServiceScanner.SCAN_COMMANDS
+                ]
+                for key, stdout, parser in channels:
+                    # A command that goes silent for SCAN_TIMEOUT only loses its own part
+                    try:
+                        services[key] = getattr(ServiceScanner, parser)(stdout.read().decode())
+                    except Exception as e:
+                        stdout.channel.close()
+                        print(f"Error reading {key} for {server.name}: {e}")
                 
         except Exception as e:
             print(f"Error scanning services for {server.name}: {e}")
@@ -77,28 +90,6 @@ class ServiceScanner:
         cache.set(cache_key, services, ServiceScanner.CACHE_TTL)
         return services
     
-    @staticmethod
-    def scan_services_async(server, connection=None):
-        """Async version using threading"""
-        result = {}
-        exception = None
-        
-        def scan():
-            nonlocal result, exception
-            try:
-                result = ServiceScanner.scan_services(server, connection)
-            except Exception as e:
-                exception = e
-        
-        thread = threading.Thread(target=scan)
-        thread.daemon = True
-        thread.start()
-        thread.join(timeout=10)  # 10 second timeout
-        
-        if exception:
-            raise exception
-        return result
-    
     @staticmethod
     def _parse_processes(process_output: str) -> List[Dict]:
         """Parse process list output"""
@@ -137,13 +128,14 @@ class ServiceScanner:
         services = []
         for line in services_output.split("\n"):
             if ".service" in line:
-                parts = line.split()
-                if parts:
-                    service_name = parts[0].replace(".service", "")
-                    status = parts[2] if len(parts) > 2 else "unknown"
+                match = _UNIT_RE.match(line)
+                if match:
+                    unit, status = match.groups()
                     services.append({
-                        "name": service_name,
-                        "status": status,
+                        "name": unit.removesuffix(".service"),
+                        "status": status or "unknown",
                         "type": "systemd"
                     })
-        return services[:20]  # Limit to 20 services
+                    if len(services) == 20:  # Limit to 20 services
+                        break
+        return services
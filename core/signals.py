@@ -4,6 +4,7 @@ Django signals for the core app
 from django.dispatch import receiver
 from django.contrib.auth.signals import user_logged_in, user_login_failed
 from django.utils import timezone
+from .audit import client_ip
 from .models import LoginActivity
 import logging
 
@@ -20,12 +21,7 @@ def get_client_ip(request):
     """
     if request is None:
         return '0.0.0.0'
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0].strip()
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip or '0.0.0.0'
+    return client_ip(request) or '0.0.0.0'
 
 
 def get_location_from_ip(ip_address):
@@ -5,7 +5,9 @@ These functions calculate SLI values from SystemMetric and ServiceLatencyMeasure
 """
 
 from django.utils import timezone
-from django.db.models import Avg, Q, Count, Sum
+from django.db.models import Avg, Q, Count, Sum, ExpressionWrapper, FloatField
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+from django.db.models.functions import Cast, Coalesce
 from datetime import timedelta
 from core.models import (
     SystemMetric, ServiceLatencyMeasurement, Service, SLIConfig, SLOConfig
@@ -37,6 +39,30 @@ def get_slo_config(server, metric_type):
     return global_slo
 
 
+def get_slo_config_map(servers, metric_types):
+    """
+    Bulk variant of get_slo_config: fetch every enabled SLO that could apply to
+    the given servers and metric types in a single query.
+
+    Returns a dict keyed by (server_id, metric_type); global defaults are keyed
+    with server_id None. Resolve with resolve_slo_config().
+    """
+    slo_map = {}
+    for slo in SLOConfig.objects.filter(
+        Q(server__in=servers) | Q(server=None),
+        metric_type__in=metric_types,
+        enabled=True,
+    ):
+        slo_map[(slo.server_id, slo.metric_type)] = slo
+    return slo_map
+
+
+def resolve_slo_config(slo_map, server, metric_type):
+    """Same precedence as get_slo_config (server override, then global) against a
+    map built by get_slo_config_map."""
+    return slo_map.get((server.id, metric_type)) or slo_map.get((None, metric_type))
+
+
 # Resource reliability thresholds: the resource SLIs report the % of samples whose value is
 # at/under these (a real "how often did we stay healthy" indicator, not a raw average).
 RESOURCE_THRESHOLDS = {"CPU": 85.0, "MEMORY": 90.0, "DISK": 90.0, "NETWORK": 80.0}
@@ -130,45 +156,71 @@ def calculate_memory_sli(server, start_date, end_date):
         return None
 
 
+def _fallback_disk_percent(disk_usage):
+    """Per-sample disk % when the JSON has no root-mount percent: mean of the mounts'."""
+    if not isinstance(disk_usage, dict):
+        return None
+    if isinstance(disk_usage.get("/"), dict) and "percent" in disk_usage["/"]:
+        return None                   # root percent present but null: not a sample
+    ps = [i.get("percent", 0) for i in disk_usage.values()
+          if isinstance(i, dict) and "percent" in i]
+    return sum(ps) / len(ps) if ps else None
+
+
 def calculate_disk_sli(server, start_date, end_date):
     """Disk reliability SLI = % of samples with primary-disk usage at/under the threshold
-    (higher is better). Parses the disk_usage JSON per sample. None if no samples."""
+    (higher is better). None if no samples.
+
+    The root mount's percent is read and counted in SQL, so only two counts come back;
+    just the samples without one (e.g. Windows drive letters) are parsed in Python."""
     try:
+        threshold = RESOURCE_THRESHOLDS["DISK"]
         metrics = SystemMetric.objects.filter(
             server=server, timestamp__gte=start_date, timestamp__lte=end_date
-        ).only("disk_usage")
-        percents = []
-        for metric in metrics:
-            disk_usage = metric.disk_usage or {}
-            if not isinstance(disk_usage, dict):
-                continue
-            if "/" in disk_usage and isinstance(disk_usage["/"], dict) and "percent" in disk_usage["/"]:
-                percents.append(disk_usage["/"]["percent"])
-            else:
-                ps = [i.get("percent", 0) for i in disk_usage.values()
-                      if isinstance(i, dict) and "percent" in i]
-                if ps:
-                    percents.append(sum(ps) / len(ps))
-        return _pct_at_or_under(percents, RESOURCE_THRESHOLDS["DISK"])
+        ).annotate(root_pct=Cast(
+            KeyTextTransform("percent", KeyTransform("/", "disk_usage")), FloatField()))
+        # A JSON-null root percent isn't a sample (and SQLite casts its text form to 0.0)
+        counts = metrics.exclude(**{"disk_usage__/__percent": None}).aggregate(
+            total=Count("root_pct"),
+            under=Count("root_pct", filter=Q(root_pct__lte=threshold)),
+        )
+        total, under = counts["total"], counts["under"]
+        fallback = metrics.filter(root_pct__isnull=True).order_by().values_list("disk_usage", flat=True)
+        for disk_usage in fallback:
+            percent = _fallback_disk_percent(disk_usage)
+            if percent is not None:
+                total += 1
+                under += percent <= threshold
+        if not total:
+            return None
+        return round(under / total * 100.0, 2)
     except Exception:
         return None
 
 
+def _with_network_utilization(metrics):
+    """Samples with a send or receive reading, annotated with `net_util`: the mean of the
+    two (a missing direction counts as 0)."""
+    return metrics.exclude(
+        net_utilization_sent__isnull=True, net_utilization_recv__isnull=True
+    ).annotate(net_util=ExpressionWrapper(
+        (Coalesce("net_utilization_sent", 0.0) + Coalesce("net_utilization_recv", 0.0)) / 2.0,
+        output_field=FloatField()))
+
+
 def calculate_network_sli(server, start_date, end_date):
     """Network reliability SLI = % of samples with network utilization at/under the threshold
     (higher is better). None if no samples."""
     try:
-        metrics = SystemMetric.objects.filter(
+        counts = _with_network_utilization(SystemMetric.objects.filter(
             server=server, timestamp__gte=start_date, timestamp__lte=end_date
-        ).only("net_utilization_sent", "net_utilization_recv")
-        vals = []
-        for metric in metrics:
-            sent = metric.net_utilization_sent
-            recv = metric.net_utilization_recv
-            if sent is None and recv is None:
-                continue
-            vals.append(((sent or 0.0) + (recv or 0.0)) / 2.0)
-        return _pct_at_or_under(vals, RESOURCE_THRESHOLDS["NETWORK"])
+        )).aggregate(
+            total=Count("id"),
+            under=Count("id", filter=Q(net_util__lte=RESOURCE_THRESHOLDS["NETWORK"])),
+        )
+        if not counts["total"]:
+            return None
+        return round(counts["under"] / counts["total"] * 100.0, 2)
     except Exception:
         return None
 
@@ -202,6 +254,95 @@ def calculate_sli_value(server, metric_type, start_date, end_date):
     return calculator(server, start_date, end_date)
 
 
+def _bulk_resource_sli(servers, field, threshold, start_date, end_date):
+    """Grouped form of calculate_cpu_sli/calculate_memory_sli: one GROUP BY server_id."""
+    rows = SystemMetric.objects.filter(
+        server__in=servers, timestamp__gte=start_date, timestamp__lte=end_date
+    ).values("server_id").annotate(
+        total=Count(field),
+        under=Count(field, filter=Q(**{f"{field}__lte": threshold})),
+    )
+    return {r["server_id"]: round(r["under"] / r["total"] * 100.0, 2) for r in rows if r["total"]}
+
+
+def _bulk_network_sli(servers, start_date, end_date):
+    """Grouped form of calculate_network_sli: one GROUP BY server_id."""
+    rows = _with_network_utilization(SystemMetric.objects.filter(
+        server__in=servers, timestamp__gte=start_date, timestamp__lte=end_date
+    )).values("server_id").annotate(
+        total=Count("id"),
+        under=Count("id", filter=Q(net_util__lte=RESOURCE_THRESHOLDS["NETWORK"])),
+    )
+    return {r["server_id"]: round(r["under"] / r["total"] * 100.0, 2) for r in rows if r["total"]}
+
+
+def _bulk_synthetic_sli(servers, metric_type, start_date, end_date):
+    """Grouped form of the uptime / error-rate / response-time calculators."""
+    from core.models import SyntheticCheckResult
+    rows = SyntheticCheckResult.objects.filter(
+        synthetic_check__server__in=servers,
+        timestamp__gte=start_date,
+        timestamp__lte=end_date,
+    ).values("synthetic_check__server_id").annotate(
+        total=Count("id"),
+        ok=Count("id", filter=Q(success=True)),
+        latency=Avg("response_time_ms", filter=Q(success=True, response_time_ms__isnull=False)),
+    )
+    values = {}
+    for r in rows:
+        if not r["total"]:
+            continue
+        if metric_type == "UPTIME":
+            value = round(r["ok"] / r["total"] * 100.0, 2)
+        elif metric_type == "ERROR_RATE":
+            value = round((r["total"] - r["ok"]) / r["total"] * 100.0, 2)
+        elif r["latency"] is not None:
+            value = round(r["latency"], 2)
+        else:
+            continue
+        values[r["synthetic_check__server_id"]] = value
+    return values
+
+
+def bulk_calculate_sli_values(servers, metric_type, start_date, end_date):
+    """
+    calculate_sli_value for many servers sharing one time window.
+
+    CPU/MEMORY/NETWORK and the synthetic-probe SLIs are computed with a single
+    grouped query; DISK falls back to the per-server calculator.
+
+    Returns {server_id: sli_value}; servers with no data in the window are absent
+    (calculate_sli_value would return None for them).
+    """
+    servers = list(servers)
+    if not servers:
+        return {}
+    if metric_type in ("CPU", "MEMORY"):
+        field = "cpu_percent" if metric_type == "CPU" else "memory_percent"
+        try:
+            return _bulk_resource_sli(servers, field, RESOURCE_THRESHOLDS[metric_type],
+                                      start_date, end_date)
+        except Exception:
+            return {}
+    if metric_type in ("UPTIME", "ERROR_RATE", "RESPONSE_TIME"):
+        try:
+            return _bulk_synthetic_sli(servers, metric_type, start_date, end_date)
+        except Exception:
+            return {}
+    if metric_type == "NETWORK":
+        try:
+            return _bulk_network_sli(servers, start_date, end_date)
+        except Exception:
+            return {}
+
+    values = {}
+    for server in servers:
+        value = calculate_sli_value(server, metric_type, start_date, end_date)
+        if value is not None:
+            values[server.id] = value
+    return values
+
+
 def check_compliance(sli_value, slo_config):
     """
     Check if SLI value meets SLO target.
@@ -534,8 +675,3 @@ def get_reliability_metrics_timeseries(server_id, period='24h'):
         'start_date': start_date.isoformat(),
         'end_date': end_date.isoformat()
     }
-
-
-
-
-
@@ -11,6 +11,7 @@ Part of User Experience monitoring: catch outages/slowdowns before users do.
 import logging
 import socket
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
 import requests
@@ -22,9 +23,14 @@ from .models import (
     EmailAlertConfig,
     SlackAlertConfig,
 )
+from . import webhooks
+from .alert_delivery import deliver
 
 logger = logging.getLogger("core")
 
+# Concurrent probes per run_synthetic_checks pass (probes are network-bound)
+SYNTHETIC_PROBE_WORKERS = 16
+
 
 # --------------------------------------------------------------------------- #
 # Probing
@@ -149,18 +155,52 @@ def record_and_evaluate(check, probe):
     return result, transition
 
 
-def run_check(check):
-    """Probe a check, record it, and alert on a state transition."""
-    probe = perform_probe(check)
+def _record_and_notify(check, probe):
     result, transition = record_and_evaluate(check, probe)
     if transition and check.alert_on_failure:
-        try:
-            notify(check, transition, probe)
-        except Exception:
-            logger.exception("Failed to send synthetic alert for %s", check.name)
+        # Email/Slack delivery goes to the alert-delivery pool, so neither the
+        # "Run now" request nor the scheduler pass waits on a slow mail server or webhook.
+        deliver(f"Synthetic alert for {check.name}", notify, check, transition, probe)
     return result, transition
 
 
+def run_check(check):
+    """Probe a check, record it, and alert on a state transition."""
+    return _record_and_notify(check, perform_probe(check))
+
+
+def _probe_safely(check):
+    """Worker body for run_checks: never raises."""
+    try:
+        return perform_probe(check)
+    except Exception as e:
+        return {"success": False, "status_code": None, "response_time_ms": None, "error": str(e)[:300]}
+
+
+def run_checks(checks):
+    """run_check for many checks: the probes run concurrently on a thread pool, so one
+    slow target no longer holds up the rest; recording stays on the calling thread (no DB
+    work in the workers) and alerts are queued for delivery from there.
+
+    Returns [(check, result, transition, error)] in input order; `error` is the exception
+    if recording failed for that check, else None.
+    """
+    checks = list(checks)
+    if not checks:
+        return []
+    with ThreadPoolExecutor(max_workers=min(SYNTHETIC_PROBE_WORKERS, len(checks))) as pool:
+        probes = list(pool.map(_probe_safely, checks))
+
+    outcomes = []
+    for check, probe in zip(checks, probes):
+        try:
+            result, transition = _record_and_notify(check, probe)
+            outcomes.append((check, result, transition, None))
+        except Exception as e:
+            outcomes.append((check, None, None, e))
+    return outcomes
+
+
 # --------------------------------------------------------------------------- #
 # Alerting (reuses the existing Email + Slack configuration)
 # --------------------------------------------------------------------------- #
@@ -213,7 +253,7 @@ def _send_slack(check, event, body):
         payload["username"] = cfg.username
     if cfg.icon_emoji:
         payload["icon_emoji"] = cfg.icon_emoji
-    requests.post(cfg.webhook_url, json=payload, timeout=10)
+    webhooks.post(cfg.webhook_url, json=payload, timeout=10)
 
 
 def notify(check, event, probe):
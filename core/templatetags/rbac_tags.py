@@ -1,16 +1,10 @@
 from django import template
-from django.contrib.auth.models import User
-from core.models import UserACL
+from core.permissions import role_privilege_keys
 
 register = template.Library()
 
 
-@register.filter
-def has_privilege(user, privilege_key):
-    """
-    Template filter to check if a user has a specific privilege
-    Usage: {% if user|has_privilege:"add_server" %}...{% endif %}
-    """
+def _has_privilege(user, privilege_key):
     if not user or not user.is_authenticated:
         return False
 
@@ -18,11 +12,17 @@ def has_privilege(user, privilege_key):
     if user.is_superuser:
         return True
 
-    try:
-        acl = UserACL.objects.get(user=user)
-        return acl.has_privilege(privilege_key)
-    except UserACL.DoesNotExist:
-        return False
+    # Resolved once per request: the role's keys are cached on the user's ACL
+    return privilege_key in role_privilege_keys(user)
+
+
+@register.filter
+def has_privilege(user, privilege_key):
+    """
+    Template filter to check if a user has a specific privilege
+    Usage: {% if user|has_privilege:"add_server" %}...{% endif %}
+    """
+    return _has_privilege(user, privilege_key)
 
 
 @register.simple_tag
@@ -31,18 +31,7 @@ def check_privilege(user, privilege_key):
     Template tag to check if a user has a specific privilege
     Usage: {% check_privilege user "add_server" as can_add_server %}
     """
-    if not user or not user.is_authenticated:
-        return False
-
-    # Superusers always have all privileges
-    if user.is_superuser:
-        return True
-
-    try:
-        acl = UserACL.objects.get(user=user)
-        return acl.has_privilege(privilege_key)
-    except UserACL.DoesNotExist:
-        return False
+    return _has_privilege(user, privilege_key)
 
 
 @register.filter
@@ -52,5 +41,3 @@ def user_can(user, privilege_key):
     Usage: {% if user|user_can:"add_server" %}...{% endif %}
     """
     return has_privilege(user, privilege_key)
-
-
@@ -84,7 +84,7 @@ def timezone_abbrev(value):
                     abbrev = now.strftime('%Z')
                     if not abbrev:
                         abbrev = tz.zone.split('/')[-1][:3].upper()
-                except:
+                except Exception:
                     abbrev = tz.zone.split('/')[-1][:3].upper()
             return abbrev
         return dt.strftime('%Z') or 'UTC'
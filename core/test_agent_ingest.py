@@ -10,13 +10,21 @@ valid push actually persists.
 The token is the server's identity: AgentCredential stores only a SHA-256 hash, and a
 token authenticates exactly one server.
 """
+import gzip
 import json
+import os
+import tempfile
+from unittest.mock import patch
 
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
-from core.models import (Server, AgentCredential, SystemMetric, ServerHeartbeat,
+from core import agent_api
+from core.models import (Server, AgentCredential, AgentVersion, SystemMetric, ServerHeartbeat,
                          Service, Container, SSHAuthEvent, MonitoringConfig,
                          BusinessMonitorConfig, BusinessKPI)
 
@@ -118,6 +126,36 @@ class InputHardeningTests(_Base):
     def test_get_method_not_allowed_405(self):
         self.assertEqual(self.client.get(self.metrics_url).status_code, 405)
 
+    def test_nan_literal_still_parses_as_before(self):
+        # orjson rejects NaN; the stdlib fallback keeps accepting what it always did.
+        r = self._post(self.metrics_url, json.dumps(dict(VALID, junk=float("nan"))),
+                       token=self.token)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(SystemMetric.objects.count(), 1)
+
+    def _post_gzip(self, body):
+        return self.client.post(self.metrics_url, data=body, content_type="application/json",
+                                HTTP_CONTENT_ENCODING="gzip",
+                                HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def test_gzipped_body_accepted_and_support_advertised(self):
+        r = self._post_gzip(gzip.compress(json.dumps(VALID).encode()))
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["Accept-Encoding"], "gzip")
+        self.assertEqual(SystemMetric.objects.count(), 1)
+
+    def test_gzip_that_inflates_past_the_limit_rejected_413(self):
+        bomb = gzip.compress(json.dumps(dict(VALID, junk="x" * (1024 * 1024))).encode())
+        self.assertLess(len(bomb), agent_api.MAX_BODY_BYTES)
+        self.assertEqual(self._post_gzip(bomb).status_code, 413)
+        self.assertEqual(SystemMetric.objects.count(), 0)
+
+    def test_corrupt_or_truncated_gzip_rejected_400(self):
+        packed = gzip.compress(json.dumps(VALID).encode())
+        self.assertEqual(self._post_gzip(b"not gzip at all").status_code, 400)
+        self.assertEqual(self._post_gzip(packed[:len(packed) // 2]).status_code, 400)
+        self.assertEqual(SystemMetric.objects.count(), 0)
+
 
 class MetricsIntegrityTests(_Base):
     def test_valid_push_stores_exactly_one_metric(self):
@@ -154,10 +192,43 @@ class MetricsIntegrityTests(_Base):
         # ...but the token is still a sign of life -> heartbeat updates.
         self.assertTrue(ServerHeartbeat.objects.filter(server=self.server).exists())
 
+    def test_monitoring_config_is_loaded_with_the_credential(self):
+        MonitoringConfig.objects.create(server=self.server, enabled=True)
+        with CaptureQueriesContext(connection) as ctx:
+            r = self._post(self.metrics_url, VALID, token=self.token)
+        self.assertTrue(r.json()["stored"])
+        self.assertFalse([q for q in ctx.captured_queries
+                          if 'FROM "core_monitoringconfig"' in q["sql"]])
+
     def test_push_updates_heartbeat(self):
         self._post(self.metrics_url, VALID, token=self.token)
         self.assertTrue(ServerHeartbeat.objects.filter(server=self.server).exists())
 
+    def test_repeat_pushes_upsert_a_single_heartbeat_row(self):
+        self._post(self.metrics_url, dict(VALID, agent_version="1.0"), token=self.token)
+        first = ServerHeartbeat.objects.get(server=self.server)
+        self._post(self.metrics_url, dict(VALID, agent_version="1.1"), token=self.token)
+        hb = ServerHeartbeat.objects.get(server=self.server)      # still exactly one row
+        self.assertEqual(hb.pk, first.pk)
+        self.assertEqual(hb.created_at, first.created_at)
+        self.assertGreaterEqual(hb.last_heartbeat, first.last_heartbeat)
+        self.assertEqual(hb.agent_version, "1.1")
+        self.assertEqual(sorted(AgentVersion.objects.filter(server=self.server)
+                                .values_list("version", flat=True)), ["1.0", "1.1"])
+
+
+    def test_disk_inventory_survives_pushes_that_omit_it(self):
+        # The agent ships disk_hardware only when it changes; the details page keeps
+        # showing the last inventory it sent.
+        hw = {"physical_disk_count": 1, "disks": [{"name": "nvme0n1", "type": "NVMe"}],
+              "raid_arrays": [], "raid": "none"}
+        self._post(self.metrics_url, dict(VALID, disk_hardware=hw), token=self.token)
+        self._post(self.metrics_url, VALID, token=self.token)
+        self.client.force_login(User.objects.create_superuser("hw-admin", "hw@x.test", "pw"))
+        r = self.client.get(reverse("server_details", args=[self.server.id]))
+        self.assertEqual(r.context["disk_hardware"], hw)
+        self.assertEqual(r.context["disk_summary"]["nvme_count"], 1)
+
 
 class SyncEndpointsTests(_Base):
     def test_services_ingest_syncs_rows(self):
@@ -174,6 +245,42 @@ class SyncEndpointsTests(_Base):
         self.assertEqual(r.status_code, 200)
         self.assertTrue(Container.objects.filter(server=self.server, name="web").exists())
 
+    def test_containers_repush_upserts_and_keeps_operator_state(self):
+        url = reverse("agent_ingest_containers")
+        self._post(url, {"containers": [{"name": "web", "state": "running",
+                                         "inspect": {"image": "nginx"}},
+                                        {"name": "db", "state": "running"}]}, token=self.token)
+        Container.objects.filter(name="web").update(monitoring_enabled=True)
+        r = self._post(url, {"containers": [{"name": "web", "state": "exited"},
+                                            {"name": "db", "state": "running"}]}, token=self.token)
+        self.assertEqual(r.json()["received"], 2)
+        web = Container.objects.get(server=self.server, name="web")
+        self.assertEqual(web.state, "exited")
+        self.assertTrue(web.monitoring_enabled)
+        self.assertEqual(web.inspect_data, {"image": "nginx"})   # not wiped by a plain push
+        self.assertEqual(Container.objects.filter(server=self.server).count(), 2)
+
+    def test_services_repush_upserts_in_one_statement_and_keeps_operator_state(self):
+        url = reverse("agent_ingest_services")
+        names = [f"unit-{i}" for i in range(20)]
+        self._post(url, {"services": [{"name": n, "status": "running"} for n in names]},
+                   token=self.token)
+        Service.objects.filter(name="unit-0").update(monitoring_enabled=True, user_label="API")
+        with CaptureQueriesContext(connection) as ctx:
+            r = self._post(url, {"services": [{"name": n, "status": "failed"} for n in names]},
+                           token=self.token)
+        self.assertEqual(r.json()["received"], 20)
+        writes = [q["sql"] for q in ctx.captured_queries
+                  if q["sql"].startswith(('INSERT INTO "core_service"', 'UPDATE "core_service"'))]
+        # The upsert, the stopped sweep and the monitored unit's health -- not one per service.
+        self.assertEqual(len(writes), 3)
+        self.assertTrue(writes[0].startswith('INSERT INTO "core_service"'))
+        unit = Service.objects.get(server=self.server, name="unit-0")
+        self.assertEqual(unit.status, "failed")
+        self.assertTrue(unit.monitoring_enabled)
+        self.assertEqual(unit.user_label, "API")
+        self.assertEqual(Service.objects.filter(server=self.server).count(), 20)
+
     def test_ssh_auth_ingest_stores_events(self):
         r = self._post(reverse("agent_ingest_ssh_auth"),
                        {"events": [{"source_ip": "1.2.3.4", "username": "root",
@@ -245,6 +352,38 @@ class PortServiceIngestTests(_Base):
         self.assertEqual(s.display_name, "HTTP (:80)")         # label updated in place
 
 
+class AgentArtifactTests(TestCase):
+    def setUp(self):
+        User.objects.create_superuser("artifact-admin", "a@x.test", "pw")   # past the setup wizard
+
+    def test_unchanged_agent_script_revalidates_with_304(self):
+        url = reverse("agent_script")
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn(b"AGENT_VERSION", first.content)
+        etag = first["ETag"]
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+        stale = self.client.get(url, HTTP_IF_NONE_MATCH='"not-the-current-hash"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_artifact_is_read_once_until_it_changes_on_disk(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "stacksense_agent.py")
+            with open(path, "wb") as f:
+                f.write(b"v1")
+            self.addCleanup(agent_api._AGENT_FILE_CACHE.pop, path, None)
+            with patch("core.agent_api.open", side_effect=open, create=True) as opened:
+                self.assertEqual(agent_api._load_agent_file(path)[0], b"v1")
+                self.assertEqual(agent_api._load_agent_file(path)[0], b"v1")
+                self.assertEqual(opened.call_count, 1)
+                with open(path, "wb") as f:
+                    f.write(b"v2 (redeployed)")
+                self.assertEqual(agent_api._load_agent_file(path)[0], b"v2 (redeployed)")
+                self.assertEqual(opened.call_count, 2)
+
+
 class KpiIngestTests(TestCase):
     """The business KPI ingest endpoint uses a SEPARATE hashed token
     (BusinessMonitorConfig), but the same boundary discipline applies."""
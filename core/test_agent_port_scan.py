@@ -56,6 +56,16 @@ class ProcNetTcpParserTests(unittest.TestCase):
         self.assertEqual(got.get(22), "::")           # wildcard v6
         self.assertEqual(got.get(80), "::1")          # loopback v6 (4 LE words)
 
+    def test_streams_lines_from_an_open_file(self):
+        import io
+        sample = io.StringIO(
+            "  sl  local_address rem_address   st\n"
+            + "   0: 0100007F:1F90 0A0A0A0A:C000 01 00000000:00000000 00:00000000 00000000 0 0 1 1\n" * 500
+            + "   1: 00000000:0050 00000000:0000 0A 00000000:00000000 00:00000000 00000000 0 0 1 1\n"
+        )
+        self.assertEqual(self.agent._parse_proc_net_tcp_listeners(sample, is_v6=False),
+                         [(80, "0.0.0.0")])
+
     def test_decode_addr(self):
         self.assertEqual(self.agent._decode_proc_addr("00000000", is_v6=False), "0.0.0.0")
         self.assertEqual(self.agent._decode_proc_addr("0100007F", is_v6=False), "127.0.0.1")
@@ -0,0 +1,80 @@
+"""
+aggregate_metrics -- hourly/daily roll-ups of raw SystemMetric rows.
+
+The bucketing streams rows in timestamp order and groups contiguous runs, so the
+properties worth pinning are: one AggregatedMetric per bucket, every raw row counted
+exactly once, and the min/avg/max maths unchanged.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.management.commands.aggregate_metrics import Command
+from core.models import AggregatedMetric, MonitoringConfig, Server, SystemMetric
+
+
+class AggregateBucketTests(TestCase):
+    def setUp(self):
+        self.server = Server.objects.create(name="agg-vm", ip_address="10.4.4.1", username="agent")
+        MonitoringConfig.objects.create(server=self.server, aggregation_enabled=True)
+        self.base = datetime(2025, 1, 1, 10, 0, tzinfo=dt_timezone.utc)
+
+    def _metric(self, ts, cpu, disk=None):
+        return SystemMetric.objects.create(
+            server=self.server, timestamp=ts, cpu_percent=cpu, memory_total=8_000_000_000,
+            memory_available=4_000_000_000, memory_used=4_000_000_000, memory_percent=50,
+            disk_usage=disk or {})
+
+    def test_hourly_one_row_per_hour_with_correct_stats(self):
+        self._metric(self.base + timedelta(minutes=5), 10, {"/": {"percent": 40}})
+        self._metric(self.base + timedelta(minutes=50), 30, {"/": {"percent": 60}})
+        self._metric(self.base + timedelta(hours=1, minutes=1), 70)
+
+        count = Command()._aggregate_hourly(self.server, self.base + timedelta(hours=3))
+
+        self.assertEqual(count, 2)
+        first = AggregatedMetric.objects.get(aggregation_type="hourly", timestamp=self.base)
+        self.assertEqual(first.metric_count, 2)
+        self.assertEqual((first.cpu_min, first.cpu_avg, first.cpu_max), (10, 20, 30))
+        self.assertEqual((first.disk_min, first.disk_avg, first.disk_max), (40, 50, 60))
+        second = AggregatedMetric.objects.get(aggregation_type="hourly",
+                                              timestamp=self.base + timedelta(hours=1))
+        self.assertEqual(second.metric_count, 1)
+        self.assertIsNone(second.disk_avg)
+
+    def test_daily_groups_across_hours(self):
+        self._metric(self.base, 10)
+        self._metric(self.base + timedelta(hours=5), 20)
+        self._metric(self.base + timedelta(days=1), 30)
+
+        count = Command()._aggregate_daily(self.server, self.base + timedelta(days=2))
+
+        self.assertEqual(count, 2)
+        day = AggregatedMetric.objects.get(
+            aggregation_type="daily", timestamp=self.base.replace(hour=0))
+        self.assertEqual(day.metric_count, 2)
+
+    def test_no_metrics_before_cutoff_is_a_noop(self):
+        self._metric(self.base, 10)
+        self.assertEqual(Command()._aggregate_hourly(self.server, self.base), 0)
+        self.assertFalse(AggregatedMetric.objects.exists())
+
+    def test_rerun_updates_buckets_in_place_with_constant_queries(self):
+        for hour in range(6):
+            self._metric(self.base + timedelta(hours=hour), 10)
+        cutoff = self.base + timedelta(hours=8)
+        Command()._aggregate_hourly(self.server, cutoff)
+        self._metric(self.base + timedelta(minutes=30), 50)      # late row lands in hour 0
+
+        with CaptureQueriesContext(connection) as ctx:
+            count = Command()._aggregate_hourly(self.server, cutoff)
+
+        self.assertEqual(count, 6)
+        self.assertEqual(AggregatedMetric.objects.filter(aggregation_type="hourly").count(), 6)
+        first = AggregatedMetric.objects.get(aggregation_type="hourly", timestamp=self.base)
+        self.assertEqual((first.metric_count, first.cpu_max), (2, 50))
+        writes = [q["sql"] for q in ctx.captured_queries
+                  if '"core_aggregatedmetric"' in q["sql"] and not q["sql"].startswith("SELECT")]
+        self.assertEqual(len(writes), 1)                          # one bulk UPDATE, no INSERT
@@ -14,7 +14,9 @@ from unittest.mock import patch
 
 from django.contrib.auth.models import User
 from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
@@ -73,6 +75,18 @@ class CreateSiteSeverityTests(TestCase):
         evaluate_service_alerts(self.server)
         self.assertFalse(AlertHistory.objects.filter(server=self.server).exists())
 
+    def test_open_alerts_are_read_once_per_evaluation(self):
+        for name in ("nginx", "redis", "cron", "sshd"):
+            Service.objects.create(server=self.server, name=name, status="stopped",
+                                   monitoring_enabled=True)
+        evaluate_service_alerts(self.server)               # raise one alert per service
+        with CaptureQueriesContext(connection) as ctx:
+            evaluate_service_alerts(self.server)           # all already open: no new alerts
+        lookups = [q for q in ctx.captured_queries
+                   if q["sql"].startswith("SELECT") and '"core_alerthistory"' in q["sql"]]
+        self.assertEqual(len(lookups), 1)
+        self.assertEqual(AlertHistory.objects.filter(server=self.server).count(), 4)
+
     # --- views: connection / service create-sites (routing mocked away) -----------
     def _enable_alert_channels(self):
         MonitoringConfig.objects.create(server=self.server, enabled=True,
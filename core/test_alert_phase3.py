@@ -11,6 +11,7 @@ state in the Django cache). No users are seeded, so recipients_for() resolves to
 and the senders short-circuit before any SMTP -- we assert on the AlertHistory rows the
 engine writes.
 """
+import threading
 from datetime import timedelta
 from unittest.mock import patch
 
@@ -20,8 +21,10 @@ from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from core.models import (Server, MonitoringConfig, EmailAlertConfig, Service, Container,
-                         AlertHistory, ServerHeartbeat)
+                         AlertHistory, ServerHeartbeat, SlackAlertConfig)
 from core.agent_api import evaluate_service_alerts, evaluate_container_alerts
+from core.alert_delivery import wait_for_alert_deliveries
+from core.testing import FleetQueryCountMixin
 from core.views import _check_and_send_alerts
 
 
@@ -219,7 +222,7 @@ class DiskThresholdStateMachineTests(TestCase):
         self.assertEqual(self._resolved(), 1)
 
 
-class ConnectivityDetectionTests(TestCase):
+class ConnectivityDetectionTests(FleetQueryCountMixin, TestCase):
     """check_server_connectivity decides DOWN/UP from heartbeat freshness and fires a
     CONNECTION alert once per transition (state marker = the latest CONNECTION row)."""
 
@@ -237,6 +240,7 @@ class ConnectivityDetectionTests(TestCase):
 
     def _run(self, down_seconds=90):
         call_command("check_server_connectivity", down_seconds=down_seconds)
+        wait_for_alert_deliveries()       # sends go out on the shared delivery pool
 
     def _conn(self, status):
         return AlertHistory.objects.filter(server=self.server, alert_type="CONNECTION",
@@ -277,6 +281,38 @@ class ConnectivityDetectionTests(TestCase):
         self._run()
         self.assertEqual(AlertHistory.objects.filter(server=self.server).count(), 0)
 
+    def test_steady_state_query_count_is_independent_of_fleet_size(self):
+        self._heartbeat(age_seconds=10)
+
+        def add_servers(n):
+            for i in range(n):
+                s = Server.objects.create(name=f"t-vm-{i}", ip_address="10.6.6.2", username="agent")
+                MonitoringConfig.objects.create(server=s, enabled=True)
+                ServerHeartbeat.objects.create(server=s, last_heartbeat=timezone.now())
+        self.assertQueryCountIndependentOfFleet(self._run, add_servers)
+
+    @patch("core.views.alert_routing.recipients_for", return_value=[])
+    def test_outage_alerts_are_sent_concurrently(self, _routing):
+        SlackAlertConfig.objects.create(id=1, enabled=True,
+                                        webhook_url="https://hooks.slack.com/services/T/B/x")
+        other = Server.objects.create(name="t-vm-2", ip_address="10.6.6.3", username="agent")
+        MonitoringConfig.objects.create(server=other, enabled=True)
+        for s in (self.server, other):
+            ServerHeartbeat.objects.create(
+                server=s, last_heartbeat=timezone.now() - timedelta(seconds=300))
+        both_in_flight = threading.Barrier(2, timeout=5)   # breaks if sends run one by one
+        sent = []
+
+        def slack(webhook_url, server, state, **kwargs):
+            both_in_flight.wait()
+            sent.append(server.name)
+
+        with patch("core.views._send_slack_connection_alert", slack):
+            self._run()
+        self.assertEqual(sorted(sent), ["t-vm", "t-vm-2"])
+        self.assertEqual(AlertHistory.objects.filter(alert_type="CONNECTION",
+                                                     status="triggered").count(), 2)
+
     @patch("core.views.alert_routing.recipients_for", return_value=[])
     def test_suspended_server_is_skipped(self, _routing):
         cfg = self.server.monitoring_config
@@ -26,6 +26,7 @@ from core.models import (Server, MonitoringConfig, EmailAlertConfig, Service, Co
                          AlertHistory, Role, UserACL, AlertRoutingRule)
 from core.permissions import ROLE_ADMIN, ROLE_OPERATOR, ROLE_CEO
 from core.agent_api import evaluate_service_alerts, evaluate_container_alerts
+from core.alert_delivery import wait_for_alert_deliveries
 from core.views import _send_connection_alert, _send_alert_email
 
 
@@ -60,6 +61,7 @@ class SendMailRoutingTests(TestCase):
         self.server = Server.objects.create(name="t-vm", ip_address="10.8.8.1", username="agent")
 
     def _to(self):
+        wait_for_alert_deliveries()        # agent_api sends off the request thread
         self.assertEqual(len(mail.outbox), 1)
         return set(mail.outbox[0].to)
 
@@ -60,3 +60,19 @@ class IncidentGradeAnomalyTests(TestCase):
         anoms = self._cpu_anoms(m)
         self.assertEqual(len(anoms), 1)
         self.assertIn("alert limit", anoms[0]["explanation"])
+
+    def test_network_ceiling_reuses_the_loaded_history(self):
+        # The previous sample for the throughput delta is the head of the baseline history
+        # -- no second "latest metric before this one" query.
+        self.config.network_io_threshold = 10.0          # MB/s
+        prev = self._metric(10, 0)
+        prev.network_io = {"eth0": {"bytes_sent": 0, "bytes_recv": 0}}
+        prev.save()
+        cur = self._metric(10, 60)
+        cur.network_io = {"eth0": {"bytes_sent": 0, "bytes_recv": 60 * 50 * 1024 * 1024}}
+        cur.save()
+        with self.assertNumQueries(1):
+            anoms = self.detector.detect_anomalies(cur)
+        net = [a for a in anoms if a["metric_type"] == "network"]
+        self.assertEqual(len(net), 1)
+        self.assertAlmostEqual(net[0]["metric_value"], 50.0)
@@ -0,0 +1,63 @@
+"""
+check_heartbeats -- the cron-side heartbeat report.
+
+Pins the status classification (online / offline / no heartbeat), the non-zero exit
+when anything is down, and that the query count does not grow with the fleet.
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import Server, ServerHeartbeat
+from core.testing import FleetQueryCountMixin
+
+
+class CheckHeartbeatsTests(FleetQueryCountMixin, TestCase):
+    def _server(self, name, seconds_ago=None):
+        server = Server.objects.create(name=name, ip_address="10.6.6.1", username="agent")
+        if seconds_ago is not None:
+            ServerHeartbeat.objects.create(
+                server=server, last_heartbeat=timezone.now() - timedelta(seconds=seconds_ago))
+        return server
+
+    def _run(self, *args):
+        out = StringIO()
+        call_command("check_heartbeats", *args, stdout=out)
+        return out.getvalue()
+
+    def test_all_online_exits_cleanly(self):
+        self._server("hb-a", seconds_ago=5)
+        self._server("hb-b", seconds_ago=10)
+        out = self._run("--verbose")
+        self.assertIn("Online: 2", out)
+        self.assertIn("Total Servers: 2", out)
+
+    def test_offline_and_missing_heartbeats_exit_non_zero(self):
+        self._server("hb-ok", seconds_ago=5)
+        self._server("hb-stale", seconds_ago=600)
+        self._server("hb-none")
+        out = StringIO()
+        with self.assertRaises(SystemExit) as ctx:
+            call_command("check_heartbeats", "--verbose", stdout=out)
+        self.assertEqual(ctx.exception.code, 1)
+        text = out.getvalue()
+        self.assertIn("Offline: 2", text)
+        self.assertIn("No Heartbeat: 1", text)
+        self.assertIn("Total Servers: 3", text)
+        self.assertIn("hb-stale", text)
+
+    def test_query_count_is_independent_of_fleet_size(self):
+        self._server("hb-1", seconds_ago=5)
+        self.assertQueryCountIndependentOfFleet(
+            self._run, lambda n: [self._server(f"hb-more-{i}", seconds_ago=5) for i in range(n)])
+
+    def test_summary_total_needs_no_count_query(self):
+        self._server("hb-1", seconds_ago=5)
+        with CaptureQueriesContext(connection) as ctx:
+            self._run()
+        self.assertFalse([q for q in ctx.captured_queries if "COUNT(" in q["sql"].upper()])
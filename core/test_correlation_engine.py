@@ -0,0 +1,49 @@
+"""
+MultiMetricCorrelationEngine.load_recent_metrics -- the window loader.
+
+Guards the cheap exits (disabled engine, fewer than 10 rows) and that the column-
+restricted query still yields a chronological DataFrame of the expected shape.
+"""
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.correlation_engine import MultiMetricCorrelationEngine
+from core.models import Server, SystemMetric
+
+
+class LoadRecentMetricsTests(TestCase):
+    def setUp(self):
+        self.server = Server.objects.create(name="corr-vm", ip_address="10.5.5.1", username="agent")
+        self.config = SimpleNamespace(window_size=60)
+
+    def _seed(self, n):
+        now = timezone.now()
+        for i in range(n):
+            SystemMetric.objects.create(
+                server=self.server, timestamp=now - timedelta(minutes=n - i), cpu_percent=i,
+                memory_total=8_000_000_000, memory_available=4_000_000_000,
+                memory_used=4_000_000_000, memory_percent=50,
+                disk_usage={"/": {"percent": 40}},
+                network_io={"eth0": {"bytes_recv": i * 1024 * 1024, "bytes_sent": 0}})
+
+    def test_sparse_server_returns_none(self):
+        self._seed(9)
+        self.assertIsNone(MultiMetricCorrelationEngine(self.server, self.config).load_recent_metrics())
+
+    def test_disabled_engine_skips_query(self):
+        self._seed(20)
+        engine = MultiMetricCorrelationEngine(self.server, self.config)
+        engine.enabled = False
+        with self.assertNumQueries(0):
+            self.assertIsNone(engine.load_recent_metrics())
+
+    def test_window_is_chronological(self):
+        self._seed(15)
+        df = MultiMetricCorrelationEngine(self.server, self.config).load_recent_metrics()
+        self.assertEqual(len(df), 15)
+        self.assertEqual(list(df["cpu"]), [float(i) for i in range(15)])
+        self.assertEqual(df["disk"].iloc[-1], 40.0)
+        self.assertEqual(df["network"].iloc[-1], 1.0)
@@ -0,0 +1,151 @@
+"""
+detect_anomalies -- the cron-side pass over the last hour of metrics.
+
+Metrics that already produced an anomaly are skipped, and a spike that is still open
+from the last 10 minutes is not recorded again, whether the earlier anomaly came from a
+previous run or from an earlier metric in the same run.
+"""
+import smtplib
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import Anomaly, EmailAlertConfig, MonitoringConfig, Server, SystemMetric
+
+
+class DetectAnomaliesCommandTests(TestCase):
+    def _server(self, name):
+        server = Server.objects.create(name=name, ip_address="10.7.7.1", username="agent")
+        MonitoringConfig.objects.create(server=server, enabled=True, cpu_threshold=80,
+                                        memory_threshold=90, disk_threshold=90)
+        return server
+
+    def _metric(self, server, cpu, minutes_ago):
+        return SystemMetric.objects.create(
+            server=server, timestamp=timezone.now() - timedelta(minutes=minutes_ago),
+            cpu_percent=cpu, memory_total=8_000_000_000, memory_available=4_000_000_000,
+            memory_used=4_000_000_000, memory_percent=20.0)
+
+    def _run(self, verbosity=2):
+        out = StringIO()
+        call_command("detect_anomalies", verbosity=verbosity, stdout=out)
+        return out.getvalue()
+
+    def test_open_spike_is_recorded_once_per_server(self):
+        a, b = self._server("da-a"), self._server("da-b")
+        for server in (a, b):
+            self._metric(server, 95, minutes_ago=3)
+            self._metric(server, 96, minutes_ago=2)      # same spike, same run
+        out = self._run()
+        self.assertEqual(Anomaly.objects.filter(metric_type="cpu").count(), 2)
+        self.assertEqual(out.count("Skipping duplicate anomaly"), 2)
+
+    def test_flagged_metrics_are_skipped_and_later_samples_dedup(self):
+        server = self._server("da-c")
+        self._metric(server, 95, minutes_ago=3)
+        self._run()
+        first = Anomaly.objects.get()
+        self._metric(server, 97, minutes_ago=1)
+        out = self._run()
+        self.assertIn("Checking 1 metrics", out)          # the flagged metric is not re-read
+        self.assertIn(f"existing anomaly ID: {first.id}", out)
+        self.assertEqual(Anomaly.objects.count(), 1)
+
+    def test_default_verbosity_folds_duplicates_into_the_summary(self):
+        server = self._server("da-d")
+        for minutes_ago in (4, 3, 2):
+            self._metric(server, 95, minutes_ago=minutes_ago)
+        out = self._run(verbosity=1)
+        self.assertNotIn("Skipping duplicate anomaly", out)
+        self.assertEqual(out.count("⚠ Anomaly detected"), 1)
+        self.assertIn("✓ Detected 1 anomaly/anomalies, 2 duplicate(s) skipped in ", out)
+
+    def test_new_anomalies_are_written_in_one_insert_and_explained_in_one_update(self):
+        servers = [self._server(f"da-bulk-{i}") for i in range(3)]
+        for server in servers:
+            server.monitoring_config.use_llm_explanation = True
+            server.monitoring_config.save()
+            self._metric(server, 95, minutes_ago=2)
+        with patch("core.management.commands.detect_anomalies.OllamaAnalyzer") as llm, \
+                CaptureQueriesContext(connection) as ctx:
+            llm.return_value.explain_anomaly.return_value = "runaway batch job"
+            self._run()
+        writes = [q["sql"] for q in ctx.captured_queries if '"core_anomaly"' in q["sql"]]
+        self.assertEqual(sum(sql.startswith("INSERT") for sql in writes), 1)
+        self.assertEqual(sum(sql.startswith("UPDATE") for sql in writes), 1)
+        self.assertEqual(Anomaly.objects.filter(metric_type="cpu", llm_generated=True,
+                                                explanation="runaway batch job").count(), 3)
+
+    def test_llm_explanations_are_requested_concurrently(self):
+        import threading
+        servers = [self._server(f"da-llm-{i}") for i in range(4)]
+        for server in servers:
+            server.monitoring_config.use_llm_explanation = True
+            server.monitoring_config.save()
+            self._metric(server, 95, minutes_ago=2)
+        # Every call waits for all four: only passes if they are in flight together.
+        barrier = threading.Barrier(4, timeout=5)
+
+        def explain(**kw):
+            barrier.wait()
+            return f"explained {kw['server_name']}"
+
+        with patch("core.management.commands.detect_anomalies.OllamaAnalyzer") as llm:
+            llm.return_value.explain_anomaly.side_effect = explain
+            self._run()
+        self.assertEqual(
+            sorted(Anomaly.objects.filter(llm_generated=True).values_list("explanation", flat=True)),
+            [f"explained da-llm-{i}" for i in range(4)])
+
+    def test_alert_emails_share_one_smtp_session(self):
+        EmailAlertConfig.objects.create(username="sender@x.test", smtp_host="smtp.x.test",
+                                        smtp_port=587, use_tls=True, enabled=True)
+        servers = [self._server(f"da-mail-{i}") for i in range(3)]
+        for server in servers:
+            self._metric(server, 97, minutes_ago=3)
+            self._metric(server, 98, minutes_ago=2)
+        MonitoringConfig.objects.filter(server__in=servers).update(cpu_threshold=60)  # -> CRITICAL
+        MonitoringConfig.objects.filter(server=servers[2]).update(alert_suppressed=True)
+        with patch("core.alert_routing.recipients_for", return_value=["ops@x.test"]), \
+                patch("core.views.smtplib.SMTP") as smtp:
+            self._run()
+        self.assertEqual(smtp.call_count, 1)                      # one handshake per run
+        sent = [c.args[0]["Subject"] for c in smtp.return_value.send_message.call_args_list]
+        self.assertEqual(sorted(sent), [f"🚨 Alert: da-mail-{i} - Threshold Exceeded"
+                                        for i in range(2)])      # one per unmuted server
+        smtp.return_value.quit.assert_called_once()
+
+    def test_dropped_smtp_session_is_reopened_for_the_rest(self):
+        EmailAlertConfig.objects.create(username="sender@x.test", smtp_host="smtp.x.test",
+                                        smtp_port=587, use_tls=True, enabled=True)
+        servers = [self._server(f"da-drop-{i}") for i in range(3)]
+        for server in servers:
+            self._metric(server, 97, minutes_ago=3)
+            self._metric(server, 98, minutes_ago=2)
+        MonitoringConfig.objects.filter(server__in=servers).update(cpu_threshold=60)
+        sent = []
+
+        def session(dies_after=None):
+            s = MagicMock()
+            s.noop.return_value = (250, b"OK")
+
+            def send(msg):
+                if dies_after is not None and len(sent) >= dies_after:
+                    s.noop.side_effect = smtplib.SMTPServerDisconnected("idle cut")
+                    raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+                sent.append(msg["Subject"])
+            s.send_message.side_effect = send
+            return s
+
+        with patch("core.alert_routing.recipients_for", return_value=["ops@x.test"]), \
+                patch("core.views.smtplib.SMTP", side_effect=[session(dies_after=1), session()]) as smtp:
+            self._run()
+        self.assertEqual(smtp.call_count, 2)                      # reconnected once
+        self.assertEqual(sorted(sent), [f"🚨 Alert: da-drop-{i} - Threshold Exceeded"
+                                        for i in range(3)])      # nobody's alert was dropped
@@ -0,0 +1,57 @@
+"""
+detect_memory_leaks -- records leak findings against each server's latest metric,
+at most once per (server, metric_name) while an earlier finding is still open.
+"""
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import Anomaly, MonitoringConfig, Server, SystemMetric
+
+FINDING = {"metric_type": "memory", "metric_name": "memory_leak", "metric_value": 512.0,
+           "anomaly_score": 0.95, "severity": "MEDIUM", "explanation": "RAM climbing"}
+
+
+class DetectMemoryLeaksCommandTests(TestCase):
+    def _server(self, name):
+        server = Server.objects.create(name=name, ip_address="10.8.8.1", username="agent")
+        MonitoringConfig.objects.create(server=server, enabled=True)
+        now = timezone.now()
+        for minutes_ago in (10, 5):
+            SystemMetric.objects.create(
+                server=server, timestamp=now - timedelta(minutes=minutes_ago),
+                cpu_percent=10, memory_total=8_000_000_000, memory_available=4_000_000_000,
+                memory_used=4_000_000_000, memory_percent=50.0)
+        return server
+
+    def _run(self):
+        out = StringIO()
+        with patch("core.management.commands.detect_memory_leaks.detect_leaks",
+                   return_value=[dict(FINDING)]):
+            call_command("detect_memory_leaks", stdout=out)
+        return out.getvalue()
+
+    def test_finding_is_tied_to_the_latest_metric_and_deduplicated(self):
+        server = self._server("ml-a")
+        self._run()
+        anomaly = Anomaly.objects.get()
+        self.assertEqual(anomaly.metric,
+                         SystemMetric.objects.filter(server=server).latest("timestamp"))
+        out = self._run()
+        self.assertIn("Skipping duplicate leak: ml-a - memory_leak", out)
+        self.assertEqual(Anomaly.objects.count(), 1)
+
+    def test_lookups_do_not_scale_with_server_count(self):
+        for i in range(5):
+            self._server(f"ml-{i}")
+        with CaptureQueriesContext(connection) as ctx:
+            self._run()
+        self.assertEqual(Anomaly.objects.count(), 5)
+        # servers + open findings up front, then one INSERT per new finding.
+        self.assertEqual(len(ctx.captured_queries), 2 + 5)
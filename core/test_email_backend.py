@@ -0,0 +1,70 @@
+"""
+DatabaseEmailBackend -- SMTP settings come from EmailAlertConfig, and idle connections
+are pooled between sends so a burst of alerts pays the TCP/TLS/AUTH handshake once.
+SMTP is mocked; nothing leaves the process.
+"""
+from unittest.mock import MagicMock, patch
+
+from django.core.mail import EmailMessage
+from django.test import TestCase
+
+from core import email_backend
+from core.email_backend import DatabaseEmailBackend
+from core.models import EmailAlertConfig
+
+
+def _smtp():
+    conn = MagicMock()
+    conn.noop.return_value = (250, b"OK")
+    return conn
+
+
+class SmtpPoolTests(TestCase):
+    def setUp(self):
+        EmailAlertConfig.objects.create(
+            provider="custom", smtp_host="smtp.test", smtp_port=587, use_tls=False,
+            username="alerts@x.test", password="pw")
+        email_backend._SMTP_POOL.clear()
+        self.addCleanup(email_backend._SMTP_POOL.clear)
+
+    def _send(self):
+        backend = DatabaseEmailBackend()
+        return backend.send_messages([EmailMessage("s", "b", "alerts@x.test", ["ops@x.test"])])
+
+    def test_connection_is_reused_across_sends(self):
+        conn = _smtp()
+        with patch("core.email_backend.smtplib.SMTP", return_value=conn) as dial:
+            self.assertEqual(self._send(), 1)
+            self.assertEqual(self._send(), 1)
+        self.assertEqual(dial.call_count, 1)
+        self.assertEqual(conn.sendmail.call_count, 2)
+        conn.quit.assert_not_called()
+
+    def test_dead_pooled_connection_is_replaced(self):
+        stale, fresh = _smtp(), _smtp()
+        stale.noop.side_effect = OSError("connection reset")
+        with patch("core.email_backend.smtplib.SMTP", side_effect=[stale, fresh]) as dial:
+            self._send()
+            self._send()
+        self.assertEqual(dial.call_count, 2)
+        fresh.sendmail.assert_called_once()
+
+    def test_failed_send_is_not_pooled(self):
+        conn = _smtp()
+        conn.sendmail.side_effect = OSError("broken pipe")
+        with patch("core.email_backend.smtplib.SMTP", return_value=conn):
+            with self.assertRaises(OSError):
+                self._send()
+        self.assertEqual(email_backend._SMTP_POOL, {})
+        conn.quit.assert_called_once()
+
+    def test_pool_is_keyed_without_plaintext_and_drops_stale_credentials(self):
+        old, new = _smtp(), _smtp()
+        with patch("core.email_backend.smtplib.SMTP", side_effect=[old, new]) as dial:
+            self._send()
+            self.assertNotIn("pw", repr(list(email_backend._SMTP_POOL.items())))
+            EmailAlertConfig.objects.update(password="rotated")
+            self._send()
+        self.assertEqual(dial.call_count, 2)
+        old.quit.assert_called_once()                   # not reused under the new password
+        new.login.assert_called_once_with("alerts@x.test", "rotated")
@@ -67,6 +67,17 @@ class LicensingTests(TestCase):
         self.assertEqual(info.edition, "pro")
         self.assertEqual(info.max_servers, 50)
 
+    def test_public_key_parsed_once_and_follows_settings(self):
+        blob = self._mint()
+        licensing._load_public_key.cache_clear()
+        licensing.verify_blob(blob)
+        licensing.verify_blob(blob)
+        self.assertEqual(licensing._load_public_key.cache_info().misses, 1)
+        other = Ed25519PrivateKey.generate().public_key().public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        with override_settings(LICENSE_PUBLIC_KEY_B64=base64.b64encode(other).decode()):
+            self.assertIsNone(licensing.verify_blob(blob))      # not signed by this key
+
     def test_tampered_rejected(self):
         self.assertIsNone(licensing.verify_blob(self._mint()[:-3] + "xxx"))
 
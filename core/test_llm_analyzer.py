@@ -0,0 +1,19 @@
+"""Ollama calls go through the shared kept-alive session in core.http."""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from core import http
+from core.llm_analyzer import OllamaAnalyzer
+
+
+@override_settings(LLM_ENABLED=True, OLLAMA_API_URL="http://ollama.test:11434")
+class OllamaSessionTests(SimpleTestCase):
+    def test_calls_reuse_the_shared_session(self):
+        analyzer = OllamaAnalyzer()
+        with patch.object(http.session, "post") as mock_post:
+            mock_post.return_value.json.return_value = {"response": "ok"}
+            self.assertEqual(analyzer._call_ollama("a"), "ok")
+            self.assertEqual(analyzer._call_ollama("b"), "ok")
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(mock_post.call_args.args[0], "http://ollama.test:11434/api/generate")
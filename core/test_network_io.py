@@ -0,0 +1,49 @@
+"""Host network totals from SystemMetric.network_io.
+
+Loopback and container plumbing (docker0, veth*) re-count traffic already seen on the
+physical NIC, so they are left out of the sum; malformed payloads sum to zero. Chart
+throughput is the per-second delta between consecutive totals.
+"""
+from datetime import datetime, timedelta, timezone
+
+from django.test import SimpleTestCase
+
+from core.network_io import sum_network_io, throughput_series
+
+
+class SumNetworkIoTests(SimpleTestCase):
+    def test_sums_real_interfaces_only(self):
+        net = {
+            "eth0": {"bytes_sent": 100, "bytes_recv": 1000},
+            "ens5": {"bytes_sent": 5, "bytes_recv": 50},
+            "lo": {"bytes_sent": 9999, "bytes_recv": 9999},
+            "docker0": {"bytes_sent": 7777, "bytes_recv": 7777},
+            "veth1a2b": {"bytes_sent": 3333, "bytes_recv": 3333},
+        }
+        self.assertEqual(sum_network_io(net), (105, 1050))
+
+    def test_malformed_payloads_sum_to_zero(self):
+        self.assertEqual(sum_network_io(None), (0, 0))
+        self.assertEqual(sum_network_io([]), (0, 0))
+        self.assertEqual(sum_network_io({"eth0": "n/a", "eth1": {"bytes_sent": None}}), (0, 0))
+
+
+class ThroughputSeriesTests(SimpleTestCase):
+    def setUp(self):
+        self.t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def _at(self, seconds):
+        return self.t0 + timedelta(seconds=seconds)
+
+    def test_rates_between_consecutive_samples(self):
+        samples = [(self._at(0), 1000, 5000), (self._at(10), 2000, 6000),
+                   (self._at(40), 2300, 9000)]
+        self.assertEqual(throughput_series(samples),
+                         [(self._at(10), 100.0, 100.0), (self._at(40), 10.0, 100.0)])
+
+    def test_counter_reset_is_zero_and_zero_gap_is_dropped(self):
+        samples = [(self._at(0), 9000, 9000), (self._at(30), 300, 600),
+                   (self._at(30), 400, 700), (self._at(60), 1000, 1300)]
+        self.assertEqual(throughput_series(samples),
+                         [(self._at(30), 0.0, 0.0), (self._at(60), 20.0, 20.0)])
+        self.assertEqual(throughput_series(samples[:1]), [])
@@ -5,12 +5,18 @@ Validates the deny-by-default middleware across role × endpoint, including
 denied cases, unauthenticated, and unknown-role. Run:
     python manage.py test core.test_rbac
 """
+import io
+
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from core import permissions as perms
-from core.models import Privilege, Role, UserACL
+from core.models import Privilege, Role, RolePrivilege, UserACL
 
 
 class RBACTestBase(TestCase):
@@ -86,6 +92,28 @@ class CapabilityResolutionTests(TestCase):
         self.assertEqual(acl.role.name, perms.ROLE_OPERATOR)
         self.assertEqual(perms.effective_capabilities(u), frozenset({perms.VIEW_OPERATIONS}))
 
+    def test_capabilities_are_resolved_once_per_role(self):
+        u = User.objects.create_user("cached", "cc@x.com", "pw", is_staff=True)
+        UserACL.get_or_create_for_user(u)
+        first = perms.effective_capabilities(u)
+        with self.assertNumQueries(0):
+            self.assertEqual(perms.effective_capabilities(u), first)
+            self.assertTrue(perms.user_can(u, perms.VIEW_OPERATIONS))
+        u.acl.role = Role.objects.get(name=perms.ROLE_CEO)       # role switch is not stale
+        self.assertIn(perms.VIEW_EXECUTIVE, perms.effective_capabilities(u))
+
+    def test_template_privilege_checks_share_one_lookup(self):
+        u = User.objects.create_user("tpl", "t@x.com", "pw", is_staff=True)
+        acl = UserACL.get_or_create_for_user(u)
+        RolePrivilege.objects.create(role=acl.role, privilege=Privilege.objects.create(
+            key="add_server", label="Add Server"))                 # not an RBAC capability
+        u = User.objects.get(pk=u.pk)                               # fresh: nothing cached yet
+        tpl = Template('{% load rbac_tags %}' + '{{ u|has_privilege:"add_server" }}' * 15
+                       + '{% check_privilege u "manage_users" as m %}{{ m }}' * 15)
+        with self.assertNumQueries(2):                              # the ACL, then its role's keys
+            out = tpl.render(Context({"u": u}))
+        self.assertEqual(out, "True" * 15 + "False" * 15)
+
     def test_landing_pages(self):
         self.assertEqual(perms.ROLE_LANDING[perms.ROLE_CEO], perms.LANDING_EXECUTIVE)
         self.assertEqual(perms.ROLE_LANDING[perms.ROLE_OPERATOR], perms.LANDING_OPERATIONS)
@@ -98,6 +126,44 @@ class CapabilityResolutionTests(TestCase):
         self.assertNotEqual(perms.WRITE_FALLBACK_CAPABILITY, perms.VIEW_OPERATIONS)
 
 
+class SetupRbacTests(TestCase):
+    """setup_rbac / sync_roles seed the matrix in a fixed number of queries."""
+
+    def test_sync_roles_query_count_does_not_grow_with_the_matrix(self):
+        perms.sync_roles()
+        op = Role.objects.get(name=perms.ROLE_OPERATOR)
+        RolePrivilege.objects.filter(role=op).delete()
+        RolePrivilege.objects.create(role=op, privilege=Privilege.objects.get(key=perms.MANAGE_USERS))
+        with CaptureQueriesContext(connection) as ctx:
+            perms.sync_roles()
+        self.assertLess(len(ctx.captured_queries), 4 * len(perms.ROLE_CAPABILITIES) + 4)
+        self.assertEqual(
+            set(RolePrivilege.objects.filter(role=op).values_list("privilege__key", flat=True)),
+            set(perms.ROLE_CAPABILITIES[perms.ROLE_OPERATOR]))
+
+    def test_setup_rbac_assigns_missing_and_corrects_superuser_roles(self):
+        perms.sync_roles()
+        su = User.objects.create_superuser("setup_su", "su@x.com", "pw")     # no ACL yet
+        demoted = User.objects.create_superuser("setup_su2", "su2@x.com", "pw")
+        UserACL.objects.update_or_create(
+            user=demoted, defaults={"role": Role.objects.get(name=perms.ROLE_OPERATOR)})
+        roleless = User.objects.create_user("setup_nr", "nr@x.com", "pw", is_staff=True)
+        UserACL.objects.update_or_create(user=roleless, defaults={"role": None})
+        ceo = User.objects.create_user("setup_ceo", "ceo@x.com", "pw", is_staff=True)
+        UserACL.objects.update_or_create(
+            user=ceo, defaults={"role": Role.objects.get(name=perms.ROLE_CEO)})
+
+        self.assertFalse(UserACL.objects.filter(user=su).exists())
+
+        call_command("setup_rbac", stdout=io.StringIO())
+
+        self.assertEqual(UserACL.objects.get(user=su).role.name, perms.ROLE_ADMIN)
+        roles = dict(UserACL.objects.values_list("user__username", "role__name"))
+        self.assertEqual(roles["setup_su2"], perms.ROLE_ADMIN)
+        self.assertEqual(roles["setup_nr"], perms.ROLE_OPERATOR)
+        self.assertEqual(roles["setup_ceo"], perms.ROLE_CEO)        # explicit roles are kept
+
+
 class ViewAccessTests(RBACTestBase):
     def test_operations_dashboard_all_staff_with_view(self):
         self.assertEqual(self._get(self.admin, "monitoring_dashboard").status_code, 200)
@@ -127,6 +127,13 @@ class ImpersonationTests(TestCase):
         self.assertEqual(denied.actor, self.admin)            # real actor preserved
         self.assertEqual(denied.impersonated_target, self.operator)
 
+    def test_audit_denied_records_first_forwarded_hop(self):
+        self.client.force_login(self.operator)
+        self.client.post(reverse("add_server"), {},
+                         HTTP_X_FORWARDED_FOR="203.0.113.4 , 10.0.0.1, 10.0.0.2")
+        denied = AuditLog.objects.get(result=AuditLog.Result.DENIED, actor=self.operator)
+        self.assertEqual(denied.ip_address, "203.0.113.4")
+
     def test_audit_denied_on_blocked_impersonation(self):
         self.client.force_login(self.admin)
         self._start(self.ceo)  # peer -> denied
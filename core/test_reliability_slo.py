@@ -6,16 +6,20 @@ Phase 2: the compliance job populates SLIMeasurement against the realigned SLO d
 compliance API reports a correct compliant-server count, MTTR reuses the anomaly window logic,
 and the reliability timeseries is real availability + check-failure (no alert×10 proxy)."""
 from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 
 from django.contrib.auth.models import User
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
 from core.models import (
     Server, SyntheticCheck, SyntheticCheckResult, SystemMetric,
-    Anomaly, SLIMeasurement, SLOConfig,
+    Anomaly, SLIConfig, SLIMeasurement, SLOConfig,
 )
 from core import sli_utils
 
@@ -38,10 +42,11 @@ class SliCalculatorTests(TestCase):
             synthetic_check=check, success=success, response_time_ms=ms,
             timestamp=timezone.now() - timedelta(minutes=10))
 
-    def _metric(self, cpu=0.0, mem=0.0, disk_percent=None):
-        du = {"/": {"percent": disk_percent}} if disk_percent is not None else {}
+    def _metric(self, cpu=0.0, mem=0.0, disk_percent=None, disk_usage=None, net=(None, None)):
+        du = {"/": {"percent": disk_percent}} if disk_percent is not None else disk_usage or {}
         return SystemMetric.objects.create(
             server=self.server, cpu_percent=cpu, memory_percent=mem, disk_usage=du,
+            net_utilization_sent=net[0], net_utilization_recv=net[1],
             timestamp=timezone.now() - timedelta(minutes=5), **_MEM)
 
     # --- synthetic-based SLIs (availability / check-failure / response time) ---
@@ -86,6 +91,41 @@ class SliCalculatorTests(TestCase):
         self._metric(disk_percent=95)                # > 90  -> 4/5 = 80
         self.assertEqual(sli_utils.calculate_disk_sli(self.server, self.start, self.end), 80.0)
 
+    def test_disk_sli_counts_root_percent_in_sql_and_falls_back_per_sample(self):
+        for p in [10, 95]:
+            self._metric(disk_percent=p)
+        for du in ({"C:\\": {"percent": 50}, "D:\\": {"percent": 70}},   # mean 60 -> under
+                   {"C:\\": {"percent": 99}},                           # over
+                   {"/": {"percent": None}, "/boot": {"percent": 5}},     # null root: skipped
+                   {}):                                                   # no mounts: skipped
+            self._metric(disk_usage=du)
+        with self.assertNumQueries(2):               # the counts, then only the non-root rows
+            value = sli_utils.calculate_disk_sli(self.server, self.start, self.end)
+        self.assertEqual(value, 50.0)                # 10 and C:/D: of the 4 counted samples
+
+    def test_network_sli_averages_directions_in_one_query(self):
+        for net in [(10, 30), (100, 70), (None, 150), (150, None), (None, None)]:
+            self._metric(net=net)                    # means 20, 85, 75, 75; the last is no sample
+        with self.assertNumQueries(1):
+            value = sli_utils.calculate_network_sli(self.server, self.start, self.end)
+        self.assertEqual(value, 75.0)                # 3 of 4 at/under 80
+
+    def test_bulk_values_match_per_server_calculators(self):
+        other = Server.objects.create(name="rel-vm-2", ip_address="10.9.9.7", username="agent")
+        c = self._check()
+        for ok, ms in [(True, 100), (True, 300), (False, None)]:
+            self._result(c, ok, ms=ms)
+        for cpu, mem in [(10, 95), (90, 20), (50, 30)]:
+            self._metric(cpu=cpu, mem=mem, disk_percent=cpu, net=(cpu, mem))
+        servers = [self.server, other]
+
+        for metric_type in ("UPTIME", "ERROR_RATE", "RESPONSE_TIME", "CPU", "MEMORY", "DISK",
+                            "NETWORK"):
+            with self.subTest(metric_type=metric_type):
+                bulk = sli_utils.bulk_calculate_sli_values(servers, metric_type, self.start, self.end)
+                self.assertEqual(bulk, {self.server.id: sli_utils.calculate_sli_value(
+                    self.server, metric_type, self.start, self.end)})   # no data -> absent
+
     def test_resource_sli_none_when_no_metrics(self):
         self.assertIsNone(sli_utils.calculate_cpu_sli(self.server, self.start, self.end))
         self.assertIsNone(sli_utils.calculate_memory_sli(self.server, self.start, self.end))
@@ -188,6 +228,86 @@ class ComplianceJobTests(TestCase):
         # DISK has no per-sample data -> skipped, not fabricated.
         self.assertIsNone(self._latest("DISK"))
 
+    def test_job_writes_one_row_per_measured_pair_across_servers(self):
+        # Self-contained config (independent of the seeded defaults): CPU + MEMORY only.
+        SLIConfig.objects.all().delete()
+        SLOConfig.objects.all().delete()
+        for metric_type in ("CPU", "MEMORY"):
+            SLIConfig.objects.create(metric_type=metric_type, time_window_days=7)
+            SLOConfig.objects.create(server=None, metric_type=metric_type, target_value=95.0)
+        other = Server.objects.create(name="job-vm-2", ip_address="10.9.9.6", username="agent")
+        SystemMetric.objects.create(server=other, cpu_percent=99.0, memory_percent=10.0,
+            disk_usage={}, timestamp=timezone.now() - timedelta(minutes=5), **_MEM)
+
+        call_command("calculate_sli_compliance", verbosity=0)
+
+        self.assertEqual(SLIMeasurement.objects.count(), 4)
+        self.assertTrue(self._latest("CPU").is_compliant)
+        other_cpu = SLIMeasurement.objects.get(server=other, metric_type="CPU")
+        self.assertEqual(other_cpu.sli_value, 0.0)
+        self.assertFalse(other_cpu.is_compliant)
+
+    def test_measurements_flushed_in_batches_all_land(self):
+        SLIConfig.objects.all().delete()
+        SLOConfig.objects.all().delete()
+        for metric_type in ("CPU", "MEMORY"):
+            SLIConfig.objects.create(metric_type=metric_type, time_window_days=7)
+            SLOConfig.objects.create(server=None, metric_type=metric_type, target_value=95.0)
+        for i in range(3):
+            other = Server.objects.create(name=f"batch-vm-{i}", ip_address=f"10.9.8.{i}", username="agent")
+            SystemMetric.objects.create(server=other, cpu_percent=10.0, memory_percent=10.0,
+                disk_usage={}, timestamp=timezone.now() - timedelta(minutes=5), **_MEM)
+
+        with patch("core.management.commands.calculate_sli_compliance.MEASUREMENT_BATCH_SIZE", 3):
+            call_command("calculate_sli_compliance", verbosity=0, stdout=StringIO())
+
+        self.assertEqual(SLIMeasurement.objects.count(), 8)    # 4 servers x 2 metrics
+
+    def test_summary_counts_only_this_runs_measurements(self):
+        SLIConfig.objects.all().delete()
+        SLOConfig.objects.all().delete()
+        SLIConfig.objects.create(metric_type="CPU", time_window_days=7)
+        SLOConfig.objects.create(server=None, metric_type="CPU", target_value=95.0)
+        call_command("calculate_sli_compliance", verbosity=0, stdout=StringIO())
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("calculate_sli_compliance", verbosity=0, stdout=out, no_color=True)
+
+        # The summary comes from the loop's counters, not a query over the written rows
+        self.assertFalse([q for q in ctx.captured_queries
+                          if q["sql"].startswith("SELECT") and '"core_slimeasurement"' in q["sql"]])
+        self.assertEqual(SLIMeasurement.objects.count(), 2)     # earlier run's row not re-counted
+        self.assertIn("Calculated: 1", out.getvalue())
+        self.assertIn("Compliant: 1", out.getvalue())
+        self.assertIn("Non-Compliant: 0", out.getvalue())
+
+
+class SloConfigMapTests(TestCase):
+    """get_slo_config_map/resolve_slo_config mirror get_slo_config's precedence (server
+    override, then global default) from a single query, so the compliance job can resolve
+    every server x metric pair without per-pair lookups."""
+
+    def setUp(self):
+        self.a = Server.objects.create(name="slo-a", ip_address="10.9.9.4", username="agent")
+        self.b = Server.objects.create(name="slo-b", ip_address="10.9.9.5", username="agent")
+        SLOConfig.objects.filter(metric_type__in=["CPU", "MEMORY"]).delete()
+        SLOConfig.objects.create(server=None, metric_type="CPU", target_value=95.0)
+        SLOConfig.objects.create(server=self.a, metric_type="CPU", target_value=80.0)
+        SLOConfig.objects.create(server=self.b, metric_type="MEMORY", target_value=70.0,
+                                 enabled=False)
+
+    def test_matches_per_pair_lookup_in_one_query(self):
+        with self.assertNumQueries(1):
+            slo_map = sli_utils.get_slo_config_map([self.a, self.b], ["CPU", "MEMORY"])
+        for server in (self.a, self.b):
+            for metric_type in ("CPU", "MEMORY"):
+                self.assertEqual(sli_utils.resolve_slo_config(slo_map, server, metric_type),
+                                 sli_utils.get_slo_config(server, metric_type))
+        self.assertEqual(sli_utils.resolve_slo_config(slo_map, self.a, "CPU").target_value, 80.0)
+        self.assertEqual(sli_utils.resolve_slo_config(slo_map, self.b, "CPU").target_value, 95.0)
+        self.assertIsNone(sli_utils.resolve_slo_config(slo_map, self.b, "MEMORY"))
+
 
 class ComplianceApiTests(TestCase):
     """dashboard_sli_compliance_api returns a real compliant-server count (not the old
@@ -8,9 +8,13 @@ data INSIDE the window; the secondary risks are off-by-one boundaries, the wrong
 config not being honored, and daily roll-ups (kept 365d) being pruned with the raw window.
 """
 from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from core.models import (
@@ -199,6 +203,19 @@ class OperationalSafetyTests(_Base):
         call_command("prune_old_data", dry_run=True)
         self.assertEqual(SystemMetric.objects.count(), 1)        # nothing deleted
 
+    def test_dry_run_reports_per_table_counts(self):
+        _set_retention(30)
+        self._seed_every_pruned_model(timezone.now() - timedelta(days=100))
+        self._metric(timezone.now() - timedelta(days=100))
+        self._metric(timezone.now() - timedelta(days=1))        # inside the window
+        out = StringIO()
+        # Counted by the single combined query, not the per-table fallback
+        with self.assertNoLogs("core.management.commands.prune_old_data", level="WARNING"):
+            call_command("prune_old_data", dry_run=True, stdout=out)
+        self.assertRegex(out.getvalue(), r"would prune\s+2 SystemMetric")
+        self.assertRegex(out.getvalue(), r"would prune\s+1 AggregatedMetric\(hourly\)")
+        self.assertIn("Would prune 9 row(s) total.", out.getvalue())
+
     def test_idempotent(self):
         _set_retention(30)
         self._metric(timezone.now() - timedelta(days=100))
@@ -212,6 +229,42 @@ class OperationalSafetyTests(_Base):
         call_command("prune_old_data")
         self.assertEqual(SystemMetric.objects.count(), 0)
 
+    def test_metric_batches_drain_past_the_batch_size(self):
+        _set_retention(30)
+        for i in range(5):
+            self._metric(timezone.now() - timedelta(days=100 + i))
+        keep = self._metric(timezone.now() - timedelta(days=1))
+        with patch("core.management.commands.prune_old_data.BATCH", 2):
+            call_command("prune_old_data")
+        self.assertEqual(list(SystemMetric.objects.values_list("pk", flat=True)), [keep.pk])
+
+    def test_recent_anomaly_on_an_old_metric_goes_with_it(self):
+        # The raw metric DELETE bypasses the collector, so the Anomaly FK cascade is
+        # handled explicitly -- including anomalies stamped inside the window.
+        _set_retention(30)
+        old = self._metric(timezone.now() - timedelta(days=100))
+        Anomaly.objects.create(server=self.server, metric=old, timestamp=timezone.now(),
+                               metric_type="cpu", metric_name="cpu_percent", metric_value=10,
+                               anomaly_score=0.5, severity="LOW")
+        call_command("prune_old_data")
+        self.assertEqual(SystemMetric.objects.count(), 0)
+        self.assertEqual(Anomaly.objects.count(), 0)
+
+    def test_cascaded_anomalies_are_deleted_in_batches(self):
+        _set_retention(30)
+        old = self._metric(timezone.now() - timedelta(days=100))
+        for _ in range(5):
+            Anomaly.objects.create(server=self.server, metric=old, timestamp=timezone.now(),
+                                   metric_type="cpu", metric_name="cpu_percent", metric_value=10,
+                                   anomaly_score=0.5, severity="LOW")
+        with patch("core.management.commands.prune_old_data.BATCH", 2), \
+                CaptureQueriesContext(connection) as ctx:
+            call_command("prune_old_data")
+        anomaly_deletes = [q for q in ctx.captured_queries
+                           if q["sql"].startswith('DELETE FROM "core_anomaly"')]
+        self.assertEqual(len(anomaly_deletes), 3)        # 2 + 2 + 1 rows
+        self.assertEqual(Anomaly.objects.count(), 0)
+
 
 class StaleServiceOrphanTests(_Base):
     """Stale auto-detected service rows (unmonitored + stopped + >24h unseen) are orphans left
@@ -14,7 +14,7 @@ from django.test import TestCase
 from django.utils import timezone
 
 from core.models import Server, SSHAuthEvent, SecurityEvent, SecurityMonitorConfig
-from core.security_monitor import detect_ssh_brute_force, detect_security_events
+from core.security_monitor import _upsert_event, detect_ssh_brute_force, detect_security_events
 
 
 class SshBruteForceDetectionTests(TestCase):
@@ -108,6 +108,15 @@ class SshBruteForceDetectionTests(TestCase):
         self.assertEqual(evs.count(), 1)
         self.assertEqual(evs.first().event_count, 8)    # updated count
 
+    def test_update_is_one_lookup_and_one_write(self):
+        args = (SecurityEvent.EventType.SSH_BRUTE_FORCE, SecurityEvent.Severity.HIGH, "t", "d")
+        _upsert_event(*args, source_ip="1.2.3.4", server=self.server, metadata={"k": 1})
+        with self.assertNumQueries(2):                  # no deferred-field refetch
+            ev, created = _upsert_event(*args, source_ip="1.2.3.4", server=self.server, count=7)
+        self.assertFalse(created)
+        ev.refresh_from_db()
+        self.assertEqual((ev.event_count, ev.metadata), (7, {"k": 1}))   # metadata kept
+
     def test_resolved_event_does_not_suppress_a_fresh_attack(self):
         self._ssh("1.2.3.4", n=5)
         ev = self._detect()[0]
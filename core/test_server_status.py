@@ -5,14 +5,20 @@ heartbeat for ~55s. The old 60s offline threshold therefore flapped a running se
 "offline" on a single transient blip. The threshold is now tolerant (default 180s):
 a few missed pushes are absorbed; a real, sustained gap still goes offline.
 """
-from datetime import timedelta
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
 
 from django.core.cache import cache
 from django.test import TestCase, override_settings
+from django.urls import reverse
 from django.utils import timezone
 
+from core.management.commands.track_app_heartbeat import record_app_heartbeat
 from core.models import Server, ServerHeartbeat
-from core.views import _calculate_server_status
+from core.testing import FleetQueryCountMixin
+from core.views import _app_was_down, _calculate_server_status
 
 
 class OfflineThresholdTests(TestCase):
@@ -51,3 +57,108 @@ class OfflineThresholdTests(TestCase):
     def test_threshold_is_operator_tunable(self):
         self._heartbeat(120)                      # beyond the tuned 90s
         self.assertEqual(_calculate_server_status(self.server), "offline")
+
+
+class AppHeartbeatTests(TestCase):
+    def test_direct_record_marks_app_up_in_cache_and_file(self):
+        # metrics_scheduler calls record_app_heartbeat() directly (no call_command).
+        cache.delete("monitoring_app_heartbeat")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "hb.txt")
+            with override_settings(APP_HEARTBEAT_FILE=path):
+                stamp = record_app_heartbeat()
+            with open(path) as f:
+                self.assertEqual(f.read(), stamp)
+        # The cache holds the same instant as epoch seconds; the file keeps the ISO form.
+        self.assertEqual(cache.get("monitoring_app_heartbeat"),
+                         int(datetime.fromisoformat(stamp).timestamp()))
+        self.assertFalse(_app_was_down())
+        cache.set("monitoring_app_heartbeat", int(time.time()) - 400)
+        self.assertTrue(_app_was_down())
+
+    def test_rewrite_replaces_the_file_instead_of_truncating_it(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "hb.txt")
+            with override_settings(APP_HEARTBEAT_FILE=path):
+                first = record_app_heartbeat()
+                with open(path) as reader:                   # a reader mid-way through
+                    second = record_app_heartbeat()
+                    self.assertEqual(reader.read(), first)  # never sees a truncated file
+            with open(path) as f:
+                self.assertEqual(f.read(), second)
+            self.assertEqual(os.listdir(tmp), ["hb.txt"])   # no temp file left behind
+
+
+class ServerListQueryTests(FleetQueryCountMixin, TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.admin = User.objects.create_superuser("sl-admin", "sl@x.test", "pw")
+        self.client.force_login(self.admin)
+        self.servers = []
+
+    def _server(self, heartbeat_age=0, cached=False):
+        from core.models import MonitoringConfig, SystemMetric
+        i = len(self.servers) + 1
+        server = Server.objects.create(name=f"sl-{i}", ip_address=f"10.0.1.{i}", username="agent")
+        MonitoringConfig.objects.create(server=server, enabled=True)
+        ServerHeartbeat.objects.create(
+            server=server, last_heartbeat=timezone.now() - timedelta(seconds=heartbeat_age))
+        for cpu in (10.0, 42.0):            # the newer sample is the one listed
+            SystemMetric.objects.create(
+                server=server, cpu_percent=cpu, memory_percent=50, memory_total=8_000_000_000,
+                memory_available=4_000_000_000, memory_used=4_000_000_000, disk_usage={},
+                timestamp=timezone.now() - timedelta(minutes=60 - cpu))
+        if cached:                          # what live_metrics reads
+            cache.set(f"metrics:{server.id}:latest", {"server_id": server.id, "cpu_percent": 5})
+        self.servers.append(server)
+        return server
+
+    def _add_servers(self, n, cached=False):
+        for _ in range(n):
+            self._server(cached=cached)
+
+    def _get(self, name):
+        return self.client.get(reverse(name))
+
+    def test_rows_show_the_latest_metric_and_status(self):
+        self._server()
+        self._server(heartbeat_age=3600)
+        r = self._get("server_list")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([s.cpu_percent for s in r.context["servers"]], [42.0, 42.0])
+        self.assertEqual([s.status for s in r.context["servers"]], ["online", "offline"])
+
+    def test_server_list_queries_do_not_grow_with_fleet(self):
+        self._server()
+        r = self.assertQueryCountIndependentOfFleet(lambda: self._get("server_list"),
+                                                    self._add_servers)
+        self.assertEqual(len(r.context["servers"]), 5)
+
+    def test_live_metrics_reports_each_servers_status(self):
+        self.addCleanup(cache.clear)
+        self._server(cached=True)
+        self._server(heartbeat_age=3600, cached=True)
+        statuses = {m["server_id"]: m["status"] for m in self._get("live_metrics").json()["metrics"]}
+        self.assertEqual(statuses, {self.servers[0].id: "online", self.servers[1].id: "offline"})
+
+    def test_live_metrics_queries_do_not_grow_with_fleet(self):
+        self.addCleanup(cache.clear)
+        self._server(cached=True)
+        self.assertQueryCountIndependentOfFleet(lambda: self._get("live_metrics"),
+                                                lambda n: self._add_servers(n, cached=True))
+
+    def test_dashboard_counts_stale_and_suspended_servers_as_offline(self):
+        from core.models import MonitoringConfig
+        self._add_servers(4)
+        self._server(heartbeat_age=3600)
+        MonitoringConfig.objects.filter(server=self.servers[0]).update(monitoring_suspended=True)
+        data = self._get("dashboard_health_status_api").json()["data"]
+        self.assertEqual((data["healthy"], data["offline"], data["total"]), (3, 2, 5))
+        data = self._get("dashboard_summary_stats_api").json()["data"]
+        self.assertEqual(data["critical_vms"], 2)
+
+    def test_dashboard_status_queries_do_not_grow_with_fleet(self):
+        self._server()
+        for name in ("dashboard_health_status_api", "dashboard_summary_stats_api"):
+            with self.subTest(name):
+                self.assertQueryCountIndependentOfFleet(lambda: self._get(name), self._add_servers)
@@ -56,3 +56,36 @@ class ServiceLabelTests(TestCase):
 
     def test_systemd_uses_name(self):
         self.assertEqual(svc(service_type="systemd", name="cron").label, "cron")
+
+
+class ServiceAlertsConfigApiTests(TestCase):
+    """The alert-config service list loads every server's services in one query."""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from core.models import Server
+        admin = get_user_model().objects.create_superuser("boss", "b@x.test", "pw")
+        self.client.force_login(admin)
+        for i in range(4):
+            server = Server.objects.create(name=f"sd-{i}", ip_address=f"10.9.0.{i}", username="agent")
+            for name in ("redis", "nginx"):
+                Service.objects.create(server=server, name=name, service_type="systemd")
+
+    def test_services_are_listed_per_server_without_a_query_each(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+        url = reverse("service_alerts_config_api")
+        self.client.get(url)                       # warm session/permission caches
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(url).json()
+        few = len(ctx.captured_queries)
+        self.assertEqual([s["name"] for s in data["servers"][0]["services"]], ["nginx", "redis"])
+
+        from core.models import Server
+        extra = Server.objects.create(name="sd-9", ip_address="10.9.0.9", username="agent")
+        Service.objects.create(server=extra, name="cron", service_type="systemd")
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(url).json()
+        self.assertEqual(len(data["servers"]), 5)
+        self.assertEqual(len(ctx.captured_queries), few)
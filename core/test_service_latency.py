@@ -3,15 +3,25 @@
 Phase 2: the services ingest stores a ServiceLatencyMeasurement history row for MONITORED
 services when the agent sends a latency sample (push-1.9.0+), stores nothing for unmonitored
 services or old agents, and records a failed probe as latency 0 / success False."""
+import asyncio
 import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest.mock import AsyncMock, patch
 
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
 from core.models import (
     Server, AgentCredential, Service, ServiceLatencyMeasurement, AlertHistory, AppConfig,
+    MonitoringConfig, ServiceAvailabilitySample,
 )
 
 
@@ -50,6 +60,20 @@ class Phase2IngestTests(_IngestBase):
         self.assertTrue(m.success)
         self.assertEqual(m.measurement_type, "TCP")
 
+    def test_failed_history_write_keeps_the_rest_of_the_sync(self):
+        # The sync commits as one transaction; the best-effort history INSERT runs in a
+        # savepoint, so its failure doesn't roll back the upserts or health samples.
+        from django.db import DatabaseError
+        Service.objects.create(server=self.server, name="mysqld", monitoring_enabled=True)
+        with patch.object(ServiceLatencyMeasurement.objects, "bulk_create",
+                          side_effect=DatabaseError("disk full")):
+            r = self._push([self._svc_item(), {"name": "nginx", "status": "running"}])
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(ServiceLatencyMeasurement.objects.count(), 0)
+        self.assertEqual(Service.objects.get(name="mysqld").last_latency_ms, 12.5)
+        self.assertTrue(Service.objects.filter(name="nginx").exists())
+        self.assertEqual(ServiceAvailabilitySample.objects.count(), 1)
+
     def test_no_history_row_for_unmonitored_service(self):
         # New service -> monitoring_enabled defaults False -> no history row (bounds volume).
         r = self._push([self._svc_item()])
@@ -440,3 +464,154 @@ class ServiceAvailabilityTargetTests(_IngestBase):
         b = c.get(reverse("services_overview")).content.decode()
         self.assertIn('data-percent="99.9"', b)                # per-service override, trimmed
         self.assertIn('class="avail-val">99.9</span>', b)
+
+
+class CollectorFanOutTests(TestCase):
+    """collect_service_latency probes every monitored (server, service) pair concurrently
+    (TCP connects on one event loop, HTTP on a thread pool) and stores the measurements on
+    the calling thread; the service list is prefetched once."""
+
+    def setUp(self):
+        self.servers = []
+        for i in range(2):
+            server = Server.objects.create(name=f"lat-{i}", ip_address=f"10.7.7.{i}", username="agent")
+            MonitoringConfig.objects.create(server=server, enabled=True)
+            Service.objects.create(server=server, name="redis", port=6379, monitoring_enabled=True)
+            Service.objects.create(server=server, name="local", port=5432, bind_address="127.0.0.1",
+                                   monitoring_enabled=True)
+            Service.objects.create(server=server, name="off", port=22, monitoring_enabled=False)
+            self.servers.append(server)
+
+    def test_every_monitored_pair_probed_and_stored(self):
+        probed = []
+
+        async def fake_tcp(host, port, timeout=5):
+            probed.append((host, port))
+            return {'latency_ms': 3.0, 'success': True}
+
+        with patch("core.service_latency.measure_tcp_latency_async", side_effect=fake_tcp):
+            call_command("collect_service_latency", verbose=True, stdout=StringIO())
+
+        self.assertEqual(sorted(probed), [("10.7.7.0", 6379), ("10.7.7.1", 6379)])
+        rows = ServiceLatencyMeasurement.objects.filter(measurement_type="TCP", success=True)
+        self.assertEqual(rows.count(), 2)
+        self.assertFalse(ServiceLatencyMeasurement.objects.filter(service__name="local").exists())
+
+    def test_probe_type_matches_http_names_case_insensitively(self):
+        from core.service_latency import probe_type
+        server = self.servers[0]
+        def kind(name, port=9000):
+            return probe_type(Service(server=server, name=name, port=port, monitoring_enabled=True))
+        self.assertEqual([kind("Apache2"), kind("my-WebApp"), kind("redis"), kind("redis", 443)],
+                         ["HTTP", "HTTP", "TCP", "HTTP"])
+
+    def test_measurements_are_written_in_one_insert(self):
+        with patch("core.service_latency.measure_tcp_latency_async",
+                   AsyncMock(return_value={'latency_ms': 3.0, 'success': True})), \
+                CaptureQueriesContext(connection) as ctx:
+            call_command("collect_service_latency", stdout=StringIO())
+        inserts = [q for q in ctx.captured_queries
+                   if q["sql"].startswith('INSERT INTO "core_servicelatencymeasurement"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(ServiceLatencyMeasurement.objects.count(), 2)
+
+    def test_suspended_servers_are_filtered_out_in_the_query(self):
+        MonitoringConfig.objects.filter(server=self.servers[1]).update(monitoring_suspended=True)
+        probed = []
+
+        async def fake_tcp(host, port, timeout=5):
+            probed.append((host, port))
+            return {'latency_ms': 3.0, 'success': True}
+
+        out = StringIO()
+        with patch("core.service_latency.measure_tcp_latency_async", side_effect=fake_tcp):
+            call_command("collect_service_latency", verbose=True, stdout=out)
+
+        self.assertEqual(probed, [("10.7.7.0", 6379)])
+        self.assertNotIn("lat-1", out.getvalue())
+
+    def test_tcp_probes_are_all_in_flight_together(self):
+        """More TCP targets than LATENCY_PROBE_WORKERS still connect concurrently: no
+        probe finishes until every one has started."""
+        from core.service_latency import LATENCY_PROBE_WORKERS, collect_service_latencies
+        pairs = [(self.servers[0], Service(server=self.servers[0], name=f"db{i}", port=7000 + i,
+                                           monitoring_enabled=True))
+                 for i in range(LATENCY_PROBE_WORKERS + 4)]
+        started = []
+
+        async def fake_tcp(host, port, timeout=5):
+            started.append(port)
+            while len(started) < len(pairs):
+                await asyncio.sleep(0)
+            return {'latency_ms': 1.0, 'success': True}
+
+        with patch("core.service_latency.measure_tcp_latency_async", side_effect=fake_tcp), \
+                patch("core.service_latency.ServiceLatencyMeasurement.objects.bulk_create"):
+            results = collect_service_latencies(pairs)
+
+        self.assertEqual([r['port'] for r in results], [s.port for _, s in pairs])
+        self.assertTrue(all(r['result']['success'] for r in results))
+
+    def test_async_tcp_probe_against_real_sockets(self):
+        from core.service_latency import measure_tcp_latency_async
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        self.addCleanup(listener.close)
+        ok = asyncio.run(measure_tcp_latency_async("127.0.0.1", listener.getsockname()[1]))
+        self.assertTrue(ok['success'])
+        self.assertIsNotNone(ok['latency_ms'])
+
+        closed = socket.socket()
+        closed.bind(("127.0.0.1", 0))
+        port = closed.getsockname()[1]
+        closed.close()
+        refused = asyncio.run(measure_tcp_latency_async("127.0.0.1", port))
+        self.assertFalse(refused['success'])
+        self.assertTrue(refused['error_message'].startswith('Socket error'))
+
+    def test_sync_tcp_probe_ignores_a_wall_clock_step(self):
+        from core.service_latency import measure_tcp_latency
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        self.addCleanup(listener.close)
+        with patch("time.time", side_effect=[1000.0, 990.0]):     # NTP steps back mid-probe
+            ok = measure_tcp_latency("127.0.0.1", listener.getsockname()[1])
+        self.assertTrue(ok['success'])
+        self.assertGreaterEqual(ok['latency_ms'], 0)
+
+    def test_http_probes_reuse_the_kept_alive_connection(self):
+        from core.service_latency import measure_http_latency
+        connections = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                connections.append(self.client_address)
+                super().setup()
+
+            def do_GET(self):
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+        server = Server(name="h", ip_address="127.0.0.1")
+        service = Service(server=server, name="web", port=httpd.server_address[1])
+
+        # Each collection run probes from a fresh thread pool; the connection outlives it.
+        results = []
+        for _ in range(3):
+            probe = threading.Thread(target=lambda: results.append(measure_http_latency(server, service)))
+            probe.start()
+            probe.join()
+
+        self.assertEqual([r['status_code'] for r in results], [204] * 3)
+        self.assertEqual(len(connections), 1)
@@ -0,0 +1,78 @@
+"""ServiceScanner starts every remote command before it reads any output."""
+import socket
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.service_scanner import ServiceScanner
+
+
+class _FakeConnection:
+    OUTPUT = {
+        "systemctl": "nginx.service loaded active running nginx\n",
+        "ss": "tcp LISTEN 0 511 0.0.0.0:80 0.0.0.0:*\n",
+        "ps": "USER PID %CPU %MEM VSZ RSS TTY STAT START TIME COMMAND\n"
+              "root 1 2.0 0.1 1 1 ? Ss 00:00 0:01 /sbin/init\n",
+    }
+
+    def __init__(self, stalled=()):
+        self.events = []
+        self.timeouts = []
+        self.stalled = stalled
+
+    def exec_command(self, command, timeout=None):
+        tool = command.split()[0]
+        self.events.append(("exec", tool))
+        self.timeouts.append(timeout)
+
+        def read():
+            self.events.append(("read", tool))
+            if tool in self.stalled:
+                raise socket.timeout()
+            return self.OUTPUT[tool].encode()
+
+        def close():
+            self.events.append(("close", tool))
+        return None, SimpleNamespace(read=read, channel=SimpleNamespace(close=close)), None
+
+
+class ScanServicesTests(SimpleTestCase):
+    def setUp(self):
+        cache.delete("services_1")
+        self.addCleanup(cache.delete, "services_1")
+
+    def test_commands_are_all_started_before_any_output_is_read(self):
+        conn = _FakeConnection()
+        result = ServiceScanner.scan_services(SimpleNamespace(id=1, name="vm"), conn)
+
+        self.assertEqual([kind for kind, _ in conn.events], ["exec"] * 3 + ["read"] * 3)
+        self.assertEqual(result["detected_services"][0]["name"], "nginx")
+        self.assertEqual(result["active_ports"][0]["port"], 80)
+        self.assertEqual(result["running_processes"][0]["name"], "/sbin/init")
+
+    def test_a_stalled_command_only_loses_its_own_part(self):
+        conn = _FakeConnection(stalled=("ss",))
+        result = ServiceScanner.scan_services(SimpleNamespace(id=1, name="vm"), conn)
+
+        self.assertEqual(conn.timeouts, [ServiceScanner.SCAN_TIMEOUT] * 3)
+        self.assertEqual(result["active_ports"], [])
+        self.assertEqual(result["detected_services"][0]["name"], "nginx")
+        self.assertEqual(result["running_processes"][0]["name"], "/sbin/init")
+        self.assertEqual([e for e in conn.events if e[0] == "close"], [("close", "ss")])
+
+
+class ParseSystemdServicesTests(SimpleTestCase):
+    def test_rows_with_a_failed_unit_bullet(self):
+        out = ("  cron.service   loaded active running Regular background program processing\n"
+               "● nginx.service  loaded failed failed  A high performance web server\n"
+               "  short.service\n"
+               "  my.service.d.service loaded active running suffix only\n")
+        self.assertEqual(
+            [(s["name"], s["status"]) for s in ServiceScanner._parse_systemd_services(out)],
+            [("cron", "active"), ("nginx", "failed"), ("short", "unknown"),
+             ("my.service.d", "active")])
+
+    def test_stops_at_the_row_limit(self):
+        out = "".join(f"u{i}.service loaded active running x\n" for i in range(500))
+        self.assertEqual(len(ServiceScanner._parse_systemd_services(out)), 20)
@@ -4,6 +4,7 @@
 the matrix here. Integration proves the wiring (a real send point honours the rule, and Slack
 routing doesn't disturb email routing), and the editor persists / validates / is RBAC-gated.
 """
+import threading
 from unittest.mock import patch
 
 from django.contrib.auth.models import User
@@ -17,6 +18,7 @@ from core.models import (Server, EmailAlertConfig, SlackAlertConfig, SlackRoutin
                          Role, UserACL)
 from core.permissions import ROLE_ADMIN, ROLE_OPERATOR, ROLE_CEO
 from core.agent_api import _notify_unit
+from core.alert_delivery import wait_for_alert_deliveries
 
 
 class SlackShouldSendMatrixTests(TestCase):
@@ -64,21 +66,37 @@ class SlackRoutingWiringTests(TestCase):
         SlackAlertConfig.objects.create(id=1, enabled=True,
                                         webhook_url="https://hooks.slack.com/services/T/B/x")
 
-    @patch("core.agent_api.requests.post")
+    @patch("core.webhooks.post")
     def test_off_suppresses_slack(self, mock_post):
         SlackRoutingRule.objects.update_or_create(category="availability",
                                                   defaults={"min_severity": "OFF"})
         _notify_unit(self.server, "service", "nginx", down=True)   # availability / HIGH
+        wait_for_alert_deliveries()
         self.assertFalse(mock_post.called)
 
-    @patch("core.agent_api.requests.post")
+    @patch("core.webhooks.post")
     def test_low_sends_slack(self, mock_post):
         SlackRoutingRule.objects.update_or_create(category="availability",
                                                   defaults={"min_severity": "LOW"})
         _notify_unit(self.server, "service", "nginx", down=True)
+        wait_for_alert_deliveries()
         self.assertTrue(mock_post.called)
 
-    @patch("core.agent_api.requests.post")
+    def test_slow_webhook_does_not_hold_up_the_caller(self):
+        release, calls = threading.Event(), []
+
+        def slow_post(url, **kwargs):
+            release.wait(5)
+            calls.append(url)
+
+        with patch("core.webhooks.post", slow_post):
+            _notify_unit(self.server, "service", "nginx", down=True)
+            self.assertEqual(calls, [])                    # returned before the webhook did
+            release.set()
+            wait_for_alert_deliveries()
+        self.assertEqual(calls, ["https://hooks.slack.com/services/T/B/x"])
+
+    @patch("core.webhooks.post")
     def test_slack_off_does_not_block_email(self, mock_post):
         # Slack availability OFF, but email routing still reaches admin + operator.
         roles = {n: Role.objects.get_or_create(name=n)[0]
@@ -93,6 +111,7 @@ class SlackRoutingWiringTests(TestCase):
         SlackRoutingRule.objects.update_or_create(category="availability",
                                                   defaults={"min_severity": "OFF"})
         _notify_unit(self.server, "service", "nginx", down=True)
+        wait_for_alert_deliveries()
         self.assertFalse(mock_post.called)                 # Slack suppressed
         self.assertEqual(len(mail.outbox), 1)              # email still routed
         self.assertEqual(set(mail.outbox[0].to), {"a@x.test", "o@x.test"})
@@ -0,0 +1,95 @@
+"""
+run_synthetic_checks -- due checks are probed concurrently (the probes are network-bound,
+with multi-second timeouts) while results and up/down state are recorded in order on the
+command's own thread. Probes are patched; nothing leaves the process.
+"""
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core import synthetic
+from core.alert_delivery import wait_for_alert_deliveries
+from core.models import SyntheticCheck, SyntheticCheckResult
+
+
+def _slow_probe(check):
+    time.sleep(0.3)
+    return {"success": True, "status_code": 200, "response_time_ms": 300.0, "error": ""}
+
+
+class RunSyntheticChecksTests(TestCase):
+    def _check(self, name):
+        return SyntheticCheck.objects.create(name=name, check_type="HTTP", url=f"https://{name}.test")
+
+    @patch("core.synthetic.perform_probe", side_effect=_slow_probe)
+    def test_due_checks_are_probed_concurrently(self, _probe):
+        for i in range(5):
+            self._check(f"c{i}")
+        out = StringIO()
+        start = time.monotonic()
+        call_command("run_synthetic_checks", "--all", stdout=out)
+        self.assertLess(time.monotonic() - start, 1.2)          # sequential would be 1.5s
+        self.assertEqual(SyntheticCheckResult.objects.filter(success=True).count(), 5)
+        self.assertEqual(out.getvalue().count(": OK"), 5)
+
+    @patch("core.synthetic.perform_probe", side_effect=_slow_probe)
+    def test_a_failing_record_does_not_stop_the_rest(self, _probe):
+        self._check("bad")
+        self._check("good")
+        real = synthetic.record_and_evaluate
+
+        def record(check, probe):
+            if check.name == "bad":
+                raise RuntimeError("db hiccup")
+            return real(check, probe)
+
+        err = StringIO()
+        with patch("core.synthetic.record_and_evaluate", side_effect=record):
+            call_command("run_synthetic_checks", "--all", stdout=StringIO(), stderr=err)
+        self.assertIn("bad: error - db hiccup", err.getvalue())
+        self.assertEqual(SyntheticCheckResult.objects.get().synthetic_check.name, "good")
+
+
+class RunCheckAlertTests(TestCase):
+    @patch("core.synthetic.perform_probe",
+           return_value={"success": False, "status_code": None, "response_time_ms": None, "error": "down"})
+    def test_run_check_does_not_wait_for_alert_delivery(self, _probe):
+        check = SyntheticCheck.objects.create(name="c", check_type="HTTP", url="https://c.test",
+                                              failure_threshold=1)
+        release, sent = threading.Event(), []
+
+        def slow_notify(check, event, probe):
+            release.wait(5)
+            sent.append(event)
+
+        with patch("core.synthetic.notify", side_effect=slow_notify):
+            result, transition = synthetic.run_check(check)
+            self.assertEqual((result.success, transition, sent), (False, "DOWN", []))
+            release.set()
+            wait_for_alert_deliveries(timeout=5)
+        self.assertEqual(sent, ["DOWN"])
+
+
+class DueChecksTests(TestCase):
+    def test_due_query_matches_is_due(self):
+        now = timezone.now()
+        for name, interval, ago, enabled in [
+            ("never-run", 60, None, True),
+            ("overdue", 60, 90, True),
+            ("exactly-due", 60, 60, True),
+            ("not-yet", 300, 90, True),
+            ("disabled", 60, 90, False),
+        ]:
+            SyntheticCheck.objects.create(
+                name=name, check_type="HTTP", url=f"https://{name}.test",
+                interval_seconds=interval, enabled=enabled,
+                last_checked_at=None if ago is None else now - timedelta(seconds=ago))
+        expected = sorted(c.name for c in SyntheticCheck.objects.all() if c.is_due(now))
+        self.assertEqual(sorted(SyntheticCheck.due(now).values_list("name", flat=True)), expected)
+        self.assertEqual(expected, ["exactly-due", "never-run", "overdue"])
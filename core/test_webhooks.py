@@ -0,0 +1,18 @@
+"""Slack webhook posts go through the shared kept-alive session in core.http."""
+import threading
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core import http, webhooks
+
+
+class WebhookSessionTests(SimpleTestCase):
+    def test_posts_from_any_thread_use_the_shared_session(self):
+        with patch.object(http.session, "post") as mock_post:
+            webhooks.post("https://hooks.slack.com/a", json={"text": "1"}, timeout=10)
+            t = threading.Thread(target=webhooks.post, args=("https://hooks.slack.com/a",),
+                                 kwargs={"json": {"text": "2"}, "timeout": 10})
+            t.start()
+            t.join()
+        self.assertEqual(mock_post.call_count, 2)
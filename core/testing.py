@@ -0,0 +1,20 @@
+"""Shared assertions for the core test suite."""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class FleetQueryCountMixin:
+    """For TestCases covering code paths that must not issue a query per server."""
+
+    def assertQueryCountIndependentOfFleet(self, run, add_servers, more=4):
+        """Assert `run()` issues as many queries after `add_servers(more)` as before.
+
+        `run` is called once to warm per-session/app caches, then measured; `add_servers(n)`
+        creates n more servers set up like the existing ones. Returns the last run's result.
+        """
+        run()
+        with CaptureQueriesContext(connection) as before:
+            run()
+        add_servers(more)
+        with self.assertNumQueries(len(before.captured_queries)):
+            return run()
@@ -6,10 +6,18 @@ from django.conf import settings
 from datetime import datetime
 import pytz
 import os
+import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Leading-zero strippers for format_datetime_for_display's n/j/g codes, which strftime
+# can't express. Compiled once: the formatter runs for every timestamp a page renders.
+_MONTH_ZERO_RE = re.compile(r'\b0(\d)/')
+_DAY_ZERO_RE = re.compile(r'/(\d{2})\b')
+_LEADING_ZERO_RE = re.compile(r'^0(\d)')
+_HOUR_ZERO_RE = re.compile(r'(\s|,|/|^)0(\d):')
+
 
 def has_privilege(user, privilege_key):
     """
@@ -224,18 +232,16 @@ def format_datetime_for_display(dt, format_string="M d, Y H:i:s"):
     
     # Remove leading zeros from month and day if n or j was used
     if has_n_or_j:
-        import re
         # Remove leading zero from month (01 -> 1, but 10 stays 10)
-        result = re.sub(r'\b0(\d)/', r'\1/', result)
+        result = _MONTH_ZERO_RE.sub(r'\1/', result)
         # Remove leading zero from day (/01 -> /1, but /10 stays /10)
-        result = re.sub(r'/(\d{2})\b', lambda m: '/' + str(int(m.group(1))), result)
+        result = _DAY_ZERO_RE.sub(lambda m: '/' + str(int(m.group(1))), result)
         # Handle cases where month/day is at start of string
-        result = re.sub(r'^0(\d)', r'\1', result)
+        result = _LEADING_ZERO_RE.sub(r'\1', result)
     
     # Remove leading zero from hour if g was used (01 -> 1, but 10 stays 10)
     if has_g:
-        import re
         # Match hour in format like "01:05:00" or " 01:05:00" and remove leading zero
-        result = re.sub(r'(\s|,|/|^)0(\d):', r'\1\2:', result)
+        result = _HOUR_ZERO_RE.sub(r'\1\2:', result)
     
     return result
@@ -17,6 +17,7 @@ if os.path.exists(utils_file_path):
     spec.loader.exec_module(_core_utils_module)
     has_privilege = _core_utils_module.has_privilege
     get_app_heartbeat_timestamp = _core_utils_module.get_app_heartbeat_timestamp
+    parse_app_heartbeat = _core_utils_module.parse_app_heartbeat
     get_display_timezone = _core_utils_module.get_display_timezone
     convert_to_display_timezone = _core_utils_module.convert_to_display_timezone
     format_datetime_for_display = _core_utils_module.format_datetime_for_display
@@ -4,7 +4,6 @@ Forecast Engine - Disk space forecasting using linear regression
 from django.utils import timezone
 from datetime import timedelta
 from core.models import Server, SystemMetric
-import json
 
 
 def forecast_disk_usage(server, mount_point, days=30):
@@ -41,7 +40,7 @@ def forecast_disk_usage(server, mount_point, days=30):
     for metric in metrics:
         if metric.disk_usage:
             try:
-                disk_data = json.loads(metric.disk_usage) if isinstance(metric.disk_usage, str) else metric.disk_usage
+                disk_data = metric.disk_usage
                 if isinstance(disk_data, dict) and mount_point in disk_data:
                     partition_data = disk_data[mount_point]
                     usage_points.append({
@@ -50,7 +49,7 @@ def forecast_disk_usage(server, mount_point, days=30):
                         'total': partition_data.get('total', 0),
                         'used': partition_data.get('used', 0)
                     })
-            except (json.JSONDecodeError, KeyError, TypeError):
+            except (KeyError, TypeError):
                 continue
     
     if len(usage_points) < 5:
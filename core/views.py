@@ -1,16 +1,19 @@
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import admin, messages
+from django.contrib.messages.api import MessageFailure
 from django.contrib.auth.models import User
 from django.contrib.auth import logout as auth_logout
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from datetime import timedelta
 from .models import Server, SystemMetric, Anomaly, MonitoringConfig, Service, EmailAlertConfig, SlackAlertConfig, AlertHistory, UserACL, ServerHeartbeat, AgentVersion, LoginActivity, AgentCredential, SyntheticCheck, SyntheticCheckResult, SecurityEvent, SecurityMonitorConfig, BusinessKPI, BusinessKPIValue, BusinessMonitorConfig, Container
 from .service_latency import measure_service_latency
 from . import alert_categories
 from . import alert_routing
+from . import webhooks
 from .mount_filters import is_ephemeral_mount, primary_mount, primary_disk_percent
+from .network_io import sum_network_io, throughput_series
 from .port_roles import role_for_port
 from .licensing import require_feature
 from django.http import JsonResponse, HttpResponseRedirect
@@ -115,11 +118,14 @@ def _app_was_down():
     of re-reading the cache/file for every server."""
     from django.core.cache import cache
     import os
+    import time
     try:
         from .utils import parse_app_heartbeat
         key = "monitoring_app_heartbeat"
         path = "/tmp/monitoring_app_heartbeat.txt"
         s = cache.get(key)
+        if isinstance(s, (int, float)):      # epoch seconds, as record_app_heartbeat stores it
+            return time.time() - s > 300
         if s:
             hb = parse_app_heartbeat(s)
             return bool(hb and (timezone.now() - hb).total_seconds() > 300)
@@ -173,20 +179,11 @@ def _bulk_server_statuses(servers):
     return out
 
 
-def _get_client_ip(request):
-    """Get client IP address from request"""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
 def _log_user_action(request, action, details=""):
     """Log user actions to app.log"""
     user = request.user if hasattr(request, 'user') and request.user.is_authenticated else "Anonymous"
-    ip = _get_client_ip(request)
+    from . import audit
+    ip = audit.client_ip(request)
     timestamp = timezone.now().strftime('%Y-%m-%d %H:%M:%S')
     log_message = f"User: {user} | IP: {ip} | Action: {action} | {details} | Time: {timestamp}"
     app_logger.info(log_message)
@@ -199,7 +196,9 @@ def get_live_metrics(request):
     from .models import Anomaly, AlertHistory
     
     # Don't use .only() with select_related on same field - causes Django error
-    servers = Server.objects.filter(monitoring_config__enabled=True).select_related("monitoring_config")
+    servers = list(Server.objects.filter(monitoring_config__enabled=True).select_related("monitoring_config"))
+    # Status based on heartbeat, for the whole fleet in a few queries
+    statuses = _bulk_server_statuses(servers)
     metrics_data = []
     
     for server in servers:
@@ -224,15 +223,14 @@ def get_live_metrics(request):
                             latest_metric_timestamp = datetime.fromisoformat(metric["timestamp"].replace('Z', '+00:00'))
                         else:
                             latest_metric_timestamp = metric["timestamp"]
-                    except:
+                    except (ValueError, TypeError, AttributeError):
                         latest_metric_timestamp = None
                 else:
                     latest_metric_timestamp = None
                 metrics_data.append(metric)
-                # Calculate status based on heartbeat
-                metric["status"] = _calculate_server_status(server)
+                metric["status"] = statuses[server.id]
                 continue
-            except:
+            except Exception:
                 pass
         
         # Fallback to PostgreSQL if Redis miss
@@ -246,13 +244,9 @@ def get_live_metrics(request):
             disk_percent = 0
             if latest_metric.disk_usage:
                 try:
-                    disk_data = (
-                        json.loads(latest_metric.disk_usage)
-                        if isinstance(latest_metric.disk_usage, str)
-                        else latest_metric.disk_usage
-                    )
+                    disk_data = latest_metric.disk_usage
                     disk_percent = primary_disk_percent(disk_data)
-                except:
+                except (ValueError, TypeError, AttributeError, KeyError):
                     pass
             
             # Convert disk I/O from bytes/sec to KB/s
@@ -260,7 +254,7 @@ def get_live_metrics(request):
             if latest_metric.disk_io_read:
                 try:
                     disk_io_read_kb = round(float(latest_metric.disk_io_read) / 1024, 0)
-                except:
+                except (TypeError, ValueError):
                     pass
             
             # Convert network I/O from bytes/sec to KB/s
@@ -268,11 +262,10 @@ def get_live_metrics(request):
             if latest_metric.net_io_sent:
                 try:
                     net_io_sent_kb = round(float(latest_metric.net_io_sent) / 1024, 0)
-                except:
+                except (TypeError, ValueError):
                     pass
             
-            # Calculate status based on heartbeat
-            status = _calculate_server_status(server)
+            status = statuses[server.id]
             
             metrics_data.append({
                 "server_id": server.id,
@@ -307,7 +300,7 @@ def heartbeat_api(request, server_id):
             import json
             data = json.loads(request.body)
             agent_version = data.get('agent_version', None)
-        except:
+        except (ValueError, AttributeError):
             pass
     
     # Update or create heartbeat record
@@ -482,10 +475,7 @@ def metric_history_api(request, server_id):
             max_disk = None
             if metric.disk_usage:
                 try:
-                    if isinstance(metric.disk_usage, str):
-                        disk_data = json.loads(metric.disk_usage)
-                    else:
-                        disk_data = metric.disk_usage
+                    disk_data = metric.disk_usage
                     
                     max_disk = 0.0
                     for mount, usage in disk_data.items():
@@ -494,7 +484,7 @@ def metric_history_api(request, server_id):
                         else:
                             percent = float(usage) if isinstance(usage, (int, float)) else 0.0
                         max_disk = max(max_disk, float(percent))
-                except (json.JSONDecodeError, TypeError, ValueError):
+                except (TypeError, ValueError):
                     max_disk = None
             
             disk_values.append(float(max_disk) if max_disk is not None else None)
@@ -683,24 +673,18 @@ def server_details(request, server_id):
     disk_data = {}
     disk_percent = 0
     if latest_metric and latest_metric.disk_usage:
-        import json
-        disk_data = (
-            json.loads(latest_metric.disk_usage)
-            if isinstance(latest_metric.disk_usage, str)
-            else latest_metric.disk_usage
-        )
+        disk_data = latest_metric.disk_usage
         # Primary partition disk percent (root "/" on Linux, "C:\\" on Windows, ...).
         disk_percent = primary_disk_percent(disk_data)
 
-    # Physical disk inventory (SSD/HDD/NVMe, RAID, disk count) pushed by the agent
-    disk_hardware = {}
-    if latest_metric and getattr(latest_metric, "disk_hardware", None):
-        import json
-        disk_hardware = (
-            json.loads(latest_metric.disk_hardware)
-            if isinstance(latest_metric.disk_hardware, str)
-            else latest_metric.disk_hardware
-        ) or {}
+    # Physical disk inventory (SSD/HDD/NVMe, RAID, disk count) pushed by the agent. The
+    # agent only ships it when it changes (and every ~15 min), so take it from the newest
+    # sample that carries one.
+    hw_metric = latest_metric
+    if latest_metric and not getattr(latest_metric, "disk_hardware", None):
+        hw_metric = (SystemMetric.objects.filter(server=server).exclude(disk_hardware={})
+                     .only("disk_hardware").order_by("-timestamp").first())
+    disk_hardware = (hw_metric.disk_hardware or {}) if hw_metric else {}
 
     # Calculate disk summary
     disk_summary = {
@@ -774,11 +758,7 @@ def server_details(request, server_id):
         point_disk = 0
         if metric.disk_usage:
             try:
-                disk_info = (
-                    json.loads(metric.disk_usage)
-                    if isinstance(metric.disk_usage, str)
-                    else metric.disk_usage
-                )
+                disk_info = metric.disk_usage
                 point_disk = primary_disk_percent(disk_info)
             except Exception:
                 pass
@@ -847,23 +827,42 @@ def server_list(request):
     """Server list view. Viewing is read-only (VIEW_OPERATIONS, allowed for the support
     Operator); the per-row edit/suspend/delete actions require manage_monitoring and are
     shown disabled for users without it (and enforced server-side by the RBAC middleware)."""
-    servers = Server.objects.all().select_related("monitoring_config").order_by("name")
+    from django.db.models import Count, OuterRef, Subquery
+    # Latest metric id per server resolved in the server query itself; the rows are then
+    # loaded with one in_bulk() instead of a "latest metric" query per server.
+    latest_metric_id = (SystemMetric.objects.filter(server=OuterRef("pk"))
+                        .order_by("-timestamp").values("id")[:1])
+    servers = list(Server.objects.all().select_related("monitoring_config").order_by("name")
+                   .annotate(last_metric_id=Subquery(latest_metric_id)))
     import json
     from django.core.cache import cache
     from datetime import datetime, timedelta
 
+    # Fleet-wide lookups, one query each (were per-server queries inside the loop)
+    ids = [server.id for server in servers]
+    statuses = _bulk_server_statuses(servers)
+    last_checkins = dict(ServerHeartbeat.objects.filter(server_id__in=ids)
+                         .values_list("server_id", "last_heartbeat"))
+    latest_metrics = SystemMetric.objects.only(
+        "cpu_percent", "memory_percent", "memory_used", "memory_total",
+        "system_uptime_seconds", "disk_usage", "net_io_sent", "net_io_recv",
+    ).in_bulk([server.last_metric_id for server in servers if server.last_metric_id])
+    active_alert_counts = dict(AlertHistory.objects
+                               .filter(server_id__in=ids, status="triggered")
+                               .exclude(alert_type__in=[AlertHistory.AlertType.SERVICE, AlertHistory.AlertType.CONTAINER])
+                               .values("server_id").annotate(n=Count("id"))
+                               .values_list("server_id", "n"))
+    active_anomaly_counts = dict(Anomaly.objects.filter(server_id__in=ids, resolved=False)
+                                 .values("server_id").annotate(n=Count("id"))
+                                 .values_list("server_id", "n"))
+
     # Calculate server status based on heartbeat and get metrics
     servers_with_data = []
     for server in servers:
-        server.status = _calculate_server_status(server)
+        server.status = statuses[server.id]
         
         # Get last heartbeat timestamp if available
-        try:
-            from .models import ServerHeartbeat
-            heartbeat = ServerHeartbeat.objects.filter(server=server).first()
-            server.last_checkin = heartbeat.last_heartbeat if heartbeat else None
-        except:
-            server.last_checkin = None
+        server.last_checkin = last_checkins.get(server.id)
         
         # Get latest metrics
         server.cpu_percent = None
@@ -894,12 +893,12 @@ def server_list(request):
                 server.network_sent = metric.get("net_io_sent", 0) / (1024 * 1024)  # Convert to MB/s
                 server.network_recv = metric.get("net_io_recv", 0) / (1024 * 1024)  # Convert to MB/s
                 server.uptime_seconds = metric.get("system_uptime_seconds")
-            except:
+            except (ValueError, TypeError, AttributeError):
                 pass
         
         # Fallback to PostgreSQL
         if server.cpu_percent is None:
-            latest_metric = SystemMetric.objects.filter(server=server).order_by("-timestamp").first()
+            latest_metric = latest_metrics.get(server.last_metric_id)
             if latest_metric:
                 server.cpu_percent = latest_metric.cpu_percent
                 server.memory_percent = latest_metric.memory_percent
@@ -913,9 +912,9 @@ def server_list(request):
                 # Calculate disk percent from root partition
                 if latest_metric.disk_usage:
                     try:
-                        disk_data = json.loads(latest_metric.disk_usage) if isinstance(latest_metric.disk_usage, str) else latest_metric.disk_usage
+                        disk_data = latest_metric.disk_usage
                         server.disk_percent = primary_disk_percent(disk_data)
-                    except:
+                    except (ValueError, TypeError, AttributeError, KeyError):
                         pass
                 
                 # Network I/O
@@ -927,27 +926,18 @@ def server_list(request):
         # Check if agent is installed (has recent metrics or heartbeat)
         server.agent_installed = server.last_checkin is not None or server.cpu_percent is not None
         
-        # Get alert and monitoring suppression status
+        # Get alert and monitoring suppression status (config came with select_related)
         try:
-            from .models import MonitoringConfig
-            config = MonitoringConfig.objects.filter(server=server).first()
-            server.alert_suppressed = config.alert_suppressed if config else False
-            server.monitoring_suspended = config.monitoring_suspended if config else False
-        except:
-            server.alert_suppressed = False
-            server.monitoring_suspended = False
+            config = server.monitoring_config
+        except MonitoringConfig.DoesNotExist:
+            config = None
+        server.alert_suppressed = config.alert_suppressed if config else False
+        server.monitoring_suspended = config.monitoring_suspended if config else False
 
         # Why is it in warning? Count active alerts + unresolved anomalies (drives the card tags).
         # Exclude SERVICE alerts here too -- service health is shown under Services, not the server.
-        try:
-            server.active_alerts = (AlertHistory.objects
-                                    .filter(server=server, status="triggered")
-                                    .exclude(alert_type__in=[AlertHistory.AlertType.SERVICE, AlertHistory.AlertType.CONTAINER])
-                                    .count())
-            server.active_anomalies = Anomaly.objects.filter(server=server, resolved=False).count()
-        except Exception:
-            server.active_alerts = 0
-            server.active_anomalies = 0
+        server.active_alerts = active_alert_counts.get(server.id, 0)
+        server.active_anomalies = active_anomaly_counts.get(server.id, 0)
         
         # Format uptime
         if server.uptime_seconds:
@@ -1169,32 +1159,15 @@ def monitoring_dashboard(request):
         if latest_metric:
             if latest_metric.network_io:
                 try:
-                    import json
-                    network_data = (
-                        json.loads(latest_metric.network_io)
-                        if isinstance(latest_metric.network_io, str)
-                        else latest_metric.network_io
-                    )
-                    # Sum up all interfaces
-                    total_bytes_sent = 0
-                    total_bytes_recv = 0
-                    if isinstance(network_data, dict):
-                        for interface, data in network_data.items():
-                            if isinstance(data, dict):
-                                total_bytes_sent += data.get("bytes_sent", 0)
-                                total_bytes_recv += data.get("bytes_recv", 0)
+                    network_data = latest_metric.network_io
+                    total_bytes_sent, total_bytes_recv = sum_network_io(network_data)
                     network_download = round(total_bytes_recv / 1024 / 1024, 1) if total_bytes_recv else 0
                     network_upload = round(total_bytes_sent / 1024 / 1024, 1) if total_bytes_sent else 0
                 except Exception:
                     pass
             if latest_metric.disk_usage:
                 try:
-                    import json
-                    disk_data = (
-                        json.loads(latest_metric.disk_usage)
-                        if isinstance(latest_metric.disk_usage, str)
-                        else latest_metric.disk_usage
-                    )
+                    disk_data = latest_metric.disk_usage
                     # Primary partition ("/" on Linux, "C:\\" on Windows), else first.
                     disk_percent = primary_disk_percent(disk_data)
                 except Exception:
@@ -2287,14 +2260,15 @@ def service_alerts_config_api(request):
     """API endpoint to get service alert configuration"""
     try:
         from .models import Service, Server
-        # Get all servers with their services
-        servers = Server.objects.all().order_by('name')
+        # Get all servers with their services, prefetched in one query
+        servers = Server.objects.all().order_by('name').prefetch_related(
+            Prefetch('services', queryset=Service.objects.order_by('name'), to_attr='sorted_services')
+        )
         servers_data = []
         
         for server in servers:
-            services = Service.objects.filter(server=server).order_by('name')
             services_data = []
-            for service in services:
+            for service in server.sorted_services:
                 services_data.append({
                     'id': service.id,
                     'name': service.name,
@@ -2399,28 +2373,28 @@ def save_alert_config(request):
             if not smtp_host or not smtp_port or not username:
                 try:
                     messages.error(request, 'SMTP host, port, and username are required for custom SMTP configuration')
-                except:
+                except MessageFailure:
                     pass  # Messages middleware not available in test environment
                 return redirect('alert_config')
             # Password is required for new custom configs, optional for updates
             if not existing_config and not password:
                 try:
                     messages.error(request, 'Password is required for new custom SMTP configuration')
-                except:
+                except MessageFailure:
                     pass  # Messages middleware not available in test environment
                 return redirect('alert_config')
         else:
             if not username:
                 try:
                     messages.error(request, 'Username is required')
-                except:
+                except MessageFailure:
                     pass  # Messages middleware not available in test environment
                 return redirect('alert_config')
             # Password is required for new configs, optional for updates
             if not existing_config and not password:
                 try:
                     messages.error(request, 'Password is required for new email configuration')
-                except:
+                except MessageFailure:
                     pass  # Messages middleware not available in test environment
                 return redirect('alert_config')
 
@@ -2456,7 +2430,7 @@ def save_alert_config(request):
 
         try:
             messages.success(request, 'Email alert configuration saved successfully!')
-        except:
+        except MessageFailure:
             pass  # Messages middleware not available in test environment
         return redirect('alert_config')
 
@@ -2464,7 +2438,7 @@ def save_alert_config(request):
         logger.error(f"Failed to save alert config: {str(e)}")
         try:
             messages.error(request, f'Failed to save configuration: {str(e)}')
-        except:
+        except MessageFailure:
             pass  # Messages middleware not available in test environment
         return redirect('alert_config')
 
@@ -2479,12 +2453,12 @@ def clear_alert_config(request):
             config.delete()
             try:
                 messages.success(request, 'Email alert configuration cleared successfully!')
-            except:
+            except MessageFailure:
                 pass  # Messages middleware not available in test environment
         else:
             try:
                 messages.info(request, 'No email alert configuration found to clear.')
-            except:
+            except MessageFailure:
                 pass  # Messages middleware not available in test environment
         return redirect('alert_config')
 
@@ -2492,7 +2466,7 @@ def clear_alert_config(request):
         logger.error(f"Failed to clear alert config: {str(e)}")
         try:
             messages.error(request, f'Failed to clear configuration: {str(e)}')
-        except:
+        except MessageFailure:
             pass  # Messages middleware not available in test environment
         return redirect('alert_config')
 
@@ -2585,7 +2559,7 @@ def test_alert_config(request):
             if server:
                 try:
                     server.quit()
-                except:
+                except (smtplib.SMTPException, OSError):
                     pass
             error_str = str(e)
             error_msg = f'SMTP AUTH extension not supported by server: {error_str}. This is normal for port 25 servers. Email will be sent without authentication.'
@@ -2602,7 +2576,7 @@ def test_alert_config(request):
             if server:
                 try:
                     server.quit()
-                except:
+                except (smtplib.SMTPException, OSError):
                     pass
             error_str = str(e)
             # Check for rate limiting
@@ -2615,7 +2589,7 @@ def test_alert_config(request):
             if server:
                 try:
                     server.quit()
-                except:
+                except (smtplib.SMTPException, OSError):
                     pass
             error_str = str(e)
             # This often happens after a rate limit error or wrong credentials
@@ -2625,7 +2599,7 @@ def test_alert_config(request):
             if server:
                 try:
                     server.quit()
-                except:
+                except (smtplib.SMTPException, OSError):
                     pass
             error_str = str(e)
             # Provide helpful guidance for common errors
@@ -2638,14 +2612,14 @@ def test_alert_config(request):
             if server:
                 try:
                     server.quit()
-                except:
+                except (smtplib.SMTPException, OSError):
                     pass
             messages.error(request, f'Connection error: {str(e)}. Please check your SMTP settings and network connection.')
         except Exception as e:
             if server:
                 try:
                     server.quit()
-                except:
+                except (smtplib.SMTPException, OSError):
                     pass
             import traceback
             error_msg = str(e)
@@ -3018,7 +2992,7 @@ def _check_and_send_alerts(server, metric):
         # Check Disk thresholds (check all partitions)
         if metric.disk_usage:
             try:
-                disk_data = json.loads(metric.disk_usage) if isinstance(metric.disk_usage, str) else metric.disk_usage
+                disk_data = metric.disk_usage
                 previous_disk_state = previous_state.get('Disk', {})
                 
                 for mountpoint, usage in disk_data.items():
@@ -3301,8 +3275,16 @@ The resource usage has returned to normal levels.
         raise Exception(error_msg)
 
 
-def _send_connection_alert(server, state):
-    """Send alert when server connection state changes (online/offline)"""
+def _send_connection_alert(server, state, deliver=None):
+    """Send alert when server connection state changes (online/offline)
+
+    `deliver(what, fn)` runs the network sends (SMTP, Slack webhook); by default they
+    run inline. check_server_connectivity passes alert_delivery.deliver so a fleet-wide
+    outage doesn't send its alerts one slow SMTP session at a time. The checks and the
+    AlertHistory row always stay on the calling thread.
+    """
+    if deliver is None:
+        deliver = lambda what, fn: fn()
     try:
         # Refresh server to get latest monitoring_config
         server.refresh_from_db()
@@ -3368,8 +3350,7 @@ Time: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}
 The server connection has been restored and is responding normally.
             """
         
-        # Send email if configured
-        if email_config and recipients:
+        def send_email():
             print(f"[CONNECTION_ALERT] Attempting to send {state} alert email to {recipients}")
             try:
                 # Remove spaces from password (Gmail App Passwords have no spaces)
@@ -3406,17 +3387,21 @@ The server connection has been restored and is responding normally.
                 error_msg = f"[CONNECTION_ALERT] ✗ Failed to send {state} alert email for {server.name}: {e}"
                 print(error_msg)
                 error_logger.error(error_msg)
-        
+
+        # Send email if configured
+        if email_config and recipients:
+            deliver(f"{state} connection email for {server.name}", send_email)
+
         # Send Slack alert if configured
         if slack_config:
-            _send_slack_connection_alert(
+            deliver(f"{state} connection slack alert for {server.name}", lambda: _send_slack_connection_alert(
                 slack_config.webhook_url,
                 server,
                 state,
                 username=slack_config.username,
                 icon_emoji=slack_config.icon_emoji,
                 channel=slack_config.channel
-            )
+            ))
         
         # Log to alert history
         if email_config or slack_config:
@@ -3554,8 +3539,37 @@ The service has been restored and is now running.
         return
 
 
-def _send_alert_email(email_config, server, alerts):
-    """Send alert email using configured SMTP settings"""
+def _open_alert_smtp(email_config):
+    """Connect (and log in, when AUTH is offered) to the configured SMTP server."""
+    if email_config.use_tls:
+        # STARTTLS (port 587)
+        print(f"[ALERT] Using STARTTLS on {email_config.smtp_host}:{email_config.smtp_port}")
+        server_smtp = smtplib.SMTP(email_config.smtp_host, email_config.smtp_port)
+        server_smtp.ehlo()
+        server_smtp.starttls()
+        server_smtp.ehlo()
+        # Attempt login only if AUTH is supported
+        _smtp_login_if_supported(server_smtp, email_config.username, email_config.password)
+    else:
+        # SSL (port 465) or plain (port 25)
+        if email_config.use_ssl:
+            print(f"[ALERT] Using SSL on {email_config.smtp_host}:{email_config.smtp_port}")
+            server_smtp = smtplib.SMTP_SSL(email_config.smtp_host, email_config.smtp_port)
+        else:
+            print(f"[ALERT] Using plain SMTP on {email_config.smtp_host}:{email_config.smtp_port}")
+            server_smtp = smtplib.SMTP(email_config.smtp_host, email_config.smtp_port)
+        server_smtp.ehlo()
+        # Attempt login only if AUTH is supported
+        _smtp_login_if_supported(server_smtp, email_config.username, email_config.password)
+    return server_smtp
+
+
+def _send_alert_email(email_config, server, alerts, smtp=None):
+    """Send alert email using configured SMTP settings.
+
+    `smtp` is an already-open session from _open_alert_smtp() to send on (left open
+    for the caller's next message); without one, a session is opened for this email.
+    """
     try:
         # Resource/performance thresholds, triggered -> route by (resource, HIGH).
         recipients = alert_routing.recipients_for("resource", "HIGH")
@@ -3582,26 +3596,7 @@ Please check the server immediately.
         print(f"[ALERT] Attempting to send email to {recipients}")
         
         # Send email
-        if email_config.use_tls:
-            # STARTTLS (port 587)
-            print(f"[ALERT] Using STARTTLS on {email_config.smtp_host}:{email_config.smtp_port}")
-            server_smtp = smtplib.SMTP(email_config.smtp_host, email_config.smtp_port)
-            server_smtp.ehlo()
-            server_smtp.starttls()
-            server_smtp.ehlo()
-            # Attempt login only if AUTH is supported
-            _smtp_login_if_supported(server_smtp, email_config.username, email_config.password)
-        else:
-            # SSL (port 465) or plain (port 25)
-            if email_config.use_ssl:
-                print(f"[ALERT] Using SSL on {email_config.smtp_host}:{email_config.smtp_port}")
-                server_smtp = smtplib.SMTP_SSL(email_config.smtp_host, email_config.smtp_port)
-            else:
-                print(f"[ALERT] Using plain SMTP on {email_config.smtp_host}:{email_config.smtp_port}")
-                server_smtp = smtplib.SMTP(email_config.smtp_host, email_config.smtp_port)
-            server_smtp.ehlo()
-            # Attempt login only if AUTH is supported
-            _smtp_login_if_supported(server_smtp, email_config.username, email_config.password)
+        server_smtp = smtp or _open_alert_smtp(email_config)
         
         msg = MIMEMultipart()
         msg['From'] = email_config.from_email
@@ -3610,7 +3605,8 @@ Please check the server immediately.
         msg.attach(MIMEText(body, 'plain'))
         
         server_smtp.send_message(msg)
-        server_smtp.quit()
+        if smtp is None:
+            server_smtp.quit()
         
         print(f"[ALERT] ✓ Alert email sent successfully for {server.name} to {recipients}")
         
@@ -3693,7 +3689,7 @@ def _send_slack_alert(webhook_url, server, alerts, username=None, icon_emoji=Non
         if channel:
             payload['channel'] = channel
         
-        response = requests.post(
+        response = webhooks.post(
             webhook_url,
             json=payload,
             headers={'Content-Type': 'application/json'},
@@ -3766,7 +3762,7 @@ def _send_slack_resolved_alert(webhook_url, server, resolved_alerts, username=No
         if channel:
             payload['channel'] = channel
         
-        response = requests.post(
+        response = webhooks.post(
             webhook_url,
             json=payload,
             headers={'Content-Type': 'application/json'},
@@ -3848,7 +3844,7 @@ def _send_slack_connection_alert(webhook_url, server, state, username=None, icon
         if channel:
             payload['channel'] = channel
         
-        response = requests.post(
+        response = webhooks.post(
             webhook_url,
             json=payload,
             headers={'Content-Type': 'application/json'},
@@ -3937,7 +3933,7 @@ def _send_slack_service_alert(webhook_url, server, service, status, username=Non
         if channel:
             payload['channel'] = channel
         
-        response = requests.post(
+        response = webhooks.post(
             webhook_url,
             json=payload,
             headers={'Content-Type': 'application/json'},
@@ -4934,11 +4930,10 @@ def server_metrics_api(request, server_id):
         cpu_data = []
         memory_data = []
         disk_data = []
-        network_data = []
+        network_samples = []   # (timestamp, bytes_sent, bytes_recv) host totals
 
         # Process metrics
-        prev_network = None
-        for i, metric in enumerate(metrics_list):
+        for metric in metrics_list:
             timestamp_str = metric.timestamp.isoformat()
 
             # CPU data
@@ -4963,10 +4958,7 @@ def server_metrics_api(request, server_id):
             disk_val = None
             if metric.disk_usage:
                 try:
-                    if isinstance(metric.disk_usage, str):
-                        disk_data_dict = json.loads(metric.disk_usage)
-                    else:
-                        disk_data_dict = metric.disk_usage
+                    disk_data_dict = metric.disk_usage
 
                     max_percent = 0.0
                     for mount, usage in disk_data_dict.items():
@@ -4978,7 +4970,7 @@ def server_metrics_api(request, server_id):
 
                     if max_percent > 0:
                         disk_val = max_percent
-                except (json.JSONDecodeError, TypeError, ValueError):
+                except (TypeError, ValueError):
                     disk_val = None
 
             if disk_val is not None:
@@ -4987,42 +4979,18 @@ def server_metrics_api(request, server_id):
                     "value": disk_val
                 })
 
-            # Network data - calculate throughput (bytes/sec)
-            network_entry = None
+            # Network totals; throughput (bytes/sec) is derived for the whole series below.
             if metric.network_io:
                 try:
-                    if isinstance(metric.network_io, str):
-                        network_data_dict = json.loads(metric.network_io)
-                    else:
-                        network_data_dict = metric.network_io
-
-                    # Sum all interfaces
-                    total_rx = 0
-                    total_tx = 0
-                    for interface, io_data in network_data_dict.items():
-                        if isinstance(io_data, dict):
-                            total_rx += io_data.get("bytes_recv", 0) or 0
-                            total_tx += io_data.get("bytes_sent", 0) or 0
-
-                    # Calculate throughput if we have previous data
-                    if prev_network and i > 0:
-                        time_diff = (metric.timestamp - metrics_list[i-1].timestamp).total_seconds()
-                        if time_diff > 0:
-                            rx_throughput = (total_rx - prev_network['rx']) / time_diff
-                            tx_throughput = (total_tx - prev_network['tx']) / time_diff
-                            network_entry = {
-                                "timestamp": timestamp_str,
-                                "rx": rx_throughput,
-                                "tx": tx_throughput
-                            }
-
-                    prev_network = {'rx': total_rx, 'tx': total_tx}
-
-                except (json.JSONDecodeError, TypeError, ValueError):
+                    total_tx, total_rx = sum_network_io(metric.network_io)
+                    network_samples.append((metric.timestamp, total_tx, total_rx))
+                except (TypeError, ValueError):
                     pass
 
-            if network_entry:
-                network_data.append(network_entry)
+        network_data = [
+            {"timestamp": ts.isoformat(), "rx": rx, "tx": tx}
+            for ts, tx, rx in throughput_series(network_samples)
+        ]
 
         # Calculate server status
         server_status = _calculate_server_status(server)
@@ -6086,11 +6054,11 @@ def dashboard_summary_stats_api(request):
         # alerts -- so they're excluded from the alerts banner/summary count.
         active_alerts = AlertHistory.objects.filter(status='triggered').count()
 
-        # Count critical servers (warning or offline status)
+        # Count critical servers (warning or offline status). Statuses are resolved for
+        # the whole fleet in a few queries, not a config/heartbeat/alert lookup per server.
         critical_count = 0
         online_count = 0
-        for server in Server.objects.all():
-            status = _calculate_server_status(server)
+        for status in _bulk_server_statuses(Server.objects.only("id")).values():
             if status in ['warning', 'offline']:
                 critical_count += 1
             elif status == 'online':
@@ -6484,14 +6452,13 @@ def dashboard_top_memory_consumers_api(request):
 def dashboard_health_status_api(request):
     """API endpoint for health status distribution"""
     try:
-        servers = Server.objects.all()
+        statuses = _bulk_server_statuses(Server.objects.only("id"))
         healthy_count = 0
         warning_count = 0
         critical_count = 0
         offline_count = 0
         
-        for server in servers:
-            status = _calculate_server_status(server)
+        for status in statuses.values():
             if status == 'online':
                 healthy_count += 1
             elif status == 'warning':
@@ -6508,7 +6475,7 @@ def dashboard_health_status_api(request):
                 'warning': warning_count,
                 'critical': critical_count,
                 'offline': offline_count,
-                'total': servers.count()
+                'total': len(statuses)
             },
             'timestamp': timezone.now().isoformat()
         })
@@ -6696,7 +6663,6 @@ def dashboard_servers_list_api(request):
 def dashboard_disk_mount_points_api(request, server_id):
     """API endpoint for getting disk mount points for a server"""
     try:
-        import json
         server = get_object_or_404(Server, id=server_id)
         
         # Virtual filesystem types to exclude from disk reporting
@@ -6712,11 +6678,7 @@ def dashboard_disk_mount_points_api(request, server_id):
         if latest_metric:
             if latest_metric.disk_usage:
                 try:
-                    # Handle both string and dict formats
-                    if isinstance(latest_metric.disk_usage, str):
-                        disk_data = json.loads(latest_metric.disk_usage)
-                    else:
-                        disk_data = latest_metric.disk_usage
+                    disk_data = latest_metric.disk_usage
                     
                     # Extract mount points from dict, filtering out virtual filesystems
                     if isinstance(disk_data, dict):
@@ -6741,7 +6703,7 @@ def dashboard_disk_mount_points_api(request, server_id):
                         
                         # Sort mount points, with '/' first
                         mount_points = sorted(mount_points, key=lambda x: (x != '/', x))
-                except (json.JSONDecodeError, TypeError, AttributeError) as e:
+                except (TypeError, AttributeError) as e:
                     error_logger.warning(f"DASHBOARD_DISK_MOUNT_POINTS_API: Error parsing disk_usage for server {server_id}: {str(e)}")
             else:
                 error_logger.warning(f"DASHBOARD_DISK_MOUNT_POINTS_API: No disk_usage data for server {server_id}")
@@ -7846,10 +7808,11 @@ def _is_background_service(svc):
         # is collapsed as background but still monitored.
         if name in _NOTABLE_WINDOWS_SERVICE_NAMES:
             return False
-        return not any(name.startswith(p) for p in _NOTABLE_WINDOWS_SERVICE_PREFIXES)
+        return not name.startswith(_NOTABLE_WINDOWS_SERVICE_PREFIXES)
     if name in _BACKGROUND_SERVICE_NAMES:
         return True
-    return any(name.startswith(p) for p in _BACKGROUND_SERVICE_PREFIXES)
+    # str.startswith takes the whole tuple: one C-level call, not a generator per prefix
+    return name.startswith(_BACKGROUND_SERVICE_PREFIXES)
 
 
 @staff_member_required
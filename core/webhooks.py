@@ -0,0 +1,14 @@
+"""Pooled HTTP for outbound alert webhooks (Slack).
+
+Every Slack send point posts to the same host (hooks.slack.com). Each call used to go
+through a bare requests.post, which opens and tears down a TCP + TLS connection per
+message. A burst of alerts (a host going down takes its services and containers with
+it) now reuses a kept-alive connection from the shared session in core.http, the same
+idea as the pooled SMTP connections in email_backend.
+"""
+from . import http
+
+
+def post(url, **kwargs):
+    """requests.post through the shared kept-alive session."""
+    return http.session.post(url, **kwargs)
@@ -10,6 +10,9 @@ django.setup()
 from django.core.management import call_command
 from django.utils import timezone
 
+from core.alert_delivery import wait_for_alert_deliveries
+from core.management.commands.track_app_heartbeat import record_app_heartbeat
+
 running = True
 
 def signal_handler(signum, frame):
@@ -46,7 +49,10 @@ while running:
     try:
         # Track that monitoring app is running (non-critical, continue even if it fails)
         try:
-            call_command("track_app_heartbeat", verbosity=0)
+            # Direct call: this runs every 30s, call_command's parser/command setup isn't worth it
+            record_app_heartbeat()
+        except OSError:
+            pass  # heartbeat file not writable; the cache entry is set (as with the command)
         except Exception as heartbeat_error:
             # Log but don't stop metrics collection if heartbeat tracking fails
             print(f"Warning: Heartbeat tracking failed (non-critical): {heartbeat_error}")
@@ -166,4 +172,6 @@ while running:
             break
         time.sleep(1)
 
+# Let alerts queued by the last pass (synthetic checks, ...) finish sending before exit
+wait_for_alert_deliveries(timeout=60)
 print("\nScheduler stopped.")